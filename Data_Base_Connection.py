@@ -4,12 +4,263 @@
 # The author is responsible for the complete implementation
 
 import json
+import os
+
 import psycopg2
 import psycopg2.extensions
+from config_store import config_store, BASE_PATH, LOGIN_CONFIG_PATH
+
+# bump this whenever create_tables / upgrade_schema / upgrade_indexes change,
+# databases verified with an older version are checked again on the next start
+SCHEMA_VERSION = 3
+# databases whose schema is known to be up to date (see prepare_database)
+SCHEMA_MARKER_PATH = os.path.join(BASE_PATH, ".schema_verified.json")
+ADMIN_CONNECT_TIMEOUT = 10 # seconds, an unreachable server should not block the check forever
+
+# results of prepare_database
+SCHEMA_CACHED = "cached" # marker found, the server was not contacted
+SCHEMA_VERIFIED = "verified" # existing database checked and upgraded where needed
+SCHEMA_CREATED = "created" # database and tables created
+
+# secondary indexes for the common access patterns: (name, table, column list)
+INDEXES = [
+    # grades of an exam (dashboard exam views, grade sheet) and ON DELETE CASCADE from exam;
+    # grades of a student are already covered by grade_unique_student_exam (matriculation_number, pnr)
+    ("grade_pnr_idx", "grade", "pnr"),
+    # students ordered by name (grade sheet)
+    ("student_name_idx", "student", "last_name, first_name, matriculation_number"),
+    # exams ordered by title (dropdown menus)
+    ("exam_title_idx", "exam", "title"),
+    # filters on semester and/or degree program (dashboard, grade export)
+    ("exam_semester_degree_program_idx", "exam", "semester, degree_program"),
+    ("exam_degree_program_idx", "exam", "degree_program"),
+    # delta sync of the entity cache: rows changed / deleted since the last sync
+    ("student_updated_txid_idx", "student", "updated_txid"),
+    ("exam_updated_txid_idx", "exam", "updated_txid"),
+    ("deleted_record_txid_idx", "deleted_record", "table_name, deleted_txid"),
+]
+
+# text the type-ahead search of the dropdown menus matches against (see search_* in repository.py),
+# the queries have to use exactly these expressions for the trigram indexes to be used
+SEARCH_EXPRESSIONS = {
+    "student": "(matriculation_number || ' ' || last_name || ' ' || first_name)",
+    "exam": "(pnr || ' ' || title)",
+}
+
+# trigram (pg_trgm) GIN indexes for ILIKE '%text%', only created if the extension is available
+SEARCH_INDEXES = [
+    ("student_search_trgm_idx", "student", f"{SEARCH_EXPRESSIONS['student']} gin_trgm_ops"),
+    ("exam_search_trgm_idx", "exam", f"{SEARCH_EXPRESSIONS['exam']} gin_trgm_ops"),
+]
+
+# per-student and per-exam grade statistics, kept current by triggers on grade,
+# so averages and standard deviations are lookups instead of scans over all grades.
+# the buckets are the grade clusters of the dashboard: <=1.5, 1.6-2.5, 2.6-3.5, 3.6-4.0, >4.0
+SUMMARY_COLUMNS = """
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    grade_sum NUMERIC NOT NULL DEFAULT 0,
+    grade_sum_sq NUMERIC NOT NULL DEFAULT 0,
+    grade_min NUMERIC(3,1),
+    grade_max NUMERIC(3,1),
+    bucket_very_good INTEGER NOT NULL DEFAULT 0,
+    bucket_good INTEGER NOT NULL DEFAULT 0,
+    bucket_average INTEGER NOT NULL DEFAULT 0,
+    bucket_below_average INTEGER NOT NULL DEFAULT 0,
+    bucket_failed INTEGER NOT NULL DEFAULT 0
+"""
+
+SUMMARY_TABLES = {
+    # summary table -> (key column, referenced table)
+    "student_grade_summary": ("matriculation_number", "student"),
+    "exam_grade_summary": ("pnr", "exam"),
+}
+
+# adds (direction = 1) or removes (direction = -1) one grade from the summary row of key_value.
+# min/max can not be reverted, so they are recomputed from grade (index scan) when the removed grade was the min or max.
+# the summary row is locked by a statement of its own first: under READ COMMITTED an UPDATE which waited for the
+# lock keeps the snapshot of its start in subqueries, it would miss a grade committed meanwhile by the lock holder
+SUMMARY_FUNCTIONS = """
+    CREATE OR REPLACE FUNCTION public.grade_summary_apply(summary_table TEXT, key_column TEXT, key_value TEXT,
+                                                          grade_value NUMERIC, direction INTEGER)
+    RETURNS VOID AS $$
+    BEGIN
+        IF grade_value IS NULL THEN
+            RETURN;
+        END IF;
+
+        IF direction > 0 THEN
+            EXECUTE format(
+                'INSERT INTO public.%1$I AS s (%2$I, grade_count, grade_sum, grade_sum_sq, grade_min, grade_max,
+                                               bucket_very_good, bucket_good, bucket_average, bucket_below_average, bucket_failed)
+                 VALUES ($1, 1, $2, $2 * $2, $2, $2,
+                         ($2 <= 1.5)::int, ($2 > 1.5 AND $2 <= 2.5)::int, ($2 > 2.5 AND $2 <= 3.5)::int,
+                         ($2 > 3.5 AND $2 <= 4.0)::int, ($2 > 4.0)::int)
+                 ON CONFLICT (%2$I) DO UPDATE SET
+                     grade_count = s.grade_count + 1,
+                     grade_sum = s.grade_sum + EXCLUDED.grade_sum,
+                     grade_sum_sq = s.grade_sum_sq + EXCLUDED.grade_sum_sq,
+                     grade_min = LEAST(s.grade_min, EXCLUDED.grade_min),
+                     grade_max = GREATEST(s.grade_max, EXCLUDED.grade_max),
+                     bucket_very_good = s.bucket_very_good + EXCLUDED.bucket_very_good,
+                     bucket_good = s.bucket_good + EXCLUDED.bucket_good,
+                     bucket_average = s.bucket_average + EXCLUDED.bucket_average,
+                     bucket_below_average = s.bucket_below_average + EXCLUDED.bucket_below_average,
+                     bucket_failed = s.bucket_failed + EXCLUDED.bucket_failed',
+                summary_table, key_column)
+            USING key_value, grade_value;
+        ELSE
+            EXECUTE format('SELECT 1 FROM public.%1$I WHERE %2$I = $1 FOR UPDATE', summary_table, key_column)
+            USING key_value;
+            -- new statement, new snapshot: sees everything committed before the lock was granted
+            EXECUTE format(
+                'UPDATE public.%1$I AS s SET
+                     grade_count = s.grade_count - 1,
+                     grade_sum = s.grade_sum - $2,
+                     grade_sum_sq = s.grade_sum_sq - $2 * $2,
+                     grade_min = CASE WHEN $2 <= s.grade_min
+                                      THEN (SELECT MIN(g.grade) FROM public.grade g WHERE g.%2$I = $1)
+                                      ELSE s.grade_min END,
+                     grade_max = CASE WHEN $2 >= s.grade_max
+                                      THEN (SELECT MAX(g.grade) FROM public.grade g WHERE g.%2$I = $1)
+                                      ELSE s.grade_max END,
+                     bucket_very_good = s.bucket_very_good - ($2 <= 1.5)::int,
+                     bucket_good = s.bucket_good - ($2 > 1.5 AND $2 <= 2.5)::int,
+                     bucket_average = s.bucket_average - ($2 > 2.5 AND $2 <= 3.5)::int,
+                     bucket_below_average = s.bucket_below_average - ($2 > 3.5 AND $2 <= 4.0)::int,
+                     bucket_failed = s.bucket_failed - ($2 > 4.0)::int
+                 WHERE s.%2$I = $1',
+                summary_table, key_column)
+            USING key_value, grade_value;
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION public.grade_summary_trigger()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM public.grade_summary_apply('student_grade_summary', 'matriculation_number', OLD.matriculation_number, OLD.grade, -1);
+            PERFORM public.grade_summary_apply('exam_grade_summary', 'pnr', OLD.pnr, OLD.grade, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM public.grade_summary_apply('student_grade_summary', 'matriculation_number', NEW.matriculation_number, NEW.grade, 1);
+            PERFORM public.grade_summary_apply('exam_grade_summary', 'pnr', NEW.pnr, NEW.grade, 1);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS grade_summary_update ON public.grade;
+    CREATE TRIGGER grade_summary_update
+        AFTER INSERT OR UPDATE OF matriculation_number, pnr, grade OR DELETE ON public.grade
+        FOR EACH ROW EXECUTE FUNCTION public.grade_summary_trigger();
+"""
+
+# averages and (sample) standard deviations from the summaries, same definition as R's mean() and sd()
+SUMMARY_VIEWS = """
+    CREATE OR REPLACE VIEW public.{view} AS
+    SELECT {key},
+           grade_count,
+           grade_sum / NULLIF(grade_count, 0) AS grade_avg,
+           SQRT(GREATEST(grade_sum_sq - grade_sum * grade_sum / NULLIF(grade_count, 0), 0)
+                / NULLIF(grade_count - 1, 0)) AS grade_sd,
+           grade_min, grade_max,
+           bucket_very_good, bucket_good, bucket_average, bucket_below_average, bucket_failed
+    FROM public.{table};
+"""
+
+# every change of these tables is announced on CHANGE_CHANNEL with the table name as payload,
+# so the GUIs only reload what changed (see change_listener.py)
+CHANGE_CHANNEL = "table_changed"
+CHANGE_TABLES = ("student", "exam", "grade")
+
+# one notification per statement (not per row), identical notifications of a transaction are merged by PostgreSQL
+CHANGE_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION public.notify_table_changed()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM pg_notify('{CHANGE_CHANNEL}', TG_TABLE_NAME);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+# change tracking for the delta sync of the entity cache (see entity_cache.py):
+# every insert/update stamps the row with the id of the writing transaction,
+# every delete (or key change) leaves a tombstone with the deleted key
+TRACKED_TABLES = {
+    # table -> key column
+    "student": "matriculation_number",
+    "exam": "pnr",
+}
+TOMBSTONE_RETENTION = "7 days" # caches are loaded completely on every start, so old tombstones are not needed
+
+TRACKING_FUNCTIONS = """
+    CREATE TABLE IF NOT EXISTS public.deleted_record (
+        id BIGSERIAL PRIMARY KEY,
+        table_name VARCHAR(20) NOT NULL,
+        record_key VARCHAR(20) NOT NULL,
+        deleted_txid BIGINT NOT NULL DEFAULT txid_current(),
+        deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE OR REPLACE FUNCTION public.stamp_updated_txid()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_txid := txid_current();
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
 
-def load_config(path: str = "user_login_config.json") -> dict:
+    -- TG_ARGV[0] is the key column of the table
+    CREATE OR REPLACE FUNCTION public.record_tombstone()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        old_key TEXT := to_jsonb(OLD) ->> TG_ARGV[0];
+    BEGIN
+        IF TG_OP = 'DELETE' OR old_key IS DISTINCT FROM to_jsonb(NEW) ->> TG_ARGV[0] THEN
+            INSERT INTO public.deleted_record (table_name, record_key) VALUES (TG_TABLE_NAME, old_key);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+# sequences the GUI reserves new matriculation numbers and PNRs from (see id_allocator.py)
+ID_SEQUENCES = {
+    # table -> (key column, sequence)
+    "student": ("matriculation_number", "student_matriculation_number_seq"),
+    "exam": ("pnr", "exam_pnr_seq"),
+}
+NUMERIC_KEY = "'^[0-9]{1,18}$'" # keys which fit into a bigint, other keys are ignored by the sequences
+
+# keys entered by hand, imported or generated move the sequence past them, so reserved ids never collide
+# with them. One check per statement (transition table), the advisory lock keeps concurrent statements
+# from moving the sequence backwards. TG_ARGV[0] is the key column, TG_ARGV[1] the sequence
+ID_SEQUENCE_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION public.advance_id_sequence()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        max_key BIGINT;
+    BEGIN
+        EXECUTE format('SELECT max(%1$I::bigint) FROM new_rows WHERE %1$I ~ {NUMERIC_KEY.replace("'", "''")}', TG_ARGV[0])
+            INTO max_key;
+        IF max_key IS NOT NULL AND max_key > coalesce(pg_sequence_last_value(TG_ARGV[1]::regclass), 0) THEN
+            PERFORM pg_advisory_xact_lock(hashtext(TG_ARGV[1]));
+            IF max_key > coalesce(pg_sequence_last_value(TG_ARGV[1]::regclass), 0) THEN
+                PERFORM setval(TG_ARGV[1]::regclass, max_key);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def load_config(path: str = LOGIN_CONFIG_PATH) -> dict:
     """
     Load the PostgreSQL login configuration from a JSON file.
+    The file is parsed only once and served from the config store until it changes.
 
     The JSON file should contain:
         - username
@@ -21,8 +272,7 @@ def load_config(path: str = "user_login_config.json") -> dict:
     Returns:
         dict with keys as listed above.
     """
-    with open(path, "r", encoding="utf-8") as file:
-        return json.load(file)
+    return config_store.get(path)
 
 
 def database_missing(conn: psycopg2.extensions.connection, db_name: str) -> bool:
@@ -129,24 +379,324 @@ def create_tables(config):
             );
         """)
 
+        # updated_txid + tombstones for the delta sync of the GUI caches
+        create_change_tracking(cur)
+
+        # the tables are empty, so the indexes can be created directly
+        for name, table, columns, method in index_definitions(cur):
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON public.{table} USING {method} ({columns});")
+
+        # grade statistics per student and exam
+        create_summary_tables(cur)
+
+        # sequences for new matriculation numbers and PNRs
+        create_id_sequences(cur)
+
+        # NOTIFY on every change, so open GUIs can refresh
+        create_change_notifications(cur)
+
         print("Tables 'student', 'exam', and 'grade' created successfully.")
     finally:
         cur.close()
         conn.close()
 
 
-def prepare_database(config_path: str = "user_login_config.json"):
+def enable_trigram_search(cur):
+    """
+    Install pg_trgm for the type-ahead search (trusted extension since PostgreSQL 13, so the database owner may install it).
+
+    Args:
+        cur: cursor of an autocommit connection to the target database
+
+    Returns:
+        True if pg_trgm is available
+    """
+    try:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        return True
+    except psycopg2.Error as e:
+        # the search still works without it, only without index
+        print("Extension pg_trgm not available, type-ahead search runs without index:", e)
+        return False
+
+
+def index_definitions(cur):
+    """
+    All indexes to create: (name, table, columns, method)
+
+    Args:
+        cur: cursor of an autocommit connection to the target database
+    """
+    indexes = [(name, table, columns, "btree") for name, table, columns in INDEXES]
+    if enable_trigram_search(cur):
+        indexes += [(name, table, columns, "gin") for name, table, columns in SEARCH_INDEXES]
+    return indexes
+
+
+def upgrade_indexes(config):
+    """
+    Create missing indexes on an existing database with CREATE INDEX CONCURRENTLY,
+    so the tables stay writable while the indexes are built.
+
+    A failed concurrent build leaves an INVALID index behind, which IF NOT EXISTS would skip,
+    so invalid indexes are dropped and built again.
+
+    Args:
+        config (dict): PostgreSQL login configuration including 'database'.
+    """
+    conn = psycopg2.connect(
+        dbname=config["database"],
+        user=config["username"],
+        password=config["password"],
+        host=config["host"],
+        port=config["port"]
+    )
+    conn.autocommit = True  # CONCURRENTLY can not run inside a transaction block
+    cur = conn.cursor()
+
+    try:
+        for name, table, columns, method in index_definitions(cur):
+            cur.execute("""
+                SELECT i.indisvalid
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE n.nspname = 'public' AND c.relname = %s;
+            """, (name,))
+            row = cur.fetchone()
+
+            if row is not None and row[0]:
+                continue # index exists and is valid
+
+            if row is not None:
+                print(f"Index '{name}' is invalid (interrupted build), dropping it...")
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS public.{name};")
+
+            print(f"Creating index '{name}' on '{table}'...")
+            cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON public.{table} USING {method} ({columns});")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def create_summary_tables(cur):
+    """
+    Create the grade summary tables, their views and the triggers which keep them current.
+    Every statement is idempotent, so this is used for new and existing databases.
+
+    Args:
+        cur: cursor of a connection to the target database
+    """
+    for table, (key, referenced) in SUMMARY_TABLES.items():
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS public.{table} (
+                {key} VARCHAR(20) PRIMARY KEY
+                    REFERENCES public.{referenced}({key}) ON DELETE CASCADE,
+                {SUMMARY_COLUMNS}
+            );
+        """)
+        view = table.replace("_summary", "_stats")
+        cur.execute(SUMMARY_VIEWS.format(view=view, key=key, table=table))
+
+    cur.execute(SUMMARY_FUNCTIONS)
+
+
+def rebuild_summary_tables(cur):
+    """
+    Recompute the summary tables from all grades (initial fill of an existing database).
+    grade is locked against writes meanwhile, so no change gets lost between the scan and the trigger.
+
+    Args:
+        cur: cursor of a connection to the target database (inside a transaction)
+    """
+    cur.execute("LOCK TABLE public.grade IN SHARE MODE;")
+    for table, (key, _) in SUMMARY_TABLES.items():
+        cur.execute(f"DELETE FROM public.{table};")
+        cur.execute(f"""
+            INSERT INTO public.{table} ({key}, grade_count, grade_sum, grade_sum_sq, grade_min, grade_max,
+                                        bucket_very_good, bucket_good, bucket_average, bucket_below_average, bucket_failed)
+            SELECT {key}, COUNT(grade), SUM(grade), SUM(grade * grade), MIN(grade), MAX(grade),
+                   COUNT(*) FILTER (WHERE grade <= 1.5),
+                   COUNT(*) FILTER (WHERE grade > 1.5 AND grade <= 2.5),
+                   COUNT(*) FILTER (WHERE grade > 2.5 AND grade <= 3.5),
+                   COUNT(*) FILTER (WHERE grade > 3.5 AND grade <= 4.0),
+                   COUNT(*) FILTER (WHERE grade > 4.0)
+            FROM public.grade
+            WHERE grade IS NOT NULL
+            GROUP BY {key};
+        """)
+
+
+def create_change_tracking(cur):
+    """
+    Add the updated_txid column, the tombstone table and their triggers to student and exam (idempotent).
+
+    Args:
+        cur: cursor of a connection to the target database
+    """
+    cur.execute(TRACKING_FUNCTIONS)
+    for table, key in TRACKED_TABLES.items():
+        # existing rows keep 0, they are part of every full load anyway
+        cur.execute(f"ALTER TABLE public.{table} ADD COLUMN IF NOT EXISTS updated_txid BIGINT NOT NULL DEFAULT 0;")
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_stamp_updated_txid ON public.{table};")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_stamp_updated_txid
+                BEFORE INSERT OR UPDATE ON public.{table}
+                FOR EACH ROW EXECUTE FUNCTION public.stamp_updated_txid();
+        """)
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_record_tombstone ON public.{table};")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_record_tombstone
+                AFTER DELETE OR UPDATE OF {key} ON public.{table}
+                FOR EACH ROW EXECUTE FUNCTION public.record_tombstone('{key}');
+        """)
+
+
+def create_change_notifications(cur):
+    """
+    Create the triggers which NOTIFY the GUIs about changes of student, exam and grade (idempotent).
+
+    Args:
+        cur: cursor of a connection to the target database
+    """
+    cur.execute(CHANGE_FUNCTION)
+    for table in CHANGE_TABLES:
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_notify_change ON public.{table};")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.{table}
+                FOR EACH STATEMENT EXECUTE FUNCTION public.notify_table_changed();
+        """)
+
+
+def create_id_sequences(cur):
+    """
+    Create the sequences of ID_SEQUENCES, seed them from the current maximum key and add the
+    triggers which keep them ahead of keys inserted without the sequence (idempotent, never moves a sequence back).
+
+    Args:
+        cur: cursor of a connection to the target database
+    """
+    cur.execute(ID_SEQUENCE_FUNCTION)
+    for table, (key, sequence) in ID_SEQUENCES.items():
+        cur.execute(f"CREATE SEQUENCE IF NOT EXISTS public.{sequence} AS BIGINT MINVALUE 1;")
+        # the sequence is shared by all clients, existing keys have to be skipped
+        cur.execute(f"""
+            SELECT setval('public.{sequence}', max_key)
+            FROM (SELECT max({key}::bigint) AS max_key FROM public.{table} WHERE {key} ~ {NUMERIC_KEY}) AS existing
+            WHERE max_key > coalesce(pg_sequence_last_value('public.{sequence}'), 0);
+        """)
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_advance_id_sequence ON public.{table};")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_advance_id_sequence
+                AFTER INSERT ON public.{table}
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION public.advance_id_sequence('{key}', 'public.{sequence}');
+        """)
+
+
+def upgrade_schema(config):
+    """
+    Add the summary tables (filled once from the grade table), the change notifications,
+    the change tracking and the id sequences to an existing database. Old tombstones are removed.
+
+    Args:
+        config (dict): PostgreSQL login configuration including 'database'.
+    """
+    conn = psycopg2.connect(
+        dbname=config["database"],
+        user=config["username"],
+        password=config["password"],
+        host=config["host"],
+        port=config["port"]
+    )
+    cur = conn.cursor()
+
+    try:
+        cur.execute("SELECT to_regclass('public.student_grade_summary') IS NULL;")
+        missing = cur.fetchone()[0]
+
+        # one transaction: tables, triggers and the initial fill become visible together
+        create_summary_tables(cur)
+        if missing:
+            print("Creating grade summary tables...")
+            rebuild_summary_tables(cur)
+        create_change_notifications(cur)
+        create_change_tracking(cur)
+        create_id_sequences(cur)
+        cur.execute(f"DELETE FROM public.deleted_record WHERE deleted_at < now() - interval '{TOMBSTONE_RETENTION}';")
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+# === SCHEMA MARKER ===
+
+def schema_marker_key(config):
+    """the marker is only valid for the same server, database and user"""
+    return f"{config['username']}@{config['host']}:{config['port']}/{config['database']}"
+
+
+def schema_verified(config) -> bool:
+    """True if this database was already verified with the current SCHEMA_VERSION"""
+    try:
+        with open(SCHEMA_MARKER_PATH, "r", encoding="utf-8") as file:
+            marker = json.load(file)
+    except (OSError, ValueError):
+        return False
+    return isinstance(marker, dict) and marker.get(schema_marker_key(config)) == SCHEMA_VERSION
+
+
+def mark_schema_verified(config):
+    """remember that the schema of this database is up to date, so the next start skips the check"""
+    try:
+        with open(SCHEMA_MARKER_PATH, "r", encoding="utf-8") as file:
+            marker = json.load(file)
+        if not isinstance(marker, dict):
+            marker = {}
+    except (OSError, ValueError):
+        marker = {}
+    marker[schema_marker_key(config)] = SCHEMA_VERSION
+    try:
+        # write + rename, a crash while writing must not leave a broken marker
+        temp_path = SCHEMA_MARKER_PATH + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(marker, file, indent=2)
+        os.replace(temp_path, SCHEMA_MARKER_PATH)
+    except OSError as e:
+        print("Could not write the schema marker:", e)
+
+
+def prepare_database(config_path: str = LOGIN_CONFIG_PATH, force: bool = False):
     """
     This is the only function the GUI needs to call.
     It will:
         1. Load config
-        2. Connect to postgres server
-        3. Check if the target database exists
-        4. Create database + tables if missing
+        2. Skip everything else if the schema of this database was already verified (unless force)
+        3. Connect to postgres server
+        4. Check if the target database exists
+        5. Create database + tables if missing
+        6. Add missing tables, triggers and indexes to an existing database
+        7. Remember the verified schema version (SCHEMA_MARKER_PATH)
+
+    Args:
+        config_path: login configuration
+        force: check the schema even if it was already verified
+
+    Returns:
+        SCHEMA_CACHED, SCHEMA_VERIFIED or SCHEMA_CREATED, None if the check failed
     """
     config = load_config(config_path)
     db_name = config["database"]
 
+    if not force and schema_verified(config):
+        print(f"Schema of database '{db_name}' already verified (version {SCHEMA_VERSION}), skipping the check.")
+        return SCHEMA_CACHED
+
     # Print config without password for security
     safe_config = {k: v for k, v in config.items() if k != "password"}
     print("Loaded configuration (password hidden):")
@@ -159,23 +709,41 @@ def prepare_database(config_path: str = "user_login_config.json"):
             user=config["username"],
             password=config["password"],
             host=config["host"],
-            port=config["port"]
+            port=config["port"],
+            connect_timeout=ADMIN_CONNECT_TIMEOUT
         )
         print("Connected to PostgreSQL server (database 'postgres').")
     except psycopg2.OperationalError as e:
         print("Failed to connect to PostgreSQL server. Check your credentials and server status.")
         print("Detailed error:", e)
-        return
+        return None
 
+    status = None
     try:
         if database_missing(conn, db_name) == True:
             print(f"Database '{db_name}' does not exist. Creating now...")
             conn.close()  # close old connection before creating DB
             create_database(db_name, config)
             create_tables(config)
+            status = SCHEMA_CREATED
         else:
             print(f"Database '{db_name}' already exists. No creation required.")
+            status = SCHEMA_VERIFIED
+            try:
+                upgrade_schema(config)
+            except psycopg2.Error as e:
+                print("Failed to upgrade the database schema:", e)
+                status = None
+            try:
+                upgrade_indexes(config)
+            except psycopg2.Error as e:
+                # the application works without the indexes, only slower, but they are retried on the next start
+                print("Failed to create missing indexes:", e)
+                status = None
     finally:
         conn.close()
         print("Connection to server closed.")
 
+    if status is not None:
+        mark_schema_verified(config)
+    return status
@@ -6,6 +6,12 @@
 
 import os
 from pages import ExamPage, GradePage, HomePage, StatsPage, StudentPage
+from connection_pool import close_pool
+from change_listener import get_change_listener
+from database_worker import SchemaWorker, get_executor
+from Data_Base_Connection import SCHEMA_CACHED
+from write_behind import flush_all
+from shiny_service import get_shiny_service, prestart_if_enabled
 from PySide6.QtCore import QSize, Slot, QTimer
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import (QMainWindow, QPushButton, QStatusBar,
@@ -26,6 +32,40 @@ class MainWindow(QMainWindow):
         self.image_path = os.path.join(self.base_path, "Images")
         self.setup_window()
         self.home_btn_clicked()
+        self.verify_schema()
+        # pages refresh only when their tables changed, the connection is opened once the event loop runs (window shown)
+        QTimer.singleShot(0, get_change_listener().start)
+        get_shiny_service().failed.connect(self.on_shiny_failed)
+        prestart_if_enabled() # R loads in the background while the user works on the other pages
+
+
+    def verify_schema(self):
+        """check the database schema in the background, the window is usable in the meantime"""
+        self.schema_worker = SchemaWorker()
+        self.schema_worker.finished.connect(self.on_schema_verified)
+        get_executor().submit(self.schema_worker)
+
+    def on_shiny_failed(self, message):
+        """show why the dashboard could not be started, also when it was started in the background"""
+        self.statusBar().showMessage(message, 10000)
+
+    def on_schema_verified(self, success, message):
+        """
+        reload the pages if the schema check created or upgraded something
+        Args:
+            success: False if the server was not reachable or the schema could not be upgraded
+            message: SCHEMA_CACHED, SCHEMA_VERIFIED or SCHEMA_CREATED, the error otherwise
+        """
+        self.schema_worker = None
+        if not success:
+            self.statusBar().showMessage(f"Database connection failed! maybe the user_login_config.json is wrong? {message}", 10000)
+            return
+        if message == SCHEMA_CACHED:
+            return
+        # the pages may have loaded before the tables existed, the listener may have failed the same way
+        listener = get_change_listener()
+        listener.start()
+        listener.announce_all()
 
 
     def setup_window(self):
@@ -92,22 +132,50 @@ class MainWindow(QMainWindow):
 
     
     def setup_tabs(self):
-        """Tab-management for every page"""
-        self.home_tab = HomePage()
-        self.grade_tab = GradePage()
-        self.student_tab = StudentPage()
-        self.exam_tab = ExamPage()
-        self.stats_tab = StatsPage()
-        
-        # Setting up Signals between MainWindow and different pages 
-        self.home_tab.status_message.connect(self.show_status_message)
-        self.grade_tab.data_changed.connect(self.handle_grade_data)
-        self.grade_tab.status_message.connect(self.show_status_message)
-        self.student_tab.data_changed.connect(self.handle_student_data)
-        self.student_tab.status_message.connect(self.show_status_message)       
-        self.exam_tab.data_changed.connect(self.handle_exam_data)
-        self.exam_tab.status_message.connect(self.show_status_message)
-        self.stats_tab.status_message.connect(self.show_status_message)
+        """Tab-management for every page. A page is created on its first visit (see show_page),
+        so the window appears without waiting for the queries of pages that are not shown"""
+        # tab order: (attribute, page class, slot for data_changed)
+        self.pages = [
+            ("home_tab", HomePage, None),
+            ("grade_tab", GradePage, self.handle_grade_data),
+            ("student_tab", StudentPage, self.handle_student_data),
+            ("exam_tab", ExamPage, self.handle_exam_data),
+            ("stats_tab", StatsPage, None),
+        ]
+
+        # one empty container per tab, the page is put into it when it is created
+        self.page_containers = []
+        for attribute, _, _ in self.pages:
+            setattr(self, attribute, None)
+            container = QWidget()
+            container_layout = QVBoxLayout(container)
+            container_layout.setContentsMargins(0, 0, 0, 0)
+            self.page_containers.append(container)
+
+    def create_page(self, index):
+        """
+        create the page of a tab if it does not exist yet
+        Args:
+            index: index of the tab
+        Returns:
+            the page
+        """
+        attribute, page_class, data_slot = self.pages[index]
+        page = getattr(self, attribute)
+        if page is None:
+            page = page_class()
+            # Setting up Signals between MainWindow and the page
+            page.status_message.connect(self.show_status_message)
+            if data_slot is not None:
+                page.data_changed.connect(data_slot)
+            self.page_containers[index].layout().addWidget(page)
+            setattr(self, attribute, page)
+        return page
+
+    def show_page(self, index):
+        """switch to the tab, its page is created on the first visit"""
+        self.create_page(index)
+        self.right_widget.setCurrentIndex(index)
 
     # Slot to receive and display status messages from the individual pages
     @Slot(str)
@@ -193,35 +261,35 @@ class MainWindow(QMainWindow):
         self.uncheck_sidebar_buttons()
         self.home_btn.setChecked(True)
         self.update_button_icons()
-        self.right_widget.setCurrentIndex(0)
+        self.show_page(0)
 
     def grade_entry_btn_clicked(self):
         """switch grade-entry-button color and switch to tab"""       
         self.uncheck_sidebar_buttons()
         self.grade_entry_btn.setChecked(True)
         self.update_button_icons()
-        self.right_widget.setCurrentIndex(1)
+        self.show_page(1)
 
     def student_entry_btn_clicked(self):
         """switch student-entry-button color and switch to tab"""      
         self.uncheck_sidebar_buttons()
         self.student_entry_btn.setChecked(True)
         self.update_button_icons()
-        self.right_widget.setCurrentIndex(2)
+        self.show_page(2)
 
     def exam_entry_btn_clicked(self):
         """switch exam-entry-button color and switch to tab"""      
         self.uncheck_sidebar_buttons()
         self.exam_entry_btn.setChecked(True)
         self.update_button_icons()
-        self.right_widget.setCurrentIndex(3)
+        self.show_page(3)
 
     def stats_btn_clicked(self):
         """switch stats-button color and switch to tab"""      
         self.uncheck_sidebar_buttons()
         self.stats_btn.setChecked(True)
         self.update_button_icons()
-        self.right_widget.setCurrentIndex(4)
+        self.show_page(4)
 
     def uncheck_sidebar_buttons(self):
         """uncheck all sidebar buttons"""
@@ -258,11 +326,8 @@ class MainWindow(QMainWindow):
         self.right_widget = QTabWidget()
         self.right_widget.tabBar().setObjectName("mainTab")
 
-        self.right_widget.addTab(self.home_tab, '')
-        self.right_widget.addTab(self.grade_tab, '')
-        self.right_widget.addTab(self.student_tab, '')
-        self.right_widget.addTab(self.exam_tab, '')
-        self.right_widget.addTab(self.stats_tab, '')
+        for container in self.page_containers:
+            self.right_widget.addTab(container, '')
 
         self.right_widget.setCurrentIndex(0)
         self.right_widget.setStyleSheet('''QTabBar::tab{width: 0; \
@@ -283,6 +348,10 @@ class MainWindow(QMainWindow):
 
 
     def closeEvent(self, event):
-        """ Stop shiny app when closing the main Window"""
-        self.stats_tab.stop_shiny_app()
+        """ Stop shiny app and close pooled db connections when closing the main Window"""
+        get_shiny_service().stop() # may run without the Statistics page (started at launch)
+        get_change_listener().stop()
+        flush_all() # entries of the rapid-entry mode which are not written yet
+        get_executor().wait_for_done(3000)
+        close_pool()
         event.accept
\ No newline at end of file
@@ -0,0 +1,374 @@
+"""End-to-end benchmarks against a local PostgreSQL server.
+
+The benchmarks run headless on a database of their own (default: <database>_bench, it is dropped
+and created again) with the login data of user_login_config.json. They use the same code paths as
+the GUI: the SyncWorker of the dropdown menus, the statements of repository.py and prepare_database.
+The test data comes from data_generator.py, so runs with the same --seed work on the same rows.
+
+Benchmarks:
+    prepare_database        startup cost on a missing database (cold), on an existing one (warm) and with
+                            the schema marker of an earlier start (cached)
+    dropdown_full_sync      full load of the students/exams for the dropdown menus incl. display texts
+    dropdown_delta_sync     sync of 10 changed rows after the full load
+    grade_insert_single     one INSERT + commit per grade (like the grade entry page)
+    grade_insert_batch      all grades in one execute_values statement (like the grade sheet)
+    delete_cascade          delete_record of a student/exam with many grades (ON DELETE CASCADE)
+
+The results are written as JSON to benchmarks/results/ and can be compared with an earlier run.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scales 1000 100000 --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_PATH)) # the modules of the application
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from data_generator import COLUMNS, DEFAULT_SEED, generate
+from Data_Base_Connection import load_config, prepare_database
+from database_worker import SyncWorker
+from entity_cache import SORT_KEYS, SYNC_CHUNK_SIZE
+from entity_model import DISPLAY_TEXTS
+from repository import DELETE_STATEMENTS, repository
+
+RESULTS_PATH = os.path.join(BENCHMARK_PATH, "results")
+DEFAULT_SCALES = (1000, 100000, 1000000)
+DEFAULT_REPEAT = 3
+DEFAULT_GRADE_ROWS = 1000 # grades per insert benchmark
+DEFAULT_MAX_FANOUT = 100000 # grades of the deleted student/exam
+DELTA_ROWS = 10
+REGRESSION_TOLERANCE = 0.2 # slower by more than 20% -> regression
+
+
+# === DATABASE ===
+
+def connect(config):
+    return psycopg2.connect(
+        host=config["host"],
+        database=config["database"],
+        user=config["username"],
+        password=config["password"],
+        port=config["port"]
+    )
+
+
+def drop_database(config):
+    """drop the benchmark database (connected to the admin database 'postgres')"""
+    conn = psycopg2.connect(dbname="postgres", user=config["username"], password=config["password"],
+                            host=config["host"], port=config["port"])
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {config['database']}")
+    finally:
+        conn.close()
+
+
+KEY = "lpad(i::text, 10, '0')" # matriculation number/PNr i
+
+# grades of the last student in the first exams / of the first students in the last exam
+SEED_FANOUT = {
+    "student": f"""INSERT INTO grade (matriculation_number, pnr, grade)
+                   SELECT lpad(%s::text, 10, '0'), {KEY}, 1.0 + (i % 50) / 10.0 FROM generate_series(1, %s) AS i
+                   ON CONFLICT DO NOTHING""",
+    "exam": f"""INSERT INTO grade (matriculation_number, pnr, grade)
+                SELECT {KEY}, lpad(%s::text, 10, '0'), 1.0 + (i % 50) / 10.0 FROM generate_series(1, %s) AS i
+                ON CONFLICT DO NOTHING""",
+}
+
+TABLE_KEYS = {"student": "matriculation_number", "exam": "pnr"}
+
+
+def seed(config, scale, fanout, grades_per_student, seed_value, workers):
+    """
+    Fill the tables with `scale` generated students and exams (see data_generator.py). The last student
+    gets grades in the first `fanout` exams and the last exam grades of the first `fanout` students
+    (for the cascade benchmark).
+
+    Returns:
+        the fan-out (at most scale - 1, the pair last student/last exam is not part of either)
+    """
+    fanout = min(fanout, scale - 1)
+    generate(config, scale, scale, grades_per_student, seed_value, workers, truncate=True)
+    conn = connect(config)
+    try:
+        with conn.cursor() as cursor:
+            for table in ("student", "exam"):
+                cursor.execute(SEED_FANOUT[table], (scale, fanout))
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    finally:
+        conn.close()
+    return fanout
+
+
+def restore_fanout(conn, table, row, scale, fanout):
+    """insert the deleted student/exam (row as selected before) and its grades again"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {table} ({COLUMNS[table]}) VALUES %s", (tuple(row),))
+        cursor.execute(SEED_FANOUT[table], (scale, fanout))
+    conn.commit()
+
+
+# === BENCHMARKS ===
+
+def measure(function, repeat, setup=None):
+    """
+    run function `repeat` times (setup before every run, not measured)
+
+    Returns:
+        list of seconds
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - started)
+    return runs
+
+
+def result(name, runs, rows=None, **params):
+    seconds = statistics.median(runs)
+    entry = {"benchmark": name, "params": params, "seconds": seconds, "runs": runs}
+    if rows is not None:
+        entry["rows"] = rows
+        entry["rows_per_second"] = rows / seconds if seconds > 0 else 0.0
+    return entry
+
+
+def sync(conn, table, since_txid=None):
+    """
+    run the SyncWorker of the entity cache on the calling thread and build the dropdown entries
+
+    Returns:
+        (watermark, number of rows)
+    """
+    worker = SyncWorker(table, since_txid, SYNC_CHUNK_SIZE)
+    rows = []
+    worker.chunk_fetched.connect(rows.extend) # direct connection, same thread
+    cursor = conn.cursor(name=f"bench_{table}") if since_txid is None else conn.cursor(name=f"bench_delta_{table}")
+    worker.execute(cursor)
+    cursor.close()
+    conn.commit()
+
+    sort_key, descending = SORT_KEYS[table]
+    display_text = DISPLAY_TEXTS[table]
+    [display_text(row) for row in sorted(rows, key=sort_key, reverse=descending)]
+    return worker.watermark, len(rows)
+
+
+def bench_prepare_database(config, repeat):
+    """startup cost of prepare_database on a missing database, on an existing one and with the schema marker"""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        json.dump(config, file)
+        config_path = file.name
+    try:
+        def run(force):
+            with contextlib.redirect_stdout(io.StringIO()): # prepare_database reports every step
+                prepare_database(config_path, force=force)
+
+        # a dropped database is always checked, the marker is ignored via force
+        cold = measure(lambda: run(True), repeat, setup=lambda: drop_database(config))
+        warm = measure(lambda: run(True), repeat)
+        cached = measure(lambda: run(False), repeat)
+    finally:
+        os.remove(config_path)
+    return [result("prepare_database", cold, state="cold"), result("prepare_database", warm, state="warm"),
+            result("prepare_database", cached, state="cached")]
+
+
+def bench_dropdowns(conn, scale, repeat):
+    results = []
+    for table in ("student", "exam"):
+        rows = [0]
+        watermark = [None]
+
+        def full():
+            watermark[0], rows[0] = sync(conn, table)
+        results.append(result("dropdown_full_sync", measure(full, repeat), rows[0], table=table, scale=scale))
+
+        key, title_column = ("matriculation_number", "first_name") if table == "student" else ("pnr", "title")
+
+        def delta():
+            sync(conn, table, watermark[0])
+
+        # the change is made after the watermark of a full sync, so every measured sync fetches DELTA_ROWS rows
+        def setup():
+            watermark[0], _ = sync(conn, table)
+            with conn.cursor() as cursor:
+                cursor.execute(f"""UPDATE {table} SET {title_column} = {title_column}
+                                   WHERE {key} IN (SELECT {key} FROM {table} ORDER BY {key} LIMIT %s)""", (DELTA_ROWS,))
+            conn.commit()
+        results.append(result("dropdown_delta_sync", measure(delta, repeat, setup), DELTA_ROWS, table=table, scale=scale))
+    return results
+
+
+def bench_grade_inserts(conn, scale, grade_rows, repeat):
+    """single inserts (one transaction each) vs. one batched statement, on exams without grades"""
+    grade_rows = min(grade_rows, scale - 1)
+    students = [str(i).zfill(10) for i in range(1, grade_rows + 1)]
+    exams = iter(str(i).zfill(10) for i in range(scale - 1, 0, -1)) # from the end, the first exams have grades
+
+    def single(pnr):
+        with conn.cursor() as cursor:
+            for matriculation_number in students:
+                repository.execute(cursor, "insert_grade", (matriculation_number, pnr, 2.3))
+                conn.commit()
+
+    def batch(pnr):
+        with conn.cursor() as cursor:
+            rows = [(matriculation_number, pnr, 2.3) for matriculation_number in students]
+            execute_values(cursor, repository.sql("upsert_grades"), rows,
+                           template="(%s, %s, %s, CURRENT_DATE)", page_size=len(rows))
+        conn.commit()
+
+    results = []
+    for name, function in (("grade_insert_single", single), ("grade_insert_batch", batch)):
+        runs = [measure(lambda: function(next(exams)), 1)[0] for _ in range(repeat)]
+        results.append(result(name, runs, grade_rows, scale=scale))
+    return results
+
+
+def bench_delete_cascade(conn, scale, fanout, repeat):
+    """delete_record of the student/exam with `fanout` grades (see seed), restored after every run"""
+    last_key = str(scale).zfill(10)
+    results = []
+    for table in ("student", "exam"):
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT {COLUMNS[table]} FROM {table} WHERE {TABLE_KEYS[table]} = %s", (last_key,))
+            row = cursor.fetchone()
+        conn.commit()
+
+        def delete():
+            with conn.cursor() as cursor:
+                repository.execute(cursor, DELETE_STATEMENTS[table], (last_key,))
+            conn.commit()
+
+        runs = []
+        for run in range(repeat):
+            if run > 0:
+                restore_fanout(conn, table, row, scale, fanout)
+            runs += measure(delete, 1)
+        restore_fanout(conn, table, row, scale, fanout)
+        results.append(result("delete_cascade", runs, fanout, table=table, scale=scale))
+    return results
+
+
+# === RESULTS ===
+
+def result_key(entry):
+    params = ", ".join(f"{key}={value}" for key, value in sorted(entry["params"].items()))
+    return f"{entry['benchmark']}[{params}]"
+
+
+def compare(results, previous_path, tolerance=REGRESSION_TOLERANCE):
+    """
+    print the change of every benchmark against an earlier run
+
+    Returns:
+        list of the keys which got slower by more than the tolerance
+    """
+    with open(previous_path, "r", encoding="utf-8") as file:
+        previous = {result_key(entry): entry for entry in json.load(file)["results"]}
+
+    regressions = []
+    for entry in results:
+        key = result_key(entry)
+        if key not in previous:
+            continue
+        old, new = previous[key]["seconds"], entry["seconds"]
+        change = (new - old) / old if old > 0 else 0.0
+        marker = ""
+        if change > tolerance:
+            marker = "  <-- regression"
+            regressions.append(key)
+        print(f"{key:70} {old * 1000:10.1f} ms -> {new * 1000:10.1f} ms ({change:+.0%}){marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmarks against a local PostgreSQL server")
+    parser.add_argument("--database", help="benchmark database, dropped and created again (default: <database>_bench)")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="students/exams per run")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark, the median is reported")
+    parser.add_argument("--grade-rows", type=int, default=DEFAULT_GRADE_ROWS, help="grades per insert benchmark")
+    parser.add_argument("--max-fanout", type=int, default=DEFAULT_MAX_FANOUT, help="grades of the deleted student/exam")
+    parser.add_argument("--grades-per-student", type=int, default=0, help="generated grades of every student")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="seed of the generated data")
+    parser.add_argument("--workers", type=int, default=1, help="processes generating the data")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="JSON file of an earlier run, exit code 1 on regressions")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    bench_config = dict(config, database=args.database or f"{config['database']}_bench")
+    if bench_config["database"] == config["database"]:
+        parser.error("the benchmark database must not be the database of the application")
+
+    started = datetime.now()
+    results = []
+    print("prepare_database ...")
+    results += bench_prepare_database(bench_config, args.repeat)
+
+    conn = connect(bench_config)
+    try:
+        for scale in args.scales:
+            print(f"scale {scale}: generating data ...")
+            fanout = seed(bench_config, scale, args.max_fanout, args.grades_per_student, args.seed, max(1, args.workers))
+            print(f"scale {scale}: dropdowns ...")
+            results += bench_dropdowns(conn, scale, args.repeat)
+            print(f"scale {scale}: grade inserts ...")
+            results += bench_grade_inserts(conn, scale, args.grade_rows, args.repeat)
+            print(f"scale {scale}: delete cascade ({fanout} grades) ...")
+            results += bench_delete_cascade(conn, scale, fanout, args.repeat)
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW server_version")
+            server_version = cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+    for entry in results:
+        rate = f" ({entry['rows_per_second']:.0f} rows/s)" if "rows_per_second" in entry else ""
+        print(f"{result_key(entry):70} {entry['seconds'] * 1000:10.1f} ms{rate}")
+
+    output = args.output or os.path.join(RESULTS_PATH, f"{started:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({
+            "started": started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "postgres": server_version,
+            "platform": platform.platform(),
+            "args": vars(args),
+            "results": results,
+        }, file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        print(f"Compared with {args.compare}:")
+        if compare(results, args.compare):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
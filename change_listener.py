@@ -0,0 +1,175 @@
+"""Change feed of the application database.
+
+One dedicated connection LISTENs on the channel the triggers of Data_Base_Connection.py
+notify on. A QSocketNotifier watches its socket, so notifications are read in the GUI thread
+without polling and are re-emitted as the Qt signal table_changed(table).
+
+The connection is opened asynchronously (psycopg2 async_=1): every step of the connect and the LISTEN
+waits on the socket notifier, so an unreachable server never blocks the GUI thread.
+"""
+
+import psycopg2
+import psycopg2.extensions
+from PySide6.QtCore import QObject, QSocketNotifier, QTimer, Signal
+
+from Data_Base_Connection import CHANGE_CHANNEL, CHANGE_TABLES, load_config
+
+RECONNECT_INTERVAL = 10000 # ms between attempts to restore a lost listening connection
+CONNECT_TIMEOUT = 3000 # ms until an unanswered connect counts as failed (libpq ignores connect_timeout in async mode)
+
+
+class ChangeListener(QObject):
+    """Turns NOTIFY messages of the database into Qt signals"""
+
+    table_changed = Signal(str) # name of the changed table
+    listening_changed = Signal(bool) # True while notifications are received
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._conn = None # open or being opened
+        self._cursor = None # LISTEN sent
+        self._notifier = None
+        self._listening = False
+        self._was_listening = False
+
+        # retry after the connection could not be opened or was lost
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.setInterval(RECONNECT_INTERVAL)
+        self._reconnect_timer.timeout.connect(self.start)
+
+        self._connect_timer = QTimer(self)
+        self._connect_timer.setSingleShot(True)
+        self._connect_timer.setInterval(CONNECT_TIMEOUT)
+        self._connect_timer.timeout.connect(lambda: self._connect_failed(f"no answer within {CONNECT_TIMEOUT // 1000}s"))
+
+    def is_listening(self):
+        """True if changes are reported, False if pages have to reload on their own"""
+        return self._listening
+
+    def start(self):
+        """Open the listening connection in the background (does nothing if it is open or being opened)"""
+        if self._conn is not None:
+            return
+
+        try:
+            config = load_config()
+            # async connections are always in autocommit, notifications are only delivered outside of transactions
+            self._conn = psycopg2.connect(
+                host=config["host"],
+                database=config["database"],
+                user=config["username"],
+                password=config["password"],
+                port=config["port"],
+                async_=1
+            )
+        except (psycopg2.Error, OSError, KeyError, ValueError) as e:
+            self._connect_failed(e)
+            return
+        self._cursor = None
+        self._connect_timer.start()
+        self._poll_connect()
+
+    def _poll_connect(self):
+        """next step of the connect / LISTEN, continues when the socket is ready"""
+        try:
+            state = self._conn.poll()
+            if state == psycopg2.extensions.POLL_OK and self._cursor is None:
+                # connected, send the LISTEN and wait for its answer
+                self._cursor = self._conn.cursor()
+                self._cursor.execute(f"LISTEN {CHANGE_CHANNEL};")
+                state = self._conn.poll()
+        except (psycopg2.Error, OSError) as e:
+            self._connect_failed(e)
+            return
+
+        if state == psycopg2.extensions.POLL_READ:
+            self._watch(QSocketNotifier.Type.Read, self._poll_connect)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            self._watch(QSocketNotifier.Type.Write, self._poll_connect)
+        else:
+            self._connect_timer.stop()
+            self._watch(QSocketNotifier.Type.Read, self._on_readable)
+            self._listening = True
+            self.listening_changed.emit(True)
+
+            # changes made while the connection was lost are unknown, so everything is treated as changed
+            if self._was_listening:
+                self.announce_all()
+            self._was_listening = True
+
+    def _watch(self, notifier_type, slot):
+        """call slot when the socket is readable/writable (libpq may switch sockets while connecting)"""
+        self._remove_notifier()
+        self._notifier = QSocketNotifier(self._conn.fileno(), notifier_type, self)
+        self._notifier.activated.connect(slot)
+
+    def _connect_failed(self, error):
+        print(f"Change feed not available, retrying in {RECONNECT_INTERVAL // 1000}s: {error}")
+        self._close()
+        self._reconnect_timer.start()
+
+    def announce_all(self):
+        """report every table as changed, so all pages reload (e.g. after the schema was created)"""
+        for table in CHANGE_TABLES:
+            self.table_changed.emit(table)
+
+    def stop(self):
+        """close the listening connection and stop reconnecting"""
+        self._reconnect_timer.stop()
+        self._close()
+
+    def restart(self):
+        """reconnect, e.g. after the login configuration changed"""
+        self.stop()
+        self.start()
+
+    def _remove_notifier(self):
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+
+    def _close(self):
+        self._connect_timer.stop()
+        self._remove_notifier()
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+            self._conn = None
+            self._cursor = None
+        if self._listening:
+            self._listening = False
+            self.listening_changed.emit(False)
+
+    def _on_readable(self):
+        """read all pending notifications and emit one signal per changed table"""
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            # server restarted or network lost
+            print(f"Change feed connection lost, retrying in {RECONNECT_INTERVAL // 1000}s: {e}")
+            self._close()
+            self._reconnect_timer.start()
+            return
+
+        tables = []
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            if notify.payload not in tables:
+                tables.append(notify.payload)
+
+        for table in tables:
+            self.table_changed.emit(table)
+
+
+_listener = None
+
+def get_change_listener():
+    """returns the application-wide change listener (created on first use, must be called from the GUI thread)"""
+    global _listener
+    if _listener is None:
+        _listener = ChangeListener()
+    return _listener
@@ -0,0 +1,223 @@
+"""Command line interface for bulk work without the GUI.
+
+Adds, deletes and lists students, exams and grades with the same validation rules as the GUI
+(validation.py) and the connection settings of user_login_config.json. Nothing of Qt is imported,
+so it starts quickly and runs on servers without a display.
+
+    add     imports a CSV file (see csv_importer.py: validated, COPY, one transaction)
+    delete  deletes keys from the command line or a file, in transactions of --batch-size keys
+    list    writes the rows as CSV (streamed with COPY), the output can be imported again with add
+
+Usage:
+    python cli.py add students students.csv --update
+    python cli.py delete students 12345 12346
+    python cli.py delete grades --file grades_to_delete.txt --batch-size 5000
+    python cli.py list exams --output exams.csv
+    python cli.py list grades --semester "SoSe 24"
+"""
+
+import argparse
+import sys
+import time
+
+import validation
+
+KINDS = ("students", "exams", "grades")
+DEFAULT_BATCH_SIZE = 1000 # keys per delete transaction
+
+DELETE_STATEMENTS = {
+    "students": "delete_students",
+    "exams": "delete_exams",
+    "grades": "delete_grades",
+}
+
+
+# === KEYS ===
+
+def parse_key(kind, text):
+    """
+    validate a key like the GUI does and add the leading zeros
+
+    Args:
+        kind: "students", "exams" or "grades"
+        text: matriculation number, PNr or "matriculation number,PNr" for grades
+
+    Returns:
+        tuple for the VALUES list of the delete statement
+
+    Raises:
+        ValueError with the reason
+    """
+    if kind == "grades":
+        parts = [part.strip() for part in text.replace(";", ",").split(",")]
+        if len(parts) != 2:
+            raise ValueError(f"expected 'matriculation number,PNr', got '{text}'")
+        return parse_key("students", parts[0]) + parse_key("exams", parts[1])
+
+    if kind == "students":
+        formatted, error_msg = validation.format_matriculation_number(text)
+    else:
+        formatted, error_msg = validation.format_pnr(text)
+    if formatted is None:
+        raise ValueError(error_msg)
+    return (formatted,)
+
+
+def read_keys(keys, path):
+    """keys of the command line followed by the lines of the file ('-' = stdin), empty lines and # comments are skipped"""
+    yield from keys
+    if path is None:
+        return
+    file = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig")
+    try:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# === COMMANDS ===
+
+def add(conn, args):
+    from csv_importer import format_summary, import_csv
+
+    summary = import_csv(conn, args.kind, args.path, args.update, args.delimiter)
+    print(format_summary(summary))
+    for line_no, reason in summary["errors"]:
+        print(f"  line {line_no}: {reason}")
+    return 1 if summary["rows_rejected"] else 0
+
+
+def delete(conn, args):
+    """delete the keys batch by batch, every batch is one transaction (a failing batch is rolled back alone)"""
+    from psycopg2.extras import execute_values
+    from repository import repository
+
+    name = DELETE_STATEMENTS[args.kind]
+    query = repository.sql(name)
+    requested = deleted = invalid = failed = 0
+    started = time.perf_counter()
+
+    def valid_keys():
+        nonlocal invalid
+        for text in read_keys(args.keys, args.file):
+            try:
+                yield parse_key(args.kind, text)
+            except ValueError as e:
+                invalid += 1
+                print(f"  skipped '{text}': {e}", file=sys.stderr)
+
+    for batch in batches(valid_keys(), args.batch_size):
+        requested += len(batch)
+        batch_started = time.perf_counter()
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, query, batch, page_size=len(batch))
+                deleted += cursor.rowcount
+            conn.commit()
+            repository.record(name, time.perf_counter() - batch_started)
+        except Exception as e:
+            conn.rollback()
+            repository.record(name, time.perf_counter() - batch_started, error=True)
+            failed += len(batch)
+            print(f"  batch of {len(batch)} keys failed and was rolled back: {e}", file=sys.stderr)
+
+    print(f"Deleted {deleted} of {requested} {args.kind} in {time.perf_counter() - started:.1f}s, "
+          f"{requested - deleted - failed} not found, {invalid} invalid, {failed} failed")
+    return 1 if invalid or failed else 0
+
+
+def list_rows(conn, args):
+    """stream the rows as CSV with header to stdout or a file"""
+    from psycopg2 import sql
+
+    from grade_export import build_export_query
+    from repository import repository
+
+    with conn.cursor() as cursor:
+        if args.kind == "grades":
+            query = build_export_query(cursor, args.semester, args.degree_program, args.pnr)
+        else:
+            query = repository.sql(f"list_{args.kind}")
+        copy_sql = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true, DELIMITER {})").format(
+            sql.SQL(query), sql.Literal(args.delimiter)).as_string(cursor)
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as file:
+                cursor.copy_expert(copy_sql, file)
+            print(f"Wrote {cursor.rowcount} {args.kind} to {args.output}", file=sys.stderr)
+        else:
+            cursor.copy_expert(copy_sql, sys.stdout)
+    conn.rollback() # read only
+    return 0
+
+
+# === ENTRY POINT ===
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Add, delete and list students, exams and grades without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = commands.add_parser("add", help="import a CSV file")
+    add_parser.add_argument("kind", choices=KINDS)
+    add_parser.add_argument("path", help="CSV file with header line")
+    add_parser.add_argument("--update", action="store_true", help="update existing records instead of skipping them")
+    add_parser.add_argument("--delimiter", help="CSV delimiter (default: detect)")
+    add_parser.set_defaults(function=add)
+
+    delete_parser = commands.add_parser("delete", help="delete by key, grades of deleted students/exams are deleted too")
+    delete_parser.add_argument("kind", choices=KINDS)
+    delete_parser.add_argument("keys", nargs="*", help="matriculation numbers, PNrs or 'matriculation number,PNr' for grades")
+    delete_parser.add_argument("--file", help="file with one key per line ('-' = stdin)")
+    delete_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="keys per transaction")
+    delete_parser.set_defaults(function=delete)
+
+    list_parser = commands.add_parser("list", help="write the rows as CSV")
+    list_parser.add_argument("kind", choices=KINDS)
+    list_parser.add_argument("--output", help="CSV file (default: stdout)")
+    list_parser.add_argument("--delimiter", default=",", help="CSV delimiter (default: ',')")
+    list_parser.add_argument("--semester", help="grades only: exams of this semester")
+    list_parser.add_argument("--degree-program", help="grades only: exams of this degree program")
+    list_parser.add_argument("--pnr", help="grades only: this exam (PNr, leading zeros are added like in the GUI)")
+    list_parser.set_defaults(function=list_rows)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "batch_size", 1) < 1:
+        print("--batch-size must be at least 1", file=sys.stderr)
+        return 2
+    if getattr(args, "pnr", None) is not None:
+        # PNrs are stored with leading zeros, '123' would silently match nothing
+        try:
+            args.pnr = parse_key("exams", args.pnr)[0]
+        except ValueError as e:
+            print(f"--pnr: {e}", file=sys.stderr)
+            return 2
+
+    from connection_pool import close_pool, get_pool
+
+    try:
+        with get_pool().connection() as conn:
+            return args.function(conn, args)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
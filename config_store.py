@@ -0,0 +1,64 @@
+"""In-memory store for the JSON configuration files (user_login_config.json, dropdown_options.json)"""
+
+import copy
+import json
+import os
+import threading
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+LOGIN_CONFIG_PATH = os.path.join(BASE_PATH, "user_login_config.json")
+DROPDOWN_OPTIONS_PATH = os.path.join(BASE_PATH, "dropdown_options.json")
+
+
+class ConfigStore:
+    """
+    Parses every JSON file only once and serves it from memory.
+    A file is parsed again only if its modification time or size changed since it was read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # absolute path -> (mtime_ns, size, parsed data)
+
+    def get(self, path: str) -> dict:
+        """
+        Returns the parsed content of the JSON file.
+        Callers get their own copy, so they may modify it without touching the cache.
+
+        Raises:
+            FileNotFoundError, json.JSONDecodeError like json.load()
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return copy.deepcopy(entry[2])
+
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, data)
+        return copy.deepcopy(data)
+
+    def write(self, path: str, data: dict):
+        """Write data as JSON file and update the cached content"""
+        path = os.path.abspath(path)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=4, ensure_ascii=False)
+        stat = os.stat(path)
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, copy.deepcopy(data))
+
+    def invalidate(self, path: str = None):
+        """Drop one file (or every file) from the cache, it is parsed again on the next get()"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# application-wide store, every consumer of the JSON files goes through it
+config_store = ConfigStore()
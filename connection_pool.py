@@ -0,0 +1,297 @@
+"""Application-wide PostgreSQL connection pool shared by every DatabaseWorker"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+
+from Data_Base_Connection import load_config
+
+# Defaults, can be overwritten in user_login_config.json
+DEFAULT_MIN_CONNECTIONS = 1
+DEFAULT_MAX_CONNECTIONS = 5
+DEFAULT_POOL_TIMEOUT = 10.0  # seconds a worker waits for a free connection
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0  # seconds a connection may idle before it is checked again
+DEFAULT_MAX_IDLE_TIME = 300.0  # seconds until idle connections above the minimum are closed
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection became available within the pool timeout"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of open connections to the application database.
+
+    Workers borrow a connection with getconn() (or the connection() context manager)
+    and hand it back with putconn(). Idle connections are health-checked before they
+    are handed out again, broken ones are closed and replaced by fresh connections.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Args:
+            config: PostgreSQL login configuration (see user_login_config.json)
+        """
+        self.config = config
+        self.max_connections = max(1, int(config.get("pool_max_connections", DEFAULT_MAX_CONNECTIONS)))
+        self.min_connections = min(self.max_connections, max(0, int(config.get("pool_min_connections", DEFAULT_MIN_CONNECTIONS))))
+        self.timeout = float(config.get("pool_timeout", DEFAULT_POOL_TIMEOUT))
+        self.health_check_interval = float(config.get("pool_health_check_interval", DEFAULT_HEALTH_CHECK_INTERVAL))
+        self.max_idle_time = float(config.get("pool_max_idle_time", DEFAULT_MAX_IDLE_TIME))
+
+        self._condition = threading.Condition()
+        self._idle = []  # list of (connection, time it was returned)
+        self._in_use = set()
+        self._opening = 0  # connections currently being opened outside the lock
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "recycled": 0,
+            "borrowed": 0,
+            "returned": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "health_checks": 0,
+            "failed_health_checks": 0,
+            "timeouts": 0,
+        }
+
+    # === CONNECTION HANDLING ===
+
+    def _connect(self):
+        """open a new connection to the target database"""
+        conn = psycopg2.connect(
+            host=self.config["host"],
+            database=self.config["database"],
+            user=self.config["username"],
+            password=self.config["password"],
+            port=self.config["port"]
+        )
+        with self._condition:
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        """close a connection that must not be used again"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._stats["recycled"] += 1
+
+    def _is_healthy(self, conn, idle_since):
+        """
+        Check whether an idle connection can be handed out again.
+        Connections that idled longer than the health check interval get a round trip to the server.
+        """
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+
+        with self._condition:
+            self._stats["health_checks"] += 1
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._condition:
+                self._stats["failed_health_checks"] += 1
+            return False
+
+    def _prune_idle(self):
+        """close connections that idled longer than max_idle_time while the pool is above its minimum (lock must be held)"""
+        now = time.monotonic()
+        while (self._idle and len(self._idle) + len(self._in_use) > self.min_connections
+               and now - self._idle[0][1] > self.max_idle_time):
+            conn, _ = self._idle.pop(0)
+            self._discard(conn)
+
+    def getconn(self, timeout: float = None):
+        """
+        Borrow a connection from the pool.
+        Blocks until a connection is free or the timeout is reached.
+
+        Args:
+            timeout: seconds to wait for a free connection (default: pool_timeout from the config)
+
+        Returns:
+            an open psycopg2 connection, which has to be given back via putconn()
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_start = time.monotonic()
+
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                self._prune_idle()
+
+                # take an idle connection (newest first, so rarely used ones can time out)
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    self._in_use.add(conn)
+                    candidate = (conn, idle_since)
+                # open a new one if the pool may still grow
+                elif len(self._in_use) + self._opening < self.max_connections:
+                    self._opening += 1
+                    candidate = None
+                # wait for another worker to return a connection
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"no database connection available within {timeout:.1f}s")
+                    waited = True
+                    self._condition.wait(remaining)
+                    continue
+
+            if candidate is None:
+                conn = None
+                try:
+                    conn = self._connect()
+                finally:
+                    with self._condition:
+                        self._opening -= 1
+                        if conn is not None:
+                            self._in_use.add(conn)
+                        else:
+                            self._condition.notify()  # let a waiting worker retry
+            else:
+                conn, idle_since = candidate
+                # health check happens outside the lock, it may need a round trip
+                if not self._is_healthy(conn, idle_since):
+                    with self._condition:
+                        self._in_use.discard(conn)
+                        self._discard(conn)
+                        self._condition.notify()
+                    continue
+
+            with self._condition:
+                self._stats["borrowed"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += time.monotonic() - wait_start
+            return conn
+
+    def putconn(self, conn, broken: bool = False):
+        """
+        Return a borrowed connection to the pool.
+
+        Args:
+            conn: the connection received from getconn()
+            broken: True if the caller knows that the connection is unusable
+        """
+        # end any transaction the worker left open, so the next worker starts clean
+        if not broken and not conn.closed:
+            try:
+                status = conn.info.transaction_status
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    broken = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+        with self._condition:
+            self._in_use.discard(conn)
+            self._stats["returned"] += 1
+            if broken or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """
+        Context manager to borrow a connection, e.g.:
+            with get_pool().connection() as conn: ...
+        Connections that raised a connection-level error are recycled automatically.
+        """
+        conn = self.getconn(timeout)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, broken)
+
+    def close(self):
+        """close every idle connection, borrowed connections are closed when they come back"""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._condition.notify_all()
+
+    # === STATISTICS ===
+
+    def statistics(self) -> dict:
+        """
+        Returns:
+            dict with the current pool size and counters since the pool was created
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = len(self._in_use)
+            stats["min_connections"] = self.min_connections
+            stats["max_connections"] = self.max_connections
+        stats["avg_wait_time"] = stats["wait_time_total"] / stats["waits"] if stats["waits"] else 0.0
+        return stats
+
+
+# === APPLICATION-WIDE POOL ===
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# settings the pooled connections depend on (plus all pool_* keys), other keys like rscript_path can change without a new pool
+CONNECTION_KEYS = ("host", "port", "database", "username", "password")
+
+
+def _connection_settings(config: dict) -> dict:
+    return {key: value for key, value in config.items() if key in CONNECTION_KEYS or key.startswith("pool_")}
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the shared pool, it is created from user_login_config.json on first use.
+    If the connection settings in the login config changed on disk, the old pool is closed and a new one is created.
+    """
+    global _pool
+    config = load_config()  # served from memory unless the file changed
+    with _pool_lock:
+        if _pool is not None and _connection_settings(_pool.config) != _connection_settings(config):
+            _pool.close()
+            _pool = None
+        if _pool is None:
+            _pool = ConnectionPool(config)
+        return _pool
+
+
+def close_pool():
+    """Close the shared pool, e.g. on shutdown or after the login config changed"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_statistics() -> dict:
+    """Returns the statistics of the shared pool (empty dict if no pool was created yet)"""
+    with _pool_lock:
+        return _pool.statistics() if _pool is not None else {}
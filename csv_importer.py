@@ -0,0 +1,343 @@
+"""Streaming CSV import of students, exams and grades.
+
+The CSV file is read row by row, every row is validated with the same rules as the GUI pages
+(see validation.py) and the valid rows are streamed via COPY ... FROM STDIN into a temporary
+staging table. One set-based INSERT ... SELECT then merges the staging table into the target table.
+Memory use does not depend on the size of the file.
+
+Usage:
+    python csv_importer.py students students.csv
+    python csv_importer.py grades grades.csv --update
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+import validation
+
+PROGRESS_INTERVAL = 10000 # rows between two progress reports
+MAX_REPORTED_ERRORS = 100 # rejected rows kept with line number and reason
+COPY_BUFFER_SIZE = 65536
+
+# alternative column names which are accepted in the CSV header
+COLUMN_ALIASES = {
+    "matriculation_no": "matriculation_number",
+    "birth_date": "date_of_birth",
+    "date": "exam_date",
+    "exam_title": "title",
+    "study_program": "degree_program",
+}
+
+
+# === ROW VALIDATION ===
+# every function gets the CSV row as dict and returns the tuple for the staging table
+# or raises ValueError with the reason why the row was rejected
+
+def _required(row, column):
+    """returns the stripped value of a required column"""
+    value = (row.get(column) or "").strip()
+    if not value:
+        raise ValueError(f"missing {column}")
+    return value
+
+def _date(row, column, required=True):
+    """returns the date of a column in ISO format"""
+    value = (row.get(column) or "").strip()
+    if not value and not required:
+        return None
+    parsed = validation.parse_date(_required(row, column))
+    if parsed is None:
+        raise ValueError(f"invalid {column} '{value}' (expected yyyy-MM-dd or dd.MM.yyyy)")
+    return parsed
+
+def _matriculation_number(row):
+    formatted, error_msg = validation.format_matriculation_number(_required(row, "matriculation_number"))
+    if formatted is None:
+        raise ValueError(error_msg)
+    return formatted
+
+def _pnr(row):
+    formatted, error_msg = validation.format_pnr(row.get("pnr") or "")
+    if formatted is None:
+        raise ValueError(error_msg)
+    return formatted
+
+def _validate_student(row):
+    date_of_birth = _date(row, "date_of_birth")
+    is_valid, error_msg = validation.validate_age(date_of_birth)
+    if not is_valid:
+        raise ValueError(error_msg)
+    return (_matriculation_number(row), _required(row, "first_name"), _required(row, "last_name"), date_of_birth.isoformat())
+
+def _validate_exam(row):
+    return (_pnr(row), _required(row, "title"), _date(row, "exam_date").isoformat(),
+            (row.get("semester") or "").strip() or None, (row.get("degree_program") or "").strip() or None)
+
+def _validate_grade(row):
+    grade = validation.parse_grade(_required(row, "grade"))
+    if grade is None:
+        raise ValueError(f"invalid grade '{row.get('grade')}' (grades range from {validation.MIN_GRADE} to {validation.MAX_GRADE})")
+    grade_date = _date(row, "grade_date", required=False)
+    return (_matriculation_number(row), _pnr(row), f"{grade:.1f}", grade_date.isoformat() if grade_date else None)
+
+
+# === IMPORT DEFINITIONS ===
+
+IMPORTS = {
+    "students": {
+        "required": ("matriculation_number", "first_name", "last_name", "date_of_birth"),
+        "validate": _validate_student,
+        "staging": """CREATE TEMP TABLE import_student (
+                          line_no INTEGER, matriculation_number VARCHAR(20), first_name VARCHAR(50),
+                          last_name VARCHAR(50), date_of_birth DATE) ON COMMIT DROP""",
+        "copy": "COPY import_student (line_no, matriculation_number, first_name, last_name, date_of_birth) FROM STDIN",
+        # the last occurrence in the file wins if a key appears more than once
+        "merge": """INSERT INTO student (matriculation_number, first_name, last_name, date_of_birth)
+                    SELECT DISTINCT ON (matriculation_number) matriculation_number, first_name, last_name, date_of_birth
+                    FROM import_student
+                    ORDER BY matriculation_number, line_no DESC
+                    ON CONFLICT (matriculation_number) {conflict}""",
+        "update": """DO UPDATE SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name,
+                     date_of_birth = EXCLUDED.date_of_birth""",
+    },
+    "exams": {
+        "required": ("pnr", "title", "exam_date"),
+        "validate": _validate_exam,
+        "staging": """CREATE TEMP TABLE import_exam (
+                          line_no INTEGER, pnr VARCHAR(20), title VARCHAR(100), exam_date DATE,
+                          semester VARCHAR(20), degree_program VARCHAR(100)) ON COMMIT DROP""",
+        "copy": "COPY import_exam (line_no, pnr, title, exam_date, semester, degree_program) FROM STDIN",
+        "merge": """INSERT INTO exam (pnr, title, exam_date, semester, degree_program)
+                    SELECT DISTINCT ON (pnr) pnr, title, exam_date, semester, degree_program
+                    FROM import_exam
+                    ORDER BY pnr, line_no DESC
+                    ON CONFLICT (pnr) {conflict}""",
+        "update": """DO UPDATE SET title = EXCLUDED.title, exam_date = EXCLUDED.exam_date,
+                     semester = EXCLUDED.semester, degree_program = EXCLUDED.degree_program""",
+    },
+    "grades": {
+        "required": ("matriculation_number", "pnr", "grade"),
+        "validate": _validate_grade,
+        "staging": """CREATE TEMP TABLE import_grade (
+                          line_no INTEGER, matriculation_number VARCHAR(20), pnr VARCHAR(20),
+                          grade NUMERIC(3,1), grade_date DATE) ON COMMIT DROP""",
+        "copy": "COPY import_grade (line_no, matriculation_number, pnr, grade, grade_date) FROM STDIN",
+        # grades of unknown students or exams are skipped instead of failing the whole import
+        "merge": """INSERT INTO grade (matriculation_number, pnr, grade, grade_date)
+                    SELECT DISTINCT ON (i.matriculation_number, i.pnr)
+                           i.matriculation_number, i.pnr, i.grade, COALESCE(i.grade_date, CURRENT_DATE)
+                    FROM import_grade i
+                    JOIN student s ON s.matriculation_number = i.matriculation_number
+                    JOIN exam e ON e.pnr = i.pnr
+                    ORDER BY i.matriculation_number, i.pnr, i.line_no DESC
+                    ON CONFLICT (matriculation_number, pnr) {conflict}""",
+        "update": "DO UPDATE SET grade = EXCLUDED.grade, grade_date = EXCLUDED.grade_date",
+        "unmatched": """SELECT count(*) FROM import_grade i
+                        WHERE NOT EXISTS (SELECT 1 FROM student s WHERE s.matriculation_number = i.matriculation_number)
+                           OR NOT EXISTS (SELECT 1 FROM exam e WHERE e.pnr = i.pnr)""",
+    },
+}
+
+
+# === COPY STREAM ===
+
+def _copy_value(value):
+    """format one value for the COPY text format"""
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class _CopyStream:
+    """ file-like object which produces COPY lines on demand, so the file is never loaded completely"""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ""
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = "".join(chunks)
+        if 0 <= size < len(data):
+            data, self._buffer = data[:size], data[size:]
+        else:
+            self._buffer = ""
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+class CsvImport:
+    """ One import of a CSV file, keeps the counters for progress and the final report"""
+
+    def __init__(self, kind, path, update=False, delimiter=None, progress=None):
+        """
+        Args:
+            kind: "students", "exams" or "grades"
+            path: path of the CSV file (first line must be the header)
+            update: update existing records instead of skipping them
+            delimiter: CSV delimiter, detected from the file if None
+            progress: optional callback(rows_read, rows_per_second)
+        """
+        if kind not in IMPORTS:
+            raise ValueError(f"unknown import '{kind}', use one of {', '.join(IMPORTS)}")
+        self.kind = kind
+        self.spec = IMPORTS[kind]
+        self.path = path
+        self.update = update
+        self.delimiter = delimiter
+        self.progress = progress
+
+        self.rows_read = 0
+        self.rows_valid = 0
+        self.rows_rejected = 0
+        self.errors = [] # (line number, reason) of the first MAX_REPORTED_ERRORS rejected rows
+        self.started = None
+
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0
+        return self.rows_read / elapsed if elapsed > 0 else 0.0
+
+    def _detect_delimiter(self, file):
+        """detect ',' / ';' / tab from the beginning of the file (Excel uses ';' in german locales)"""
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+        except csv.Error:
+            return ","
+
+    def _copy_lines(self, file):
+        """generator of validated rows in COPY text format"""
+        delimiter = self.delimiter or self._detect_delimiter(file)
+        reader = csv.DictReader(file, delimiter=delimiter)
+        reader.fieldnames = [COLUMN_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in (reader.fieldnames or [])]
+        missing = [column for column in self.spec["required"] if column not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"CSV header is missing the column(s): {', '.join(missing)}")
+
+        validate = self.spec["validate"]
+        for row in reader:
+            self.rows_read += 1
+            try:
+                values = validate(row)
+            except ValueError as e:
+                self.rows_rejected += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append((reader.line_num, str(e)))
+            else:
+                self.rows_valid += 1
+                yield "\t".join(_copy_value(value) for value in (reader.line_num,) + values) + "\n"
+
+            if self.progress and self.rows_read % PROGRESS_INTERVAL == 0:
+                self.progress(self.rows_read, self.rows_per_second())
+
+    def run(self, cursor):
+        """
+        Import the file inside the current transaction of the cursor's connection.
+        The caller commits (or rolls back) the transaction.
+
+        Returns:
+            dict with the import summary
+        """
+        self.started = time.perf_counter()
+        cursor.execute(self.spec["staging"])
+
+        with open(self.path, "r", encoding="utf-8-sig", newline="") as file:
+            cursor.copy_expert(self.spec["copy"], _CopyStream(self._copy_lines(file)), size=COPY_BUFFER_SIZE)
+        if self.progress:
+            self.progress(self.rows_read, self.rows_per_second())
+
+        unmatched = 0
+        if "unmatched" in self.spec:
+            cursor.execute(self.spec["unmatched"])
+            unmatched = cursor.fetchone()[0]
+
+        conflict = self.spec["update"] if self.update else "DO NOTHING"
+        cursor.execute(self.spec["merge"].format(conflict=conflict))
+        rows_merged = cursor.rowcount
+
+        seconds = time.perf_counter() - self.started
+        return {
+            "kind": self.kind,
+            "rows_read": self.rows_read,
+            "rows_valid": self.rows_valid,
+            "rows_rejected": self.rows_rejected,
+            "rows_unmatched": unmatched,
+            "rows_merged": rows_merged,
+            "rows_skipped": self.rows_valid - rows_merged,
+            "seconds": seconds,
+            "rows_per_second": self.rows_read / seconds if seconds > 0 else 0.0,
+            "errors": list(self.errors),
+        }
+
+
+def import_csv(conn, kind, path, update=False, delimiter=None, progress=None):
+    """
+    Import a CSV file in one transaction and commit it.
+
+    Args:
+        conn: open psycopg2 connection
+        see CsvImport for the other arguments
+
+    Returns:
+        dict with the import summary
+    """
+    try:
+        with conn.cursor() as cursor:
+            summary = CsvImport(kind, path, update, delimiter, progress).run(cursor)
+        conn.commit()
+        return summary
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def format_summary(summary):
+    """human readable one-line summary of an import"""
+    text = (f"Imported {summary['rows_merged']} of {summary['rows_read']} {summary['kind']} "
+            f"in {summary['seconds']:.1f}s ({summary['rows_per_second']:.0f} rows/s), "
+            f"{summary['rows_rejected']} rejected, {summary['rows_skipped']} skipped")
+    if summary["rows_unmatched"]:
+        text += f" ({summary['rows_unmatched']} with unknown student or exam)"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import students, exams or grades from a CSV file")
+    parser.add_argument("kind", choices=sorted(IMPORTS))
+    parser.add_argument("path", help="CSV file with header line")
+    parser.add_argument("--update", action="store_true", help="update existing records instead of skipping them")
+    parser.add_argument("--delimiter", help="CSV delimiter (default: detect)")
+    args = parser.parse_args(argv)
+
+    from connection_pool import get_pool
+
+    def report(rows_read, rows_per_second):
+        print(f"\r{rows_read} rows read ({rows_per_second:.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+    with get_pool().connection() as conn:
+        summary = import_csv(conn, args.kind, args.path, args.update, args.delimiter, report)
+    print(file=sys.stderr)
+
+    print(format_summary(summary))
+    for line_no, reason in summary["errors"]:
+        print(f"  line {line_no}: {reason}")
+    if summary["rows_rejected"] > len(summary["errors"]):
+        print(f"  ... {summary['rows_rejected'] - len(summary['errors'])} more rejected rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
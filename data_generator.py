@@ -0,0 +1,275 @@
+"""Synthetic students, exams and grades for sizing and benchmarking.
+
+The rows follow the rules of the GUI: birth dates pass validation.validate_age, exams use the semesters
+and study programs of dropdown_options.json (with an exam date inside the semester), grades are between
+1.0 and 6.0 and every student gets each exam at most once (grade_unique_student_exam). The rows are
+generated in chunks and streamed with COPY, optionally by several processes at once. Every chunk has a
+random generator of its own derived from the seed, so the same seed gives the same data, no matter how
+many processes are used.
+
+While the grades are loaded the per-row summary trigger of grade is disabled, the summary tables are
+rebuilt once at the end (see rebuild_summary_tables).
+
+Usage:
+    python data_generator.py --students 1000000 --exams 2000 --grades-per-student 20
+    python data_generator.py --students 100000 --exams 500 --seed 7 --workers 4 --truncate
+"""
+
+import argparse
+import datetime
+import io
+import random
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+import psycopg2
+
+import validation
+from config_store import DROPDOWN_OPTIONS_PATH, config_store
+from Data_Base_Connection import ID_SEQUENCES, SUMMARY_TABLES, load_config, rebuild_summary_tables
+
+CHUNK_SIZE = 50000 # rows per COPY
+DEFAULT_SEED = 42
+REFERENCE_DATE = datetime.date(2026, 1, 1) # birth dates are fixed relative to this date, not to today
+
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannah", "Jonas", "Julia",
+               "Leon", "Lena", "Lukas", "Marie", "Max", "Mia", "Noah", "Paul", "Sophie", "Tim"]
+LAST_NAMES = ["Bauer", "Becker", "Fischer", "Hoffmann", "Koch", "Meyer", "Müller", "Richter", "Schmidt",
+              "Schneider", "Schulz", "Schwarz", "Wagner", "Weber", "Wolf", "Zimmermann"]
+SUBJECTS = ["Statistics", "Databases", "Programming", "Accounting", "Marketing", "Machine Learning",
+            "Business Analytics", "Operations Research", "Microeconomics", "Software Engineering"]
+
+# german grades, failed (5.0) and the rare 6.0 included
+GRADES = ["1.0", "1.3", "1.7", "2.0", "2.3", "2.7", "3.0", "3.3", "3.7", "4.0", "5.0", "6.0"]
+GRADE_WEIGHTS = [4, 7, 9, 11, 12, 12, 11, 9, 7, 6, 10, 2]
+
+MIN_STUDENT_AGE = 17 # inside validation.MIN_AGE ... MAX_AGE
+MAX_STUDENT_AGE = 45
+
+COLUMNS = {
+    "student": "matriculation_number, first_name, last_name, date_of_birth",
+    "exam": "pnr, title, exam_date, semester, degree_program",
+    "grade": "matriculation_number, pnr, grade, grade_date",
+}
+
+
+# === ROW GENERATION ===
+# every function returns the COPY text (tab separated) of one chunk
+
+def chunk_random(seed, kind, chunk):
+    """random generator of one chunk, independent of the other chunks"""
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+def semester_dates(semester):
+    """
+    exam period of a semester: 'SoSe 24' -> July/August 2024, 'WiSe 24/25' -> February 2025
+
+    Returns:
+        (first date, number of days)
+    """
+    match = re.match(r"(SoSe|WiSe)\s*(\d{2})", semester)
+    if match is None:
+        return datetime.date(REFERENCE_DATE.year - 1, 1, 1), 365
+    year = 2000 + int(match.group(2))
+    if match.group(1) == "SoSe":
+        return datetime.date(year, 7, 1), 45
+    return datetime.date(year + 1, 1, 20), 40
+
+
+def student_chunk(seed, chunk, first_key, count):
+    rng = chunk_random(seed, "student", chunk)
+    oldest = REFERENCE_DATE.replace(year=REFERENCE_DATE.year - MAX_STUDENT_AGE)
+    days = (REFERENCE_DATE.replace(year=REFERENCE_DATE.year - MIN_STUDENT_AGE) - oldest).days
+    lines = []
+    for key in range(first_key, first_key + count):
+        birth_date = oldest + datetime.timedelta(days=rng.randrange(days))
+        lines.append(f"{str(key).zfill(validation.ID_LENGTH)}\t{rng.choice(FIRST_NAMES)}\t{rng.choice(LAST_NAMES)}\t{birth_date}\n")
+    return "".join(lines)
+
+
+def exam_chunk(seed, chunk, first_key, count, semesters, study_programs):
+    rng = chunk_random(seed, "exam", chunk)
+    lines = []
+    for key in range(first_key, first_key + count):
+        semester = rng.choice(semesters)
+        first_date, days = semester_dates(semester)
+        exam_date = first_date + datetime.timedelta(days=rng.randrange(days))
+        title = f"{rng.choice(SUBJECTS)} {key % 1000}"
+        lines.append(f"{str(key).zfill(validation.ID_LENGTH)}\t{title}\t{exam_date}\t{semester}\t{rng.choice(study_programs)}\n")
+    return "".join(lines)
+
+
+def grade_chunk(seed, chunk, first_student, count, first_exam, exam_count, grades_per_student):
+    """grades of `count` students, each in `grades_per_student` different exams"""
+    rng = chunk_random(seed, "grade", chunk)
+    grades_per_student = min(grades_per_student, exam_count)
+    lines = []
+    for student in range(first_student, first_student + count):
+        matriculation_number = str(student).zfill(validation.ID_LENGTH)
+        # the grades are drawn in one call, much faster than one choice per grade
+        grades = rng.choices(GRADES, GRADE_WEIGHTS, k=grades_per_student)
+        for exam, grade in zip(rng.sample(range(exam_count), grades_per_student), grades):
+            pnr = str(first_exam + exam).zfill(validation.ID_LENGTH)
+            grade_date = REFERENCE_DATE - datetime.timedelta(days=rng.randrange(1, 900))
+            lines.append(f"{matriculation_number}\t{pnr}\t{grade}\t{grade_date}\n")
+    return "".join(lines)
+
+
+# === LOADING ===
+
+def _copy_chunk(task):
+    """runs in a worker process: generate one chunk and COPY it into its table"""
+    config, table, function, args = task
+    data = function(*args)
+    conn = connect(config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(f"COPY public.{table} ({COLUMNS[table]}) FROM STDIN", io.StringIO(data))
+            rows = cursor.rowcount
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+def connect(config):
+    return psycopg2.connect(
+        host=config["host"],
+        database=config["database"],
+        user=config["username"],
+        password=config["password"],
+        port=config["port"]
+    )
+
+
+def chunks(total):
+    """(chunk number, first offset, count) of `total` rows"""
+    for chunk, offset in enumerate(range(0, total, CHUNK_SIZE)):
+        yield chunk, offset, min(CHUNK_SIZE, total - offset)
+
+
+def _run(tasks, workers):
+    if workers > 1:
+        with Pool(workers) as pool:
+            return sum(pool.imap_unordered(_copy_chunk, tasks))
+    return sum(_copy_chunk(task) for task in tasks)
+
+
+def next_key(cursor, table, key):
+    """first free numeric key after the existing rows and after the keys the GUIs reserved (see id_allocator.py)"""
+    sequence = ID_SEQUENCES[table][1]
+    cursor.execute(f"SELECT max({key}) FROM public.{table} WHERE {key} ~ '^[0-9]+$'")
+    last = cursor.fetchone()[0]
+    cursor.execute(f"SELECT pg_sequence_last_value('public.{sequence}')")
+    reserved = cursor.fetchone()[0]
+    return max(int(last) if last is not None else 0, reserved or 0) + 1
+
+
+def generate(config, students, exams, grades_per_student, seed=DEFAULT_SEED, workers=1, truncate=False, progress=None):
+    """
+    Generate the rows and load them into the database of the config.
+
+    Args:
+        config: login configuration (see user_login_config.json)
+        students, exams: number of new students and exams
+        grades_per_student: grades of every new student (in different new exams)
+        seed: same seed -> same rows
+        workers: processes which generate and COPY chunks at the same time
+        truncate: delete all students, exams and grades first and restart the key sequences (the keys start at 1 then)
+        progress: optional callback(message)
+
+    Returns:
+        dict with the number of rows per table, the first keys and the seconds
+    """
+    report = progress or (lambda message: None)
+    started = time.perf_counter()
+    options = config_store.get(DROPDOWN_OPTIONS_PATH)
+    semesters = options.get("semesters") or ["SoSe 24"]
+    study_programs = options.get("study_programs") or ["Business Informatics (B.Sc.)"]
+
+    conn = connect(config)
+    try:
+        with conn.cursor() as cursor:
+            if truncate:
+                tables = ["student", "exam", "grade", "deleted_record", *SUMMARY_TABLES]
+                cursor.execute(f"TRUNCATE {', '.join('public.' + table for table in tables)}")
+                for _, sequence in ID_SEQUENCES.values():
+                    cursor.execute(f"ALTER SEQUENCE public.{sequence} RESTART")
+            first_student = next_key(cursor, "student", "matriculation_number")
+            first_exam = next_key(cursor, "exam", "pnr")
+        conn.commit()
+    finally:
+        conn.close()
+    if first_student + students - 1 > validation.MAX_MATRICULATION_NUMBER:
+        raise ValueError(f"not enough free matriculation numbers for {students} students")
+
+    summary = {"first_student": first_student, "first_exam": first_exam}
+
+    report(f"Generating {students} students and {exams} exams ...")
+    tasks = [(config, "student", student_chunk, (seed, chunk, first_student + offset, count))
+             for chunk, offset, count in chunks(students)]
+    tasks += [(config, "exam", exam_chunk, (seed, chunk, first_exam + offset, count, semesters, study_programs))
+              for chunk, offset, count in chunks(exams)]
+    summary["students_and_exams"] = _run(tasks, workers)
+
+    summary["grades"] = 0
+    if grades_per_student > 0 and students > 0 and exams > 0:
+        report(f"Generating {students * min(grades_per_student, exams)} grades ...")
+        # chunks of students, so that a chunk has about CHUNK_SIZE grades
+        students_per_chunk = max(1, CHUNK_SIZE // min(grades_per_student, exams))
+        tasks = [(config, "grade", grade_chunk, (seed, chunk, first_student + offset, min(students_per_chunk, students - offset),
+                                                 first_exam, exams, grades_per_student))
+                 for chunk, offset in enumerate(range(0, students, students_per_chunk))]
+
+        conn = connect(config)
+        try:
+            with conn.cursor() as cursor:
+                # one summary update per grade would dominate the load, the summaries are rebuilt afterwards
+                cursor.execute("ALTER TABLE public.grade DISABLE TRIGGER grade_summary_update")
+            conn.commit()
+            try:
+                summary["grades"] = _run(tasks, workers)
+            finally:
+                with conn.cursor() as cursor:
+                    cursor.execute("ALTER TABLE public.grade ENABLE TRIGGER grade_summary_update")
+                    report("Rebuilding the grade summaries ...")
+                    rebuild_summary_tables(cursor)
+                conn.commit()
+        finally:
+            conn.close()
+
+    conn = connect(config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE public.student, public.exam, public.grade")
+    finally:
+        conn.close()
+
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic students, exams and grades")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--exams", type=int, default=200)
+    parser.add_argument("--grades-per-student", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="same seed -> same data")
+    parser.add_argument("--workers", type=int, default=1, help="parallel processes")
+    parser.add_argument("--truncate", action="store_true", help="delete all students, exams and grades first")
+    args = parser.parse_args(argv)
+
+    summary = generate(load_config(), args.students, args.exams, args.grades_per_student,
+                       args.seed, max(1, args.workers), args.truncate, progress=print)
+    rows = summary["students_and_exams"] + summary["grades"]
+    print(f"Generated {summary['students_and_exams']} students/exams and {summary['grades']} grades "
+          f"in {summary['seconds']:.1f}s ({rows / summary['seconds']:.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
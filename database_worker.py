@@ -3,53 +3,591 @@
 # This application was fully developed by the author.
 # The author is responsible for the complete implementation.
 
-from PySide6.QtCore import QThread, Signal
+import threading
+import time
+import weakref
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
 import psycopg2
-from Data_Base_Connection import load_config
+from psycopg2 import errorcodes
+from psycopg2.extras import execute_values
+from connection_pool import get_pool
+from repository import SYNC_STATEMENTS, repository
+from query_metrics import metrics
+from slow_query_log import slow_query_log
+from csv_importer import CsvImport
+from grade_export import export_grades
+from Data_Base_Connection import load_config, prepare_database
 
-class DatabaseWorker(QThread):
-    """ Handles the Connection between DB and GUI via Threading for a responsive GUI"""
+# deadline per operation type (see DatabaseWorker.metric_name): (statement_timeout, lock_timeout) in ms, 0 = no limit.
+# a statement that is blocked or runs away fails with a clear message instead of tying up a thread of the executor
+DEFAULT_DEADLINE = (30000, 5000)
+DEADLINES = {
+    # the search runs while typing, an old result is useless anyway
+    "search_students": (3000, 1000),
+    "search_exams": (3000, 1000),
+    # ON DELETE CASCADE over all grades of a student/exam
+    "delete_student": (60000, 5000),
+    "delete_exam": (60000, 5000),
+    "delete_students": (120000, 10000),
+    "delete_exams": (120000, 10000),
+    "BatchWorker": (60000, 5000),
+    # size of the file decides, only blocking is limited
+    "ImportWorker": (0, 10000),
+    "ExportWorker": (0, 10000),
+}
 
-    # Different Signals for different Querys 
+_deadlines_on = weakref.WeakKeyDictionary() # connection -> deadline set in its session
+_deadlines_lock = threading.Lock()
+
+
+class CancellationToken:
+    """ Cancels a group of workers at once, e.g. all reads of a page the user left.
+    Queued workers do not run, running statements are cancelled on the server (connection.cancel())"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workers = weakref.WeakSet()
+        self._cancelled = False
+
+    def add(self, worker):
+        """add a worker to the group (cancelled right away if the token is already cancelled)"""
+        with self._lock:
+            self._workers.add(worker)
+            cancelled = self._cancelled
+        if cancelled:
+            worker.cancel()
+        return worker
+
+    def cancel(self):
+        """
+        cancel every worker of the group
+
+        Returns:
+            number of workers which had not finished yet
+        """
+        with self._lock:
+            self._cancelled = True
+            workers = list(self._workers)
+        unfinished = 0
+        for worker in workers:
+            if not worker.is_done():
+                unfinished += 1
+                worker.cancel()
+        return unfinished
+
+    def is_cancelled(self):
+        return self._cancelled
+
+
+class DatabaseWorker(QObject):
+    """ Handles the Connection between DB and GUI via Threading for a responsive GUI.
+    A worker is one database operation, it runs on a thread of the shared DatabaseExecutor
+    and works like a future: the result is delivered via signals and stored on the worker"""
+
+    # Different Signals for different Querys
     finished = Signal(bool, str)  # [INSERT] success, message
     data_fetched = Signal(bool, list, str) # [SELECT] success, data, message
-    operation_finished = Signal(bool, str, int) # [DELETE] success, message, rows_affected 
+    operation_finished = Signal(bool, str, int) # [DELETE] success, message, rows_affected
+    chunk_fetched = Signal(list) # [SELECT, streaming] next chunk of rows
+    stream_finished = Signal(bool, int, str) # [SELECT, streaming] success, total rows, message
+    done = Signal(object) # emitted last with the worker itself, used by the executor for cleanup
 
-    def __init__(self, query, params=None, fetch=False):
+    def __init__(self, query=None, params=None, fetch=False, chunk_size=None, statement=None):
+        """
+        Args:
+            query: SQL-query (or None if a statement of the repository is used)
+            params: params for the query
+            fetch: True for SELECT queries
+            chunk_size: stream the result of a SELECT in chunks of this size via a server-side cursor
+                        (chunk_fetched + stream_finished instead of data_fetched)
+            statement: name of a statement in repository.py, hot statements are executed as prepared statements
+        """
         super().__init__()
-        self.query = query
-        self.params = params 
-        self.fetch = fetch # 
-        self.rows_affected = 0 
-        self.config = load_config()  
-    
+        self.statement = statement
+        self.query = repository.sql(statement) if statement else query
+        self.params = params
+        self.fetch = fetch or chunk_size is not None
+        self.chunk_size = chunk_size
+        self.rows_affected = 0
+        self._cancelled = False
+        self._conn = None # connection of the running operation, used by cancel()
+        self._conn_lock = threading.Lock()
+        self._cancel_sent = None # threading.Event, set when the cancel request reached the server
+
+        # future state
+        self.success = None
+        self.result = None # rows for SELECT, rows_affected otherwise
+        self.error_message = ""
+        self.error_code = None # SQLSTATE of a database error, e.g. psycopg2.errorcodes.UNIQUE_VIOLATION
+        self._done_event = threading.Event()
+
+        # latency of the phases in seconds (see query_metrics.py)
+        self.phases = {}
+        self.submitted_at = None
+        self.done_emitted_at = None
+
+    def start(self):
+        """submit the worker to the shared executor (kept for the QThread-style call sites)"""
+        return get_executor().submit(self)
+
+    def is_done(self):
+        """True once the operation has finished (successfully or not)"""
+        return self._done_event.is_set()
+
+    def wait(self, timeout=None):
+        """block until the operation has finished, returns False if the timeout was reached"""
+        return self._done_event.wait(timeout)
+
+    def cancel(self):
+        """cancel the worker: a queued worker does not run, a running statement is cancelled on the server
+        (the worker reports the error "Cancelled"), a streaming worker stops after the current chunk.
+        Returns right away, the cancel request is sent from a thread of its own"""
+        self._cancelled = True
+        with self._conn_lock:
+            conn = self._conn
+            if conn is None or self._cancel_sent is not None:
+                return
+            self._cancel_sent = threading.Event()
+        # connection.cancel() opens a connection of its own to the server, a slow server must not block the GUI thread
+        threading.Thread(target=self._send_cancel, args=(conn, self._cancel_sent), daemon=True).start()
+
+    @staticmethod
+    def _send_cancel(conn, sent):
+        try:
+            conn.cancel()
+        except psycopg2.Error:
+            pass # the statement finished in the meantime
+        finally:
+            sent.set()
+
+    def _release_conn(self):
+        """stop cancelling the connection, waits for a cancel request on its way before the connection goes back to the pool"""
+        with self._conn_lock:
+            self._conn = None
+            sent = self._cancel_sent
+        if sent is not None:
+            sent.wait() # otherwise it could cancel the statement of the next worker using the connection
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def metric_name(self):
+        """query type the latency is recorded under"""
+        if self.statement:
+            return self.statement
+        return "query" if type(self) is DatabaseWorker else type(self).__name__
+
+    def deadline(self):
+        """(statement_timeout, lock_timeout) in ms of this operation type"""
+        return DEADLINES.get(self.metric_name(), DEFAULT_DEADLINE)
+
+    def _apply_deadline(self, conn):
+        """set the deadline in the session of the connection, only if it differs from the one set before
+        (committed right away, some operations have to start their own transaction, e.g. SET TRANSACTION)"""
+        deadline = self.deadline()
+        with _deadlines_lock:
+            if _deadlines_on.get(conn) == deadline:
+                return
+        with conn.cursor() as cursor:
+            cursor.execute("SET statement_timeout = %s; SET lock_timeout = %s", deadline)
+        conn.commit()
+        with _deadlines_lock:
+            _deadlines_on[conn] = deadline
+
     def run(self):
-        """gets triggered by worker.start() -> creates new thread.
-        connect to the DB & execute the query with the given params"""
-        try:
-            conn = psycopg2.connect(
-                host=self.config["host"],
-                database=self.config["database"],
-                user=self.config["username"],
-                password=self.config["password"],
-                port=self.config["port"]
-            )
-            cursor = conn.cursor()
-            cursor.execute(self.query, self.params)
+        """gets called on a thread of the executor.
+        borrow a connection from the shared pool & execute the query with the given params"""
+        if self.submitted_at is not None:
+            self.phases["queue"] = time.perf_counter() - self.submitted_at
+        try:
+            if self._cancelled:
+                self._emit_error("Cancelled")
+            else:
+                self._execute()
+        finally:
+            self._done_event.set()
+            self.done_emitted_at = time.perf_counter()
+            self.done.emit(self)
+
+    def _execute(self):
+        """execute the query and emit the result"""
+        started = time.perf_counter()
+        try:
+            pool = get_pool()
+            conn = pool.getconn()
+        except Exception as e:
+            self._emit_error(e)
+            return
+        finally:
+            self.phases["connect"] = time.perf_counter() - started
+
+        # from here on cancel() cancels the running statement
+        with self._conn_lock:
+            if self._cancelled:
+                pool.putconn(conn)
+                self._emit_error("Cancelled")
+                return
+            self._conn = conn
+
+        broken = False
+        started = time.perf_counter()
+        try:
+            self._apply_deadline(conn)
+            # named cursor = server-side cursor, rows are only transferred on fetchmany()
+            cursor = conn.cursor(name=f"stream_{id(self):x}") if self.chunk_size else conn.cursor()
+            result = self.execute(cursor)
 
             if self.fetch:
-                rows = cursor.fetchall()
-                self.data_fetched.emit(True, rows, "")
+                rows = result
             else:
-                self.rows_affected = cursor.rowcount
-                conn.commit()
-                self.operation_finished.emit(True, "Success !", self.rows_affected)
-
+                self.rows_affected = result
             cursor.close()
-            conn.close()
-            
+            conn.commit()
         except Exception as e:
-            if self.fetch:
-                self.data_fetched.emit(False, [], f"Error: {str(e)}")
-            self.finished.emit(False, f"Error: {str(e)}")
-            self.operation_finished.emit(False, str(e), 5000)
\ No newline at end of file
+            self._release_conn()
+            # connection-level errors mean the connection is unusable -> pool replaces it,
+            # errors with an SQLSTATE (e.g. cancelled, timed out) come from a working connection
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) and getattr(e, "pgcode", None) is None
+            with _deadlines_lock:
+                _deadlines_on.pop(conn, None) # the rollback may have undone the SET
+            pool.putconn(conn, broken)
+            self._emit_error(e)
+            return
+        finally:
+            self.phases["execute"] = time.perf_counter() - started - self.phases.get("fetch", 0.0)
+
+        self._release_conn()
+
+        # give the connection back before the GUI gets the result
+        pool.putconn(conn)
+        slow_query_log.report(self.metric_name(), self.query, self.params, self.phases["execute"] + self.phases.get("fetch", 0.0))
+        self.success = True
+        if self.chunk_size:
+            self.result = rows
+            self.stream_finished.emit(not self._cancelled, rows, "Cancelled" if self._cancelled else "")
+        elif self.fetch:
+            self.result = rows
+            self.data_fetched.emit(True, rows, "")
+        else:
+            self.result = self.rows_affected
+            self.operation_finished.emit(True, "Success !", self.rows_affected)
+
+    def execute(self, cursor):
+        """
+        run the operation inside the transaction of the borrowed connection (can be overwritten by subclasses)
+
+        Returns:
+            fetched rows if fetch is True, otherwise the number of affected rows
+        """
+        if self.statement:
+            repository.execute(cursor, self.statement, self.params)
+        else:
+            cursor.execute(self.query, self.params)
+        if not self.fetch:
+            return cursor.rowcount
+        started = time.perf_counter()
+        try:
+            return self._stream(cursor) if self.chunk_size else cursor.fetchall()
+        finally:
+            self.phases["fetch"] = time.perf_counter() - started
+
+    def _stream(self, cursor):
+        """
+        emit the result chunk by chunk until it is exhausted or the worker gets cancelled
+
+        Returns:
+            number of emitted rows
+        """
+        total = 0
+        while not self._cancelled:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            total += len(rows)
+            self.chunk_fetched.emit(rows)
+        return total
+
+    def _emit_error(self, e):
+        """emit the error on every signal, so every kind of caller gets notified"""
+        self.success = False
+        self.error_code = getattr(e, "pgcode", None)
+        statement_timeout, lock_timeout = self.deadline()
+        if self.error_code == errorcodes.QUERY_CANCELED:
+            e = "Cancelled" if self._cancelled else f"Timed out after {statement_timeout / 1000:g}s"
+        elif self.error_code == errorcodes.LOCK_NOT_AVAILABLE:
+            e = f"Timed out after waiting {lock_timeout / 1000:g}s for a lock, the data is in use by someone else"
+        self.error_message = str(e)
+        if self.chunk_size:
+            self.stream_finished.emit(False, 0, f"Error: {str(e)}")
+        elif self.fetch:
+            self.data_fetched.emit(False, [], f"Error: {str(e)}")
+        self.finished.emit(False, f"Error: {str(e)}")
+        self.operation_finished.emit(False, str(e), 5000)
+
+
+class BatchWorker(DatabaseWorker):
+    """ Writes many rows with multi-row statements (psycopg2 execute_values) in one transaction.
+    Either every statement succeeds or the whole batch is rolled back"""
+
+    def __init__(self, statements):
+        """
+        Args:
+            statements: list of (statement name, rows, template) tuples, the statement (see repository.py) contains
+                        one VALUES %s placeholder and template is the row template for execute_values (None for plain placeholders)
+        """
+        super().__init__(None, None, False)
+        self.statements = statements
+
+    def execute(self, cursor):
+        rows_affected = 0
+        for name, rows, template in self.statements:
+            if not rows:
+                continue
+            # one page -> one statement per entry and a correct rowcount
+            started = time.perf_counter()
+            execute_values(cursor, repository.sql(name), rows, template=template, page_size=len(rows))
+            repository.record(name, time.perf_counter() - started)
+            rows_affected += cursor.rowcount
+        return rows_affected
+
+
+class WriteBehindWorker(DatabaseWorker):
+    """ Writes the queued rows of the rapid-entry mode (see write_behind.py) in one transaction.
+    All rows go into one multi-row statement; if the database rejects it, the rows are written one by one
+    with a savepoint each, so only the rejected rows are left out (see rejected)"""
+
+    def __init__(self, statement, rows, template=None):
+        """
+        Args:
+            statement: statement of repository.py with one VALUES %s placeholder
+            rows: params of the rows
+            template: row template for execute_values, None for plain placeholders
+        """
+        super().__init__(None, None, False)
+        self.name = statement
+        self.rows = rows
+        self.template = template
+        self.rejected = [] # (index of the row, SQLSTATE, first line of the error)
+
+    def execute(self, cursor):
+        query = repository.sql(self.name)
+        started = time.perf_counter()
+        cursor.execute("SAVEPOINT write_behind")
+        try:
+            execute_values(cursor, query, self.rows, template=self.template, page_size=len(self.rows))
+            repository.record(self.name, time.perf_counter() - started)
+            return cursor.rowcount
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            raise # connection lost, the whole batch is tried again
+        except psycopg2.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT write_behind")
+
+        # at least one row is rejected: find it, keep the others
+        written = 0
+        for index, row in enumerate(self.rows):
+            try:
+                execute_values(cursor, query, [row], template=self.template)
+                written += cursor.rowcount
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                raise
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT write_behind")
+                self.rejected.append((index, e.pgcode, str(e).strip().splitlines()[0]))
+            # a fresh savepoint for the next row
+            cursor.execute("RELEASE SAVEPOINT write_behind")
+            cursor.execute("SAVEPOINT write_behind")
+        repository.record(self.name, time.perf_counter() - started, error=bool(self.rejected))
+        return written
+
+
+class ImportWorker(DatabaseWorker):
+    """ Imports a CSV file via COPY (see csv_importer.py) in one transaction and reports the progress"""
+
+    progress = Signal(int, float) # rows_read, rows_per_second
+
+    def __init__(self, kind, path, update=False):
+        """
+        Args:
+            kind: "students", "exams" or "grades"
+            path: path of the CSV file
+            update: update existing records instead of skipping them
+        """
+        super().__init__(None, None, False)
+        self.csv_import = CsvImport(kind, path, update, progress=self.progress.emit)
+        self.summary = None
+
+    def execute(self, cursor):
+        self.summary = self.csv_import.run(cursor)
+        return self.summary["rows_merged"]
+
+
+class ExportWorker(DatabaseWorker):
+    """ Streams filtered grades via COPY TO into a CSV file (see grade_export.py)"""
+
+    def __init__(self, path, semester=None, degree_program=None, pnr=None, delimiter=","):
+        """
+        Args:
+            path: CSV file to write
+            semester, degree_program, pnr: optional filters, None means no filter
+            delimiter: CSV delimiter
+        """
+        super().__init__(None, None, False)
+        self.path = path
+        self.filters = (semester, degree_program, pnr)
+        self.delimiter = delimiter
+        self.summary = None
+
+    def execute(self, cursor):
+        self.summary = export_grades(cursor, self.path, *self.filters, delimiter=self.delimiter)
+        return self.summary["rows"]
+
+
+class SyncWorker(DatabaseWorker):
+    """ Fetches students or exams for the entity cache (see entity_cache.py): all rows on the first sync,
+    afterwards only the rows changed and the keys deleted since the last sync. Rows are streamed in chunks"""
+
+    def __init__(self, table, since_txid=None, chunk_size=500):
+        """
+        Args:
+            table: "student" or "exam"
+            since_txid: watermark of the last sync, None for a full load
+            chunk_size: rows per chunk_fetched signal
+        """
+        full_load, delta = SYNC_STATEMENTS[table]
+        if since_txid is None:
+            super().__init__(statement=full_load, chunk_size=chunk_size)
+        else:
+            super().__init__(statement=delta, params=(since_txid,), chunk_size=chunk_size)
+        self.table = table
+        self.since_txid = since_txid
+        self.watermark = None # set before the first chunk is emitted
+        self.deleted_keys = []
+
+    def execute(self, cursor):
+        with cursor.connection.cursor() as side_cursor:
+            # watermark, tombstones and rows have to come from the same snapshot
+            side_cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            side_cursor.execute(repository.sql("select_snapshot_xmin"))
+            self.watermark = side_cursor.fetchone()[0]
+            if self.since_txid is not None:
+                repository.execute(side_cursor, "select_deleted_keys", (self.table, self.since_txid))
+                self.deleted_keys = [row[0] for row in side_cursor.fetchall()]
+        return super().execute(cursor)
+
+
+class SchemaWorker(DatabaseWorker):
+    """ Checks (and creates or upgrades) the database schema with prepare_database, so the window
+    does not wait for the admin-database round trip. finished carries the result of prepare_database"""
+
+    def __init__(self, force=False):
+        """
+        Args:
+            force: check the schema even if it was already verified (see SCHEMA_MARKER_PATH)
+        """
+        super().__init__(None, None, False)
+        self.force = force
+
+    def _execute(self):
+        # prepare_database opens its own connections, the target database may not even exist yet
+        started = time.perf_counter()
+        try:
+            status = prepare_database(force=self.force)
+        except Exception as e:
+            self._emit_error(e)
+            return
+        finally:
+            self.phases["execute"] = time.perf_counter() - started
+        if status is None:
+            self._emit_error("Database schema could not be verified, see the console output")
+            return
+        self.success = True
+        self.result = status
+        self.finished.emit(True, status)
+
+
+class _WorkerRunnable(QRunnable):
+    """QRunnable wrapper which runs one DatabaseWorker on a pooled thread"""
+
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        self.worker.run()
+
+
+class DatabaseExecutor(QObject):
+    """ Runs DatabaseWorkers on a fixed number of reusable threads.
+    Workers are kept alive by the executor until their results have been delivered to the GUI thread"""
+
+    def __init__(self, max_workers):
+        """
+        Args:
+            max_workers: number of threads, i.e. how many queries may run at the same time
+        """
+        super().__init__()
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(max_workers)
+        self.thread_pool.setExpiryTimeout(-1) # keep idle threads alive for reuse
+        self._pending = set()
+
+    def submit(self, worker: DatabaseWorker):
+        """
+        Queue a worker for execution. Connect the worker's signals before submitting it.
+
+        Returns:
+            the worker, which can be used as future (is_done(), wait(), result)
+        """
+        self._pending.add(worker)
+        worker.submitted_at = time.perf_counter()
+        worker.done.connect(self._on_worker_done)
+        self.thread_pool.start(_WorkerRunnable(worker))
+        return worker
+
+    def submit_query(self, query, params=None, fetch=False, on_result=None):
+        """
+        Create a worker for the query and queue it.
+
+        Args:
+            query: SQL-query
+            params: params for the query
+            fetch: True for SELECT queries
+            on_result: optional callback, connected to data_fetched (fetch) or operation_finished
+
+        Returns:
+            the submitted DatabaseWorker
+        """
+        worker = DatabaseWorker(query, params, fetch)
+        if on_result is not None:
+            (worker.data_fetched if fetch else worker.operation_finished).connect(on_result)
+        return self.submit(worker)
+
+    @Slot(object)
+    def _on_worker_done(self, worker):
+        """runs in the GUI thread after all result signals of the worker have been delivered"""
+        self._pending.discard(worker)
+        worker.phases["deliver"] = time.perf_counter() - worker.done_emitted_at
+        metrics.record(worker.metric_name(), worker.phases, error=not worker.success and not worker.is_cancelled())
+
+    def pending_count(self):
+        """number of submitted workers whose results have not been delivered yet"""
+        return len(self._pending)
+
+    def wait_for_done(self, msecs=-1):
+        """block until every queued worker has finished (e.g. on shutdown)"""
+        return self.thread_pool.waitForDone(msecs)
+
+
+_executor = None
+
+def get_executor():
+    """returns the application-wide executor, the thread count is taken from user_login_config.json"""
+    global _executor
+    if _executor is None:
+        try:
+            config = load_config()
+        except Exception:
+            config = {}
+        max_workers = config.get("executor_max_workers", config.get("pool_max_connections", 5))
+        _executor = DatabaseExecutor(max(1, int(max_workers)))
+    return _executor
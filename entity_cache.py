@@ -0,0 +1,150 @@
+"""In-memory cache of the students and exams, shared by all pages.
+
+The first sync of a table loads every row, every later sync only fetches the rows changed
+(updated_txid) and the keys deleted (deleted_record) since the watermark of the previous sync,
+so refreshing a dropdown menu costs the size of the change instead of the size of the table.
+"""
+
+from PySide6.QtCore import QObject, Signal
+
+from change_listener import get_change_listener
+from database_worker import SyncWorker, get_executor
+
+SYNC_CHUNK_SIZE = 500 # rows per chunk of a full load
+
+# table -> (sort key, descending) of the rows, same order as the full load
+SORT_KEYS = {
+    "student": (lambda row: row[0], True), # matriculation number, newest first
+    "exam": (lambda row: row[1].casefold(), False), # title
+}
+
+
+class EntityCache(QObject):
+    """ Rows of student and exam by key (first column), kept in sync with the DB on request"""
+
+    reset = Signal(str) # table: a full load starts, the records are replaced
+    rows_loaded = Signal(str, list) # table, next chunk of a full load (in display order)
+    rows_changed = Signal(str, list, list) # table, inserted/updated rows, deleted keys (delta sync)
+    synced = Signal(str, bool) # table, True if the records changed
+    sync_failed = Signal(str, str) # table, error message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._records = {table: {} for table in SORT_KEYS}
+        self._watermarks = {table: None for table in SORT_KEYS} # None -> the next sync is a full load
+        self._versions = {table: 0 for table in SORT_KEYS} # incremented on every change
+        self._sorted = {} # table -> sorted rows of the current version
+        self._workers = {} # table -> running SyncWorker
+        self._pending = set() # tables which changed while their sync was running
+
+        get_change_listener().table_changed.connect(self._on_table_changed)
+
+    def is_loaded(self, table):
+        """True after the first successful sync of the table"""
+        return self._watermarks[table] is not None
+
+    def version(self, table):
+        return self._versions[table]
+
+    def records(self, table):
+        """dict key -> row, must not be modified"""
+        return self._records[table]
+
+    def rows(self, table):
+        """all rows of the table in display order (sorted once per version)"""
+        if table not in self._sorted:
+            key, descending = SORT_KEYS[table]
+            self._sorted[table] = sorted(self._records[table].values(), key=key, reverse=descending)
+        return self._sorted[table]
+
+    def sync(self, table):
+        """fetch the changes of the table since the last sync (everything the first time), runs in the background"""
+        if table in self._workers:
+            return # the result of the running sync is on its way
+
+        worker = SyncWorker(table, self._watermarks[table], SYNC_CHUNK_SIZE)
+        worker.cache_reset = False
+        worker.upserted_keys = set()
+        worker.chunk_fetched.connect(lambda rows, w=worker: self._on_chunk(w, rows))
+        worker.stream_finished.connect(lambda success, total, error_msg, w=worker: self._on_finished(w, success, error_msg))
+        self._workers[table] = worker
+        get_executor().submit(worker)
+
+    def reload(self, table):
+        """load the table completely again"""
+        self._watermarks[table] = None
+        if table in self._workers:
+            self._pending.add(table)
+        else:
+            self.sync(table)
+
+    def _on_table_changed(self, table):
+        """a change during a running sync may not be part of its snapshot -> sync again afterwards"""
+        if table in self._workers:
+            self._pending.add(table)
+
+    def _on_chunk(self, worker, rows):
+        table = worker.table
+        full_load = worker.since_txid is None
+
+        if full_load and not worker.cache_reset:
+            self._records[table] = {}
+            self._sorted.pop(table, None)
+            worker.cache_reset = True
+            self.reset.emit(table)
+
+        records = self._records[table]
+        for row in rows:
+            records[row[0]] = row
+            worker.upserted_keys.add(row[0])
+
+        if full_load:
+            self.rows_loaded.emit(table, rows)
+
+    def _on_finished(self, worker, success, error_msg):
+        table = worker.table
+        if self._workers.get(table) is worker:
+            del self._workers[table]
+
+        if not success:
+            if worker.cache_reset:
+                # the records only hold a part of the table now, the next sync loads everything again
+                self._versions[table] += 1
+            self.sync_failed.emit(table, error_msg)
+        else:
+            changed = bool(worker.upserted_keys)
+            if worker.since_txid is None and not worker.cache_reset:
+                # empty table -> no chunk was emitted
+                self._records[table] = {}
+                self.reset.emit(table)
+                changed = True
+
+            # a key deleted and inserted again is in the snapshot, so only keys without a current row are removed
+            records = self._records[table]
+            for key in worker.deleted_keys:
+                if key not in worker.upserted_keys and records.pop(key, None) is not None:
+                    changed = True
+
+            self._watermarks[table] = worker.watermark
+            if changed:
+                self._versions[table] += 1
+                self._sorted.pop(table, None)
+                if worker.since_txid is not None:
+                    upserted = [records[key] for key in worker.upserted_keys]
+                    deleted = [key for key in worker.deleted_keys if key not in worker.upserted_keys]
+                    self.rows_changed.emit(table, upserted, deleted)
+            self.synced.emit(table, changed)
+
+        if table in self._pending:
+            self._pending.discard(table)
+            self.sync(table)
+
+
+_cache = None
+
+def get_entity_cache():
+    """returns the application-wide entity cache (created on first use, must be called from the GUI thread)"""
+    global _cache
+    if _cache is None:
+        _cache = EntityCache()
+    return _cache
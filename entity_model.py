@@ -0,0 +1,229 @@
+"""Shared list models of the students and exams for the dropdown menus.
+
+There is one model per table for the whole application, every combobox of every page binds to it.
+The display strings are built once when a row enters the model, and the rows are handed to the
+views page by page (canFetchMore/fetchMore), so filling a combobox no longer costs one addItem per row.
+The models follow the entity cache: full loads reset them, delta syncs insert, update or remove single rows.
+"""
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from entity_cache import SORT_KEYS, get_entity_cache
+
+PAGE_SIZE = 1000 # rows handed to a view per fetchMore
+RESET_THRESHOLD = 1000 # larger delta syncs rebuild the model, every single insert/remove moves the rows behind it
+
+# table -> display text of a row in the dropdown menus
+DISPLAY_TEXTS = {
+    "student": lambda row: f"{row[2]}, {row[1]} ({row[0]})", # last name, first name (matriculation number)
+    "exam": lambda row: f"{row[0]} - {row[1]} ({row[3]} | {row[2]})", # pnr - title (exam date | semester)
+}
+
+
+class EntityListModel(QAbstractListModel):
+    """ Rows of one table of the entity cache: display text for Qt.DisplayRole, key (matriculation number/PNr) for Qt.UserRole"""
+
+    def __init__(self, table, parent=None):
+        """
+        Args:
+            table: "student" or "exam"
+        """
+        super().__init__(parent)
+        self.table = table
+        self._display_text = DISPLAY_TEXTS[table]
+        self._sort_key, self._descending = SORT_KEYS[table]
+        self._keys = []
+        self._texts = []
+        self._sort_keys = []
+        self._sort_key_of = {} # key -> sort key, finds a row by binary search instead of scanning the list
+        self._in_order = True # False while a full load streams rows the DB collation sorted differently than SORT_KEYS
+        self._fetched = 0 # rows visible to the views, the rest is handed out by fetchMore
+
+        cache = get_entity_cache()
+        for row in cache.rows(table):
+            self._append(row)
+        self._fetched = min(PAGE_SIZE, len(self._keys))
+
+        cache.reset.connect(self._on_reset)
+        cache.rows_loaded.connect(self._on_rows_loaded)
+        cache.rows_changed.connect(self._on_rows_changed)
+        cache.synced.connect(self._on_synced)
+
+    # === QAbstractListModel ===
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._fetched:
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._texts[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return self._keys[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < len(self._keys)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(PAGE_SIZE, len(self._keys) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def row_for_key(self, key):
+        """
+        row of a key, rows up to it are handed out if it was not fetched yet (e.g. to select a search result)
+
+        Returns:
+            the row or -1 if the key is not in the model
+        """
+        position = self._position(key)
+        if position < 0:
+            return -1
+        if position >= self._fetched:
+            self.beginInsertRows(QModelIndex(), self._fetched, position)
+            self._fetched = position + 1
+            self.endInsertRows()
+        return position
+
+    # === CACHE UPDATES ===
+
+    def _append(self, row):
+        sort_key = self._sort_key(row)
+        self._keys.append(row[0])
+        self._texts.append(self._display_text(row))
+        self._sort_keys.append(sort_key)
+        self._sort_key_of[row[0]] = sort_key
+
+    def _position(self, key):
+        """position of a key, -1 if it is not in the model (rows with the same sort key, e.g. exam titles, are checked one by one)"""
+        sort_key = self._sort_key_of.get(key)
+        if sort_key is None:
+            return -1
+        if not self._in_order:
+            return self._keys.index(key) # only until the load finished and the model was sorted (see _on_synced)
+        position = self._insert_position(sort_key)
+        while position < len(self._keys) and self._sort_keys[position] == sort_key:
+            if self._keys[position] == key:
+                return position
+            position += 1
+        return -1
+
+    def _insert_position(self, sort_key):
+        """binary search for the position of a new row (the rows are sorted like the cache)"""
+        low, high = 0, len(self._sort_keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._is_before(self._sort_keys[middle], sort_key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _is_before(self, sort_key, other):
+        return sort_key > other if self._descending else sort_key < other
+
+    def _remove(self, position):
+        visible = position < self._fetched
+        if visible:
+            self.beginRemoveRows(QModelIndex(), position, position)
+        del self._sort_key_of[self._keys[position]]
+        del self._keys[position], self._texts[position], self._sort_keys[position]
+        if visible:
+            self._fetched -= 1
+            self.endRemoveRows()
+
+    def _insert(self, row):
+        sort_key = self._sort_key(row)
+        position = self._insert_position(sort_key)
+        # rows behind the fetched part are handed out later by fetchMore
+        visible = position < self._fetched or self._fetched == len(self._keys)
+        if visible:
+            self.beginInsertRows(QModelIndex(), position, position)
+        self._keys.insert(position, row[0])
+        self._texts.insert(position, self._display_text(row))
+        self._sort_keys.insert(position, sort_key)
+        self._sort_key_of[row[0]] = sort_key
+        if visible:
+            self._fetched += 1
+            self.endInsertRows()
+
+    def _on_reset(self, table):
+        if table != self.table:
+            return
+        self.beginResetModel()
+        self._keys, self._texts, self._sort_keys = [], [], []
+        self._sort_key_of = {}
+        self._in_order = True
+        self._fetched = 0
+        self.endResetModel()
+
+    def _rebuild(self):
+        """take all rows from the cache again (the cache already contains the delta)"""
+        self.beginResetModel()
+        self._keys, self._texts, self._sort_keys = [], [], []
+        self._sort_key_of = {}
+        for row in get_entity_cache().rows(self.table):
+            self._append(row)
+        self._in_order = True
+        self._fetched = min(PAGE_SIZE, len(self._keys))
+        self.endResetModel()
+
+    def _on_rows_loaded(self, table, rows):
+        """next chunk of a full load, the first page is shown right away"""
+        if table != self.table:
+            return
+        for row in rows:
+            # the DB sorts by its collation, which may differ from SORT_KEYS (e.g. umlauts, spaces)
+            if self._in_order and self._sort_keys and self._is_before(self._sort_key(row), self._sort_keys[-1]):
+                self._in_order = False
+            self._append(row)
+        visible = min(PAGE_SIZE, len(self._keys))
+        if visible > self._fetched:
+            self.beginInsertRows(QModelIndex(), self._fetched, visible - 1)
+            self._fetched = visible
+            self.endInsertRows()
+
+    def _on_synced(self, table, changed):
+        """a full load in another order than SORT_KEYS is sorted once it is complete, the binary search needs it"""
+        if table == self.table and not self._in_order:
+            self._rebuild()
+
+    def _on_rows_changed(self, table, upserted, deleted):
+        """apply a delta sync row by row, so the selection of the comboboxes is kept (large deltas rebuild the model)"""
+        if table != self.table:
+            return
+        if len(upserted) + len(deleted) > RESET_THRESHOLD:
+            self._rebuild()
+            return
+        for key in deleted:
+            position = self._position(key)
+            if position >= 0:
+                self._remove(position)
+
+        for row in upserted:
+            position = self._position(row[0])
+            if position >= 0:
+                if self._sort_keys[position] == self._sort_key(row):
+                    self._texts[position] = self._display_text(row)
+                    if position < self._fetched:
+                        index = self.index(position)
+                        self.dataChanged.emit(index, index)
+                    continue
+                self._remove(position) # sort key changed -> moves to another position
+            self._insert(row)
+
+
+_models = {}
+
+def get_entity_model(table):
+    """returns the application-wide model of a table (created on first use, must be called from the GUI thread)"""
+    if table not in _models:
+        _models[table] = EntityListModel(table)
+    return _models[table]
@@ -0,0 +1,110 @@
+"""Streaming export of grades (joined with student and exam) to a CSV file.
+
+The rows are streamed by the server via COPY (SELECT ...) TO STDOUT directly into the file,
+so memory use stays flat regardless of the size of the grade table.
+
+Usage:
+    python grade_export.py grades.csv
+    python grade_export.py grades_sose24.csv --semester "SoSe 24" --degree-program "Data Science (M.Sc.)"
+    python grade_export.py exam.csv --pnr 0000000042
+"""
+
+import argparse
+import sys
+import time
+
+from psycopg2 import sql
+
+EXPORT_QUERY = """
+    SELECT g.matriculation_number, s.last_name, s.first_name,
+           g.pnr, e.title AS exam_title, e.exam_date, e.semester, e.degree_program,
+           g.grade, g.grade_date
+    FROM grade g
+    JOIN student s ON s.matriculation_number = g.matriculation_number
+    JOIN exam e ON e.pnr = g.pnr
+    {where}
+    ORDER BY g.pnr, g.matriculation_number
+"""
+
+
+def build_export_query(cursor, semester=None, degree_program=None, pnr=None):
+    """
+    Build the SELECT for the export with the given filters.
+    COPY does not accept bind parameters, so the values are quoted by psycopg2 (mogrify).
+
+    Args:
+        cursor: psycopg2 cursor (used for quoting)
+        semester, degree_program, pnr: optional filters, None means no filter
+
+    Returns:
+        the SQL query as str
+    """
+    conditions, params = [], []
+    for column, value in (("e.semester", semester), ("e.degree_program", degree_program), ("g.pnr", pnr)):
+        if value:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    query = EXPORT_QUERY.format(where=where)
+    return cursor.mogrify(query, params).decode() if params else query
+
+
+def export_grades(cursor, path, semester=None, degree_program=None, pnr=None, delimiter=","):
+    """
+    Export the filtered grades to a CSV file with header line.
+
+    Args:
+        cursor: psycopg2 cursor
+        path: path of the CSV file, an existing file is overwritten
+        semester, degree_program, pnr: optional filters
+        delimiter: CSV delimiter (e.g. ';' for Excel with german locale)
+
+    Returns:
+        dict with the export summary
+    """
+    started = time.perf_counter()
+    query = build_export_query(cursor, semester, degree_program, pnr)
+    copy_sql = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true, DELIMITER {})").format(
+        sql.SQL(query), sql.Literal(delimiter)).as_string(cursor)
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        cursor.copy_expert(copy_sql, file)
+
+    seconds = time.perf_counter() - started
+    return {
+        "path": path,
+        "rows": cursor.rowcount,
+        "seconds": seconds,
+        "rows_per_second": cursor.rowcount / seconds if seconds > 0 and cursor.rowcount > 0 else 0.0,
+    }
+
+
+def format_summary(summary):
+    """human readable one-line summary of an export"""
+    return (f"Exported {summary['rows']} grades to {summary['path']} "
+            f"in {summary['seconds']:.1f}s ({summary['rows_per_second']:.0f} rows/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export grades joined with student and exam data to a CSV file")
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--semester", help="only exams of this semester, e.g. 'SoSe 24'")
+    parser.add_argument("--degree-program", help="only exams of this degree program")
+    parser.add_argument("--pnr", help="only this exam (PNr with leading zeros)")
+    parser.add_argument("--delimiter", default=",", help="CSV delimiter (default: ',')")
+    args = parser.parse_args(argv)
+
+    from connection_pool import get_pool
+
+    with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            summary = export_grades(cursor, args.path, args.semester, args.degree_program, args.pnr, args.delimiter)
+        conn.rollback() # read only
+
+    print(format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Allocation of new matriculation numbers and PNRs.
+
+The keys come from the sequences of Data_Base_Connection.ID_SEQUENCES. Every client reserves a block
+of BLOCK_SIZE keys in one round trip and hands them out locally, so clerks working at the same time
+never get the same key and the pages do not have to guess the next key from the largest one.
+Keys of a block which are not used (key typed by hand, application closed) are skipped, a sequence
+only moves forward. The keys are plain ints, the pages add the leading zeros (zfill) as before.
+"""
+
+from collections import deque
+
+from PySide6.QtCore import QObject, Signal
+
+import validation
+from database_worker import DatabaseWorker, get_executor
+from repository import RESERVE_STATEMENTS
+
+BLOCK_SIZE = 10 # keys reserved per round trip
+REFILL_THRESHOLD = 3 # the next block is reserved in the background when only this many keys are left
+
+# largest key which still fits the input field / the ID_LENGTH digits
+MAX_KEYS = {
+    "student": validation.MAX_MATRICULATION_NUMBER,
+    "exam": 10 ** validation.ID_LENGTH - 1,
+}
+
+
+class IdAllocator(QObject):
+    """ Hands out new keys of one table from blocks reserved on its sequence"""
+
+    key_available = Signal(int) # next key, emitted when a block arrives
+    reserve_failed = Signal(str) # error message
+
+    def __init__(self, table, block_size=BLOCK_SIZE, parent=None):
+        """
+        Args:
+            table: "student" or "exam"
+            block_size: keys reserved per round trip
+        """
+        super().__init__(parent)
+        self.table = table
+        self.block_size = block_size
+        self._keys = deque()
+        self._worker = None # running reservation
+
+    def peek(self):
+        """
+        next free key without using it up, reserves a new block if the current one runs low
+
+        Returns:
+            int, or None while the first block is still on its way (key_available follows)
+        """
+        if len(self._keys) <= REFILL_THRESHOLD:
+            self.reserve()
+        return self._keys[0] if self._keys else None
+
+    def take(self, key):
+        """
+        mark a key as used, called after a record with this key was saved
+        (or when the key turned out to be taken already, e.g. typed by hand by someone else)
+
+        Args:
+            key: the saved key (int), keys which were not reserved here are ignored
+        """
+        try:
+            self._keys.remove(key)
+        except ValueError:
+            return
+        if len(self._keys) <= REFILL_THRESHOLD:
+            self.reserve()
+
+    def reserve(self):
+        """reserve the next block in the background (does nothing while a reservation is running)"""
+        if self._worker is not None:
+            return
+        self._worker = DatabaseWorker(statement=RESERVE_STATEMENTS[self.table], params=(self.block_size,), fetch=True)
+        self._worker.data_fetched.connect(self._on_reserved)
+        get_executor().submit(self._worker)
+
+    def _on_reserved(self, success, rows, error_msg):
+        """
+        Callback of the reservation
+        Args:
+            success: bool if query succeeded
+            rows: list of tuples with the reserved keys
+            error_msg: str message from worker/db
+        """
+        self._worker = None
+        if not success:
+            self.reserve_failed.emit(f"error reserving new keys: {error_msg}")
+            return
+
+        was_empty = not self._keys
+        keys = [row[0] for row in rows if row[0] <= MAX_KEYS[self.table]]
+        if not keys:
+            self.reserve_failed.emit(f"no free keys left for {self.table} (maximum {MAX_KEYS[self.table]})")
+            return
+        self._keys.extend(keys)
+        if was_empty:
+            self.key_available.emit(self._keys[0])
+
+
+_allocators = {}
+
+def get_id_allocator(table):
+    """returns the application-wide allocator of the table (created on first use, must be called from the GUI thread)"""
+    if table not in _allocators:
+        _allocators[table] = IdAllocator(table)
+    return _allocators[table]
@@ -5,36 +5,63 @@
 # including UI design, Page logic, data handling, and visualizations.
 
 
-from database_worker import DatabaseWorker
-from Data_Base_Connection import prepare_database
+from database_worker import BatchWorker, CancellationToken, DatabaseWorker, ExportWorker, ImportWorker, SchemaWorker, get_executor
+from csv_importer import format_summary as format_import_summary
+from grade_export import format_summary as format_export_summary
+from connection_pool import close_pool
+from change_listener import get_change_listener
+from entity_cache import get_entity_cache
+from entity_model import get_entity_model
+from id_allocator import get_id_allocator
+from type_ahead import TypeAheadSearch
+from write_behind import WriteBehindQueue
+from shiny_service import FAILED, RUNNING, STARTING, STOPPED, get_shiny_service
+from config_store import config_store, DROPDOWN_OPTIONS_PATH, LOGIN_CONFIG_PATH
+import validation
+from repository import DELETE_STATEMENTS
+from query_metrics import metrics
+from validation import normalize_grade_text, parse_grade
+from psycopg2 import errorcodes
 import json
 import os 
-from PySide6.QtCore import Signal, QDate, Qt, QProcess, QUrl
-from PySide6.QtGui import QDoubleValidator, QIntValidator, QPixmap
-from PySide6.QtWidgets import QComboBox, QDateEdit, QHBoxLayout, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFormLayout
-from PySide6.QtWebEngineWidgets import QWebEngineView
-import signal
-import subprocess
-import time
-import socket
+from PySide6.QtCore import Signal, QDate, Qt, QProcess, QTimer, QUrl
+from PySide6.QtGui import QBrush, QColor, QDoubleValidator, QIntValidator, QPixmap
+from PySide6.QtWidgets import (QButtonGroup, QCheckBox, QComboBox, QDateEdit, QFileDialog, QHBoxLayout, QHeaderView, QWidget, QVBoxLayout, QLabel, QLineEdit,
+QListWidget, QListWidgetItem, QPushButton, QFormLayout, QStackedWidget, QStyledItemDelegate, QTableWidget, QTableWidgetItem)
 
 MSG_TIME = 3000
 
 ERR_MSG_TIME = 5000
 
+IMPORT_MSG_TIME = 15000
+
+PERFORMANCE_REFRESH_INTERVAL = 2000 # ms between refreshes of the performance panel
+
+# performance panel: (header, (phase, percentile)) - the first three columns are name, calls and errors
+PERFORMANCE_COLUMNS = [
+    ("Query", None),
+    ("Calls", None),
+    ("Errors", None),
+    ("p50 ms", ("total", 50)),
+    ("p95 ms", ("total", 95)),
+    ("p99 ms", ("total", 99)),
+    ("Queue p95", ("queue", 95)),
+    ("Connect p95", ("connect", 95)),
+    ("Execute p95", ("execute", 95)),
+    ("Fetch p95", ("fetch", 95)),
+    ("Delivery p95", ("deliver", 95)),
+]
+
 def dropdown_options_path():
     """loads the dropdown_options.json path and returns it"""
-    config_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),"dropdown_options.json")
-    return config_path
+    return DROPDOWN_OPTIONS_PATH
 
 def load_dropdown_options():
-    """loads the dropdown-options from the JSON-File"""
+    """loads the dropdown-options from the JSON-File (parsed once, served from the config store)"""
     config_path = dropdown_options_path()
 
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return True, json.load(f), ""  # success, options, error_msg for reload_options 
+        return True, config_store.get(config_path), ""  # success, options, error_msg for reload_options 
     except FileNotFoundError:
         return False, {"study_programs": [], "semesters": []}, "dropdown_options.json not found!" # success, options, error_msg for reload_options
     except json.JSONDecodeError:
@@ -42,16 +69,13 @@ def load_dropdown_options():
 
 def login_config_path():
     """ returns the path of the user_login_config.json file used for loggin into the database"""
-    config_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),"user_login_config.json")
-    return config_path
+    return LOGIN_CONFIG_PATH
 
 def load_login_config():
-    """Loads the login config from the JSON file"""
+    """Loads the login config from the JSON file (parsed once, served from the config store)"""
     config_path = login_config_path()
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return True, json.load(f), ""
+        return True, config_store.get(config_path), ""
     except FileNotFoundError:
         return False, {}, "user_login_config.json not found!"
     except json.JSONDecodeError:
@@ -76,6 +100,7 @@ class BasePage(QWidget):
         self.image_path = os.path.join(self.base_path, "Images")
         self.data = {}  
         self.title = title
+        self._read_token = CancellationToken() # reads of the page, cancelled when the page is left
         self.setup_base_ui()
 
     # === SHARED PAGE LOGIC SETUP METHODS ===
@@ -114,6 +139,63 @@ class BasePage(QWidget):
         """Has to be implemented by SubClass"""
         raise NotImplementedError("Unterklassen müssen clear_form() implementieren")
 
+    def refresh_data(self):
+        """Has to be implemented by SubClasses which call watch_tables()"""
+        raise NotImplementedError("Unterklassen mit watch_tables() müssen refresh_data() implementieren")
+
+    # === CHANGE FEED ===
+
+    def watch_tables(self, *tables):
+        """
+        Reload the page data (refresh_data) only when one of the tables changed in the DB,
+        instead of on every tab switch. Changes are reported by the change listener (LISTEN/NOTIFY).
+
+        Args:
+            tables: names of the tables the page shows data of
+        """
+        self._watched_tables = set(tables)
+        self._dirty = True
+        get_change_listener().table_changed.connect(self._on_table_changed)
+
+    def _on_table_changed(self, table):
+        """mark the page as outdated, a visible page is refreshed right away"""
+        if table not in self._watched_tables:
+            return
+        self._dirty = True
+        if self.isVisible():
+            self.refresh_if_dirty()
+
+    def refresh_if_dirty(self):
+        """refresh the page if a watched table changed (always, if the change feed is not available)"""
+        if self._dirty or not get_change_listener().is_listening():
+            self._dirty = False
+            self.refresh_data()
+
+    def refresh_after_change(self):
+        """after an own change: the notification refreshes the page, without change feed it is refreshed now"""
+        if not get_change_listener().is_listening():
+            self.refresh_data()
+
+    # === CANCELLATION ===
+
+    def submit_read(self, worker):
+        """
+        Submit a worker which only reads data for this page. It is cancelled when the user leaves the page,
+        a running statement is cancelled on the server. Writes must be submitted to the executor directly.
+
+        Returns:
+            the worker
+        """
+        self._read_token.add(worker)
+        return get_executor().submit(worker)
+
+    def hideEvent(self, event):
+        """leaving the page: cancel its reads, the page loads them again when it is shown"""
+        super().hideEvent(event)
+        if self._read_token.cancel() and hasattr(self, "_watched_tables"):
+            self._dirty = True
+        self._read_token = CancellationToken()
+
     # === SHARED PAGE DESIGN SETUP METHODS ===
 
     def create_header(self, title):
@@ -187,120 +269,167 @@ class BasePage(QWidget):
 
     # === SHARED DATABASE LOADING METHODS  ===
 
-    def make_combobox_searchable(self, combobox: QComboBox):
+    def make_combobox_searchable(self, combobox: QComboBox, table=None):
         """
         Makes a ComboBox searchable with autocomplete
         
         Args:
             combobox: The QComboBox to make searchable
+            table: "student" or "exam" -> the database is searched while typing (see type_ahead.py),
+                   None -> the items of the combobox are filtered
         """
         from PySide6.QtWidgets import QCompleter
         
         combobox.setEditable(True)
         combobox.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
-        
-        completer = QCompleter(combobox.model())
-        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        combobox.setCompleter(completer)
 
+        if table is not None:
+            if not hasattr(self, '_type_ahead_searches'):
+                self._type_ahead_searches = {} # combobox -> TypeAheadSearch
+            search = TypeAheadSearch(combobox, table)
+            search.search_failed.connect(lambda msg: self.status_message.emit(msg, ERR_MSG_TIME))
+            self._type_ahead_searches[combobox] = search
+        else:
+            completer = QCompleter(combobox.model())
+            completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+            completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+            completer.setFilterMode(Qt.MatchFlag.MatchContains)
+            combobox.setCompleter(completer)
+
+        combobox.lineEdit().textEdited.connect(lambda text, cb=combobox: self._on_search_text_edited(cb, text))
+
+    def _on_search_text_edited(self, combobox: QComboBox, text):
+        """cleared -> nothing selected"""
+        if not text:
+            combobox.setCurrentIndex(-1)
 
     def load_students_into_dropdown(self, combobox: QComboBox, placeholder: str = "-- Select student --"):
         """
-        Load students from database into a combobox
+        Bind a combobox to the shared student model and sync the entity cache with the database
 
         Args:
             combobox: The QComboBox to populate
-            placeholder: Item default at [0]
+            placeholder: text shown while no student is selected
         """
-        query = """SELECT matriculation_number, first_name, last_name 
-                   FROM student ORDER BY matriculation_number DESC"""
-        
-        student_worker = DatabaseWorker(query, fetch = True)
-
-        # save current params via lambda 
-        student_worker.data_fetched.connect(
-            lambda success, rows, error_msg, cb = combobox, ph = placeholder: self._on_students_loaded(success, rows, error_msg, cb, ph))
-        
-        if not hasattr(self, '_active_workers'):
-            self._active_workers = []
-        self._active_workers.append(student_worker)
-
-        # cleanup threads after worker has finished 
-        student_worker.operation_finished.connect(lambda: self._cleanup_worker(student_worker))
-        student_worker.start()
-
-    def _on_students_loaded(self, success, rows, error_msg, combobox, placeholder):
-        """
-        Callback when students are loaded by the worker
-        Args:   
-            success: bool if loading succeeded 
-            rows: list of data 
-            error_msg: error msg to display as status_message
-        """
-        if not success: 
-            self.status_message.emit(f"Error loading students: {error_msg}", ERR_MSG_TIME)
-            return
-
-        # add PLaceholder to the dropdown menu
-        combobox.clear()
-        combobox.addItem(placeholder, None)
-
-        # add every other item from the db to the dropdown menu
-        for row in rows: 
-            matriculation_number, first_name, last_name = row
-            display_text = f"{last_name}, {first_name} ({matriculation_number})"
-            combobox.addItem(display_text, matriculation_number)
+        self._bind_entity_model(combobox, "student", placeholder)
 
     def load_exams_into_dropdown(self, combobox: QComboBox, placeholder: str = "-- Select exam --"):
         """
-        Load exams from database into a combobox.
+        Bind a combobox to the shared exam model and sync the entity cache with the database
         
         Args:
             combobox: The QComboBox to populate
-            placeholder: First item text (default: "-- Select exam --")
+            placeholder: text shown while no exam is selected (default: "-- Select exam --")
         """
 
-        query = "SELECT pnr, title, semester, exam_date FROM exam ORDER BY title"
+        self._bind_entity_model(combobox, "exam", placeholder)
 
-        exam_worker = DatabaseWorker(query, fetch = True)
-        exam_worker.data_fetched.connect(
-            lambda success, rows, error_msg, cb=combobox, ph=placeholder: self._on_exams_loaded(success, rows, error_msg, cb, ph))
-        
-        if not hasattr(self, '_active_workers'):
-            self._active_workers = []
-        self._active_workers.append(exam_worker)
-
-        exam_worker.operation_finished.connect(lambda: self._cleanup_worker(exam_worker))
-        exam_worker.start()
+    def _bind_entity_model(self, combobox: QComboBox, table, placeholder):
+        """
+        Every combobox of a table shows the same model (see entity_model.py), it is updated by the entity cache,
+        so the combobox only has to be bound once. Nothing selected = index -1, currentData() is None like for a placeholder item.
 
-    def _on_exams_loaded(self, success, rows, error_msg, combobox, placeholder):
+        Args:
+            combobox: The QComboBox to bind
+            table: "student" or "exam"
+            placeholder: text shown while nothing is selected
         """
-        Callback when exams are loaded
-        Args:   
-            success: boolean if loading succeeded 
-            rows: list of data 
-            error_msg: error msg to display as status_message
+        cache = get_entity_cache()
+        if not hasattr(self, '_entity_tables'):
+            self._entity_tables = set() # tables shown by this page, for error messages
+            cache.sync_failed.connect(self._on_cache_sync_failed)
+        self._entity_tables.add(table)
+
+        model = get_entity_model(table)
+        if combobox.model() is not model:
+            combobox.setModel(model)
+            # setModel hands the model to the completer as well, the type-ahead search has its own result model
+            search = getattr(self, '_type_ahead_searches', {}).get(combobox)
+            if search is not None:
+                search.restore_completer_model()
+            elif combobox.completer() is not None:
+                combobox.completer().setModel(None) # a completer would fetch every row of the paged model
+            combobox.setCurrentIndex(-1)
+        combobox.setPlaceholderText(placeholder)
+        if combobox.lineEdit() is not None:
+            combobox.lineEdit().setPlaceholderText(placeholder)
+
+        cache.sync(table)
+
+    def _on_cache_sync_failed(self, table, error_msg):
+        """show the error on the visible page"""
+        if self.isVisible() and table in self._entity_tables:
+            label = "students" if table == "student" else "exams"
+            self.status_message.emit(f"Error loading {label}: {error_msg}", ERR_MSG_TIME)
+
+    # === RAPID ENTRY ===
+
+    def setup_rapid_entry(self, layout, queue: WriteBehindQueue, restore):
         """
-        if not success:
-            self.status_message.emit(f"Error loading exams: {error_msg}", ERR_MSG_TIME)
-            return
-        
-        # add PLaceholder to the dropdown menu
-        combobox.clear()
-        combobox.addItem(placeholder, None)
-
-        # add every other item from the db to the dropdown menu
-        for row in rows:
-            pnr, title, semester, exam_date = row
-            display_text = f"{pnr} - {title} ({exam_date} | {semester})"
-            combobox.addItem(display_text, pnr)
+        Add the rapid-entry switch, the number of unsaved entries and the review list of rejected entries.
+        In rapid-entry mode save_data queues the entry (is_rapid_entry) and clears the form right away.
 
-    def _cleanup_worker(self, worker):
-        """Remove finished workers from the _active_worker list."""
-        if hasattr(self, '_active_workers') and worker in self._active_workers:
-            self._active_workers.remove(worker)
+        Args:
+            layout: layout of the form the widgets are added to
+            queue: write-behind queue of the page
+            restore: function(entry) which puts a rejected entry back into the form
+        """
+        self.write_queue = queue
+        self._restore_entry = restore
+
+        self.rapid_entry_checkbox = QCheckBox("Rapid entry: save in the background, the form is cleared right away")
+        self.pending_label = QLabel("")
+        rapid_layout = QHBoxLayout()
+        rapid_layout.addWidget(self.rapid_entry_checkbox, 1)
+        rapid_layout.addWidget(self.pending_label)
+        layout.addLayout(rapid_layout)
+
+        # rejected entries, double-click puts an entry back into the form
+        self.review_label = QLabel("Rejected entries (double-click to correct and save again):")
+        self.review_list = QListWidget()
+        self.review_list.setMaximumHeight(120)
+        self.review_list.itemDoubleClicked.connect(self._on_review_item_activated)
+        self.review_label.setVisible(False)
+        self.review_list.setVisible(False)
+        layout.addWidget(self.review_label)
+        layout.addWidget(self.review_list)
+
+        queue.pending_changed.connect(self._on_pending_changed)
+        queue.flushed.connect(self._on_rapid_entries_written)
+        queue.flush_failed.connect(lambda msg: self.status_message.emit(f"Error saving queued entries, retrying: {msg}", ERR_MSG_TIME))
+
+    def is_rapid_entry(self):
+        return self.rapid_entry_checkbox.isChecked()
+
+    def _on_pending_changed(self, count):
+        self.pending_label.setText(f"{count} unsaved" if count else "")
+
+    def _on_rapid_entries_written(self, written, rejected):
+        """
+        Callback of the write-behind queue
+        Args:
+            written: number of saved entries
+            rejected: list of (entry, reason) the DB did not accept
+        """
+        for entry, reason in rejected:
+            item = QListWidgetItem(f"{entry['text']}: {reason}")
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            self.review_list.addItem(item)
+        self.review_label.setVisible(self.review_list.count() > 0)
+        self.review_list.setVisible(self.review_list.count() > 0)
+
+        if rejected:
+            self.status_message.emit(f"{len(rejected)} entries were rejected, please check the review list", ERR_MSG_TIME)
+        if written:
+            self.refresh_after_change()
+
+    def _on_review_item_activated(self, item):
+        """put the rejected entry back into the form"""
+        entry = item.data(Qt.ItemDataRole.UserRole)
+        self.review_list.takeItem(self.review_list.row(item))
+        self.review_label.setVisible(self.review_list.count() > 0)
+        self.review_list.setVisible(self.review_list.count() > 0)
+        self._restore_entry(entry)
 
     def delete_record(self, table: str, id_column: str, id_value, callback=None, id_column2:str =None, id_value2=None):
         """
@@ -313,33 +442,27 @@ class BasePage(QWidget):
             callback: Optional callback function(success, message)
             id_column2: Second column name for grade table (pnr)
             id_value2: Second value (only for grade table)
+
+        The statements are fixed per table (see repository.DELETE_STATEMENTS), no SQL is built from the arguments.
         """
         if id_value is None:
             self.status_message.emit("Please select an item to delete", MSG_TIME)
             return
 
+        if table not in DELETE_STATEMENTS:
+            self.status_message.emit(f"Error: could not delete from table {table}.", ERR_MSG_TIME)
+            return
+
         if table == "grade": 
             # needs 2 informations: which student (mat. number) and which exam (pnr)
-            query = f"DELETE FROM {table} WHERE {id_column} = %s and {id_column2} = %s"
             params = (id_value, id_value2)
-
-        elif table == "exam":
-            query = f"DELETE FROM {table} WHERE {id_column} = %s"
-            params = (id_value,)
-        
-        elif table == "student":
-            query = f"DELETE FROM {table} WHERE {id_column} = %s"
-            params = (id_value,)
-
         else:
-            self.status_message.emit(f"Error: could not delete from table {table}.")
-            return
-
+            params = (id_value,)
 
         self._delete_callback = callback
-        self.delete_worker = DatabaseWorker(query, params)
+        self.delete_worker = DatabaseWorker(statement=DELETE_STATEMENTS[table], params=params)
         self.delete_worker.operation_finished.connect(self._on_delete_finished)
-        self.delete_worker.start()
+        get_executor().submit(self.delete_worker)
         
     def _on_delete_finished(self, success, message, rows_affected):
         """
@@ -442,6 +565,7 @@ class HomePage(BasePage):
         self.r_script_layout = QHBoxLayout()
         self.r_script_layout.addWidget(self.r_path_label)
         self.r_script_layout.addWidget(self.r_path_input)
+        self.shiny_prestart_input = QCheckBox("Start the dashboard in the background when the application starts")
         self.save_script_btn = QPushButton("Save script path")
         self.save_script_btn.clicked.connect(self.save_script_path)
 
@@ -468,6 +592,7 @@ class HomePage(BasePage):
         self.content_layout.addWidget(self.create_separator())
         self.content_layout.addWidget(r_path_section_label)
         self.content_layout.addLayout(self.r_script_layout)
+        self.content_layout.addWidget(self.shiny_prestart_input)
         self.content_layout.addWidget(self.save_script_btn)
 
 
@@ -503,6 +628,50 @@ class HomePage(BasePage):
         self.study_program_layout.addWidget(self.add_study_program_btn)
         self.content_layout.addLayout(self.semester_layout)
         self.content_layout.addLayout(self.study_program_layout)
+
+        # === CSV Import Section ===
+        import_section_label = self.create_section_label("Import students, exams & grades from CSV")
+        self.content_layout.addWidget(import_section_label)
+        self.import_kind_input = QComboBox()
+        self.import_kind_input.addItem("Students", "students")
+        self.import_kind_input.addItem("Exams", "exams")
+        self.import_kind_input.addItem("Grades", "grades")
+        self.import_update_input = QCheckBox("Update existing records")
+        self.import_btn = QPushButton("Choose CSV file & import")
+        self.import_btn.clicked.connect(self.import_csv_btn_clicked)
+        self.import_layout = QHBoxLayout()
+        self.import_layout.addWidget(self.import_kind_input)
+        self.import_layout.addWidget(self.import_update_input)
+        self.import_layout.addWidget(self.import_btn)
+        self.content_layout.addLayout(self.import_layout)
+
+        # === Performance Section ===
+        performance_section_label = self.create_section_label("Performance")
+        self.content_layout.addWidget(performance_section_label)
+        self.performance_btn = QPushButton("Show query latencies")
+        self.performance_btn.setStyleSheet("text-align: left; border: none; color: #0073B9;")
+        self.performance_btn.clicked.connect(self.toggle_performance_panel)
+        self.performance_table = QTableWidget(0, len(PERFORMANCE_COLUMNS))
+        self.performance_table.setHorizontalHeaderLabels([label for label, _ in PERFORMANCE_COLUMNS])
+        self.performance_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.performance_table.verticalHeader().setVisible(False)
+        self.performance_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.performance_table.setFixedHeight(180)
+        self.performance_table.setVisible(False)
+        self.reset_performance_btn = QPushButton("Reset")
+        self.reset_performance_btn.clicked.connect(self.reset_performance_metrics)
+        self.reset_performance_btn.setVisible(False)
+        self.performance_layout = QHBoxLayout()
+        self.performance_layout.addWidget(self.performance_btn)
+        self.performance_layout.addStretch()
+        self.performance_layout.addWidget(self.reset_performance_btn)
+        self.content_layout.addLayout(self.performance_layout)
+        self.content_layout.addWidget(self.performance_table)
+
+        # refreshes the panel while it is shown
+        self.performance_timer = QTimer(self)
+        self.performance_timer.setInterval(PERFORMANCE_REFRESH_INTERVAL)
+        self.performance_timer.timeout.connect(self.refresh_performance_panel)
         self.content_layout.addStretch()
         
     # === DATABASE CONNECTION === 
@@ -516,6 +685,7 @@ class HomePage(BasePage):
             self.username_input.setText(config.get("username", ""))
             self.password_input.setText(config.get("password", ""))
             self.r_path_input.setText(config.get("rscript_path", ""))
+            self.shiny_prestart_input.setChecked(bool(config.get("shiny_prestart", False)))
         else:
             self.status_message.emit(f"Error loading config: {error_msg}", ERR_MSG_TIME)
 
@@ -544,15 +714,44 @@ class HomePage(BasePage):
             "database": self.database_input.text() or "db_exam_management"
         }
 
+        # keep settings which are not part of this form (e.g. pool size)
+        success, old_config, _ = load_login_config()
+        if success:
+            for key, value in old_config.items():
+                config.setdefault(key, value)
+
         try:
-            with open(login_config_path(), 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            config_store.write(login_config_path(), config)
             self.status_message.emit("Database configuration saved successfully!", MSG_TIME)
         except Exception as e:
             self.status_message.emit(f"Error saving config: {e}", ERR_MSG_TIME)
 
-        # create db if it doesnt exist yet
-        prepare_database()
+        # pooled connections still use the old credentials
+        close_pool()
+
+        # create db if it doesnt exist yet (always checked, the settings may point to a new database), in the background
+        self.save_config_btn.setEnabled(False)
+        self.schema_worker = SchemaWorker(force=True)
+        self.schema_worker.finished.connect(self.on_schema_prepared)
+        get_executor().submit(self.schema_worker)
+
+    def on_schema_prepared(self, success, message):
+        """
+        Callback of the schema check after the connection was saved
+        Args:
+            success: False if the server was not reachable or the schema could not be created/upgraded
+            message: SCHEMA_VERIFIED or SCHEMA_CREATED, the error otherwise
+        """
+        self.schema_worker = None
+        self.save_config_btn.setEnabled(True)
+        if not success:
+            self.status_message.emit(f"Database could not be prepared: {message}", ERR_MSG_TIME)
+
+        # listen on the (possibly new) database, the pages reload from it
+        listener = get_change_listener()
+        listener.restart()
+        if success:
+            listener.announce_all()
 
     def test_connection(self):
         """Tests the database connection with current settings"""
@@ -593,12 +792,12 @@ class HomePage(BasePage):
             self.status_message.emit(f"Error loading config: {error_msg}", ERR_MSG_TIME)
             return
         
-        # Add/update rscript_path
+        # Add/update rscript_path and the prestart option (used at the next start, see shiny_service.py)
         config["rscript_path"] = script_path
+        config["shiny_prestart"] = self.shiny_prestart_input.isChecked()
         
         try:
-            with open(login_config_path(), 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            config_store.write(login_config_path(), config)
             self.status_message.emit("R-Script path saved successfully!", MSG_TIME)
         except Exception as e:
             self.status_message.emit(f"Error saving R-Script path: {e}", ERR_MSG_TIME)
@@ -606,6 +805,80 @@ class HomePage(BasePage):
 
 
 
+    # === PERFORMANCE PANEL ===
+    def toggle_performance_panel(self):
+        """show/hide the latency table, it is only refreshed while it is shown"""
+        visible = not self.performance_table.isVisible()
+        self.performance_table.setVisible(visible)
+        self.reset_performance_btn.setVisible(visible)
+        self.performance_btn.setText("Hide query latencies" if visible else "Show query latencies")
+        if visible:
+            self.refresh_performance_panel()
+            self.performance_timer.start()
+        else:
+            self.performance_timer.stop()
+
+    def refresh_performance_panel(self):
+        """fill the latency table with the rolling percentiles of every query type (see query_metrics.py)"""
+        if not self.isVisible():
+            return
+        summary = metrics.summary()
+        self.performance_table.setRowCount(len(summary))
+        for row, name in enumerate(sorted(summary)):
+            entry = summary[name]
+            values = [name, str(entry["calls"]), str(entry["errors"])]
+            for _, (phase, p) in PERFORMANCE_COLUMNS[3:]:
+                values.append(f"{entry[phase][p]:.1f}")
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.performance_table.setItem(row, column, item)
+
+    def reset_performance_metrics(self):
+        metrics.reset()
+        self.refresh_performance_panel()
+        self.status_message.emit("Query latencies reset", MSG_TIME)
+
+    # === CSV IMPORT ===
+    def import_csv_btn_clicked(self):
+        """ask for a CSV file and import it in the background"""
+        kind = self.import_kind_input.currentData()
+        path, _ = QFileDialog.getOpenFileName(self, f"Import {kind} from CSV", self.base_path, "CSV files (*.csv);;All files (*)")
+        if not path:
+            return
+
+        self.import_btn.setEnabled(False)
+        self.import_worker = ImportWorker(kind, path, self.import_update_input.isChecked())
+        self.import_worker.progress.connect(self._on_import_progress)
+        self.import_worker.operation_finished.connect(self._on_import_finished)
+        get_executor().submit(self.import_worker)
+        self.status_message.emit(f"Importing {kind} from {os.path.basename(path)} ...", MSG_TIME)
+
+    def _on_import_progress(self, rows_read, rows_per_second):
+        """show the import progress in the status bar"""
+        self.status_message.emit(f"Import: {rows_read} rows read ({rows_per_second:.0f} rows/s)", ERR_MSG_TIME)
+
+    def _on_import_finished(self, success, message, rows_affected):
+        """
+        Callback when the import worker finished
+        Args:
+            success: bool if the import succeeded
+            message: str message from worker/db
+            rows_affected: int number of merged records
+        """
+        self.import_btn.setEnabled(True)
+        if not success:
+            self.status_message.emit(f"Import failed, nothing was imported: {message}", ERR_MSG_TIME)
+            return
+
+        summary = self.import_worker.summary
+        text = format_import_summary(summary)
+        if summary["errors"]:
+            line_no, reason = summary["errors"][0]
+            text += f" - first rejected row: line {line_no}: {reason}"
+        self.status_message.emit(text, IMPORT_MSG_TIME)
+
     # === DROPDOWN JSON MENUS ===
     def add_semester_btn_clicked(self):
         """  connection between append_dropdown_options and the add semester button"""
@@ -693,13 +966,24 @@ class HomePage(BasePage):
         """Saves appended dropdown_options.json file"""
         config_path = dropdown_options_path()
         try:
-            with open(config_path, 'w', encoding='utf-8') as file:
-                json.dump(data, file, indent=4, ensure_ascii=False)
-                return True
+            config_store.write(config_path, data)
+            return True
         except Exception as e:
                 self.status_message.emit(f"Error while saving Data to the list: {e}", ERR_MSG_TIME)
                 return False
 
+SHEET_GRADE_COLUMN = 2
+
+
+class GradeItemDelegate(QStyledItemDelegate):
+    """ table delegate which restricts the grade cells to grades like the single entry form"""
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setValidator(QDoubleValidator(validation.MIN_GRADE, validation.MAX_GRADE, 1, editor))
+        return editor
+
+
 class GradePage(BasePage):
     """
     GradePage -  Add grades for Students and exams or delete them
@@ -708,11 +992,16 @@ class GradePage(BasePage):
     def __init__(self):
         super().__init__("Grade Entry")
         self.setup_ui()
-        self.reload_dropdowns() 
+        self.watch_tables("student", "exam")
+        self.refresh_if_dirty()
     
     def showEvent(self, event):
         """Gets called when switching to this tab/page"""
         super().showEvent(event)
+        self.refresh_if_dirty()
+
+    def refresh_data(self):
+        """students or exams changed"""
         self.reload_dropdowns()
 
     def reload_dropdowns(self): 
@@ -721,28 +1010,56 @@ class GradePage(BasePage):
         self.load_exams_into_dropdown(self.exam_input)
         self.load_students_into_dropdown(self.delete_grade_student_input)
         self.load_exams_into_dropdown(self.delete_grade_exam_input)
+        self.load_exams_into_dropdown(self.sheet_exam_input)
 
     def setup_ui(self):
-        # === Create Section ===
-        creation_section_label = self.create_section_label("Create grades for students")
-        self.content_layout.addWidget(creation_section_label)
-        form_layout = QFormLayout()
-        
         # info label
         label_info = "To grade a student, please select a student, an exam and enter a grade. " \
         "\nClick Save to save it to the database. Every student can only have one grade for one exam. " \
         "\nGrades range from 1.0 to 6.0. If you want to delete a grade, please select student and exam " \
         "in the delete menu below and click delete. Refresh the page by clicking onto another page & return."\
-        "\nIf the dropdown menus are too small, restart the GUI"
+        "\nIf the dropdown menus are too small, restart the GUI"\
+        "\nTo grade a whole exam at once, switch to 'Grade sheet', select the exam and click Load. "\
+        "Enter or change the grades in the table and click 'Save changed grades'. Clearing a cell deletes the grade."
         self.create_info_label(label_info)
 
+        # === Mode Switch ===
+        self.single_mode_btn = QPushButton("Single entry")
+        self.sheet_mode_btn = QPushButton("Grade sheet")
+        self.mode_btn_group = QButtonGroup(self)
+        for index, btn in enumerate((self.single_mode_btn, self.sheet_mode_btn)):
+            btn.setCheckable(True)
+            self.mode_btn_group.addButton(btn, index)
+        self.single_mode_btn.setChecked(True)
+        self.mode_btn_group.idClicked.connect(self.switch_mode)
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(self.single_mode_btn)
+        mode_layout.addWidget(self.sheet_mode_btn)
+        self.content_layout.addLayout(mode_layout)
+
+        self.mode_stack = QStackedWidget()
+        self.mode_stack.addWidget(self.setup_single_entry_ui())
+        self.mode_stack.addWidget(self.setup_grade_sheet_ui())
+        self.content_layout.addWidget(self.mode_stack, 1)
+
+    def setup_single_entry_ui(self):
+        """create the widget with the single grade entry and the delete section"""
+        single_widget = QWidget()
+        single_layout = QVBoxLayout(single_widget)
+        single_layout.setContentsMargins(0, 0, 0, 0)
+
+        # === Create Section ===
+        creation_section_label = self.create_section_label("Create grades for students")
+        single_layout.addWidget(creation_section_label)
+        form_layout = QFormLayout()
+
         # input forms
         self.student_label = QLabel("Student:")
         self.student_input = QComboBox()
-        self.make_combobox_searchable(self.student_input)
+        self.make_combobox_searchable(self.student_input, "student")
         self.exam_label = QLabel("Exam:")
         self.exam_input = QComboBox()
-        self.make_combobox_searchable(self.exam_input)
+        self.make_combobox_searchable(self.exam_input, "exam")
         self.grad_label=QLabel("Grade:")
         self.grade_input = QLineEdit()
         self.grade_input.setPlaceholderText("e.g. 1.3")
@@ -755,30 +1072,237 @@ class GradePage(BasePage):
         form_layout.addRow("Student:", self.student_input)
         form_layout.addRow("Exam", self.exam_input)
         form_layout.addRow("Grade:", self.grade_input)     
-        self.content_layout.addLayout(form_layout)
-        self.content_layout.addWidget(save_btn)
+        single_layout.addLayout(form_layout)
+        single_layout.addWidget(save_btn)
+        # Enter in the grade field saves, so a whole exam can be entered with the keyboard
+        self.grade_input.returnPressed.connect(self.save_data)
+        self.setup_rapid_entry(single_layout, WriteBehindQueue("insert_grades", "(%s, %s, %s, CURRENT_DATE)"), self.restore_grade_entry)
     
         # === Delete Section ===
         # labels and input forms
         deletion_section_label = self.create_section_label("Delete grades for students")
-        self.content_layout.addWidget(deletion_section_label)
+        single_layout.addWidget(deletion_section_label)
         self.delete_grade_student_label = QLabel("Select student to delete their grade:")
         self.delete_grade_student_input = QComboBox()
-        self.make_combobox_searchable(self.delete_grade_student_input)
+        self.make_combobox_searchable(self.delete_grade_student_input, "student")
         self.delete_grade_exam_label = QLabel("Select exam to delete the grade:")
         self.delete_grade_exam_input = QComboBox()
-        self.make_combobox_searchable(self.delete_grade_exam_input)
+        self.make_combobox_searchable(self.delete_grade_exam_input, "exam")
         self.delete_btn = QPushButton("Delete")
         self.delete_btn.clicked.connect(self.delete_grade)
 
         #layout
-        self.content_layout.addWidget(self.create_separator())
-        self.content_layout.addWidget(self.delete_grade_student_label)
-        self.content_layout.addWidget(self.delete_grade_student_input)
-        self.content_layout.addWidget(self.delete_grade_exam_label)
-        self.content_layout.addWidget(self.delete_grade_exam_input)
-        self.content_layout.addWidget(self.delete_btn)
-        self.content_layout.addStretch()  
+        single_layout.addWidget(self.create_separator())
+        single_layout.addWidget(self.delete_grade_student_label)
+        single_layout.addWidget(self.delete_grade_student_input)
+        single_layout.addWidget(self.delete_grade_exam_label)
+        single_layout.addWidget(self.delete_grade_exam_input)
+        single_layout.addWidget(self.delete_btn)
+        single_layout.addStretch()
+        return single_widget
+
+    def setup_grade_sheet_ui(self):
+        """create the widget for the grade-sheet mode (all students of one exam in an editable table)"""
+        sheet_widget = QWidget()
+        sheet_layout = QVBoxLayout(sheet_widget)
+        sheet_layout.setContentsMargins(0, 0, 0, 0)
+
+        sheet_section_label = self.create_section_label("Grade sheet for one exam")
+        sheet_layout.addWidget(sheet_section_label)
+
+        # exam selection
+        self.sheet_exam_input = QComboBox()
+        self.make_combobox_searchable(self.sheet_exam_input, "exam")
+        self.load_sheet_btn = QPushButton("Load")
+        self.load_sheet_btn.clicked.connect(self.load_grade_sheet)
+        exam_layout = QHBoxLayout()
+        exam_layout.addWidget(self.sheet_exam_input, 1)
+        exam_layout.addWidget(self.load_sheet_btn)
+        sheet_layout.addLayout(exam_layout)
+
+        # table: one row per student, only the grade column is editable
+        self.sheet_table = QTableWidget(0, 3)
+        self.sheet_table.setHorizontalHeaderLabels(["Matriculation Number", "Name", "Grade"])
+        self.sheet_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.sheet_table.verticalHeader().setVisible(False)
+        self.sheet_table.setItemDelegateForColumn(SHEET_GRADE_COLUMN, GradeItemDelegate(self.sheet_table))
+        self.sheet_table.itemChanged.connect(self._on_sheet_item_changed)
+        sheet_layout.addWidget(self.sheet_table, 1)
+
+        # save
+        self.sheet_changes_label = QLabel("No changes")
+        self.save_sheet_btn = QPushButton("Save changed grades")
+        self.save_sheet_btn.clicked.connect(self.save_grade_sheet)
+        self.save_sheet_btn.setEnabled(False)
+        save_layout = QHBoxLayout()
+        save_layout.addWidget(self.sheet_changes_label, 1)
+        save_layout.addWidget(self.save_sheet_btn)
+        sheet_layout.addLayout(save_layout)
+
+        self.sheet_pnr = None # exam of the loaded sheet
+        self.sheet_original_grades = {} # matriculation number -> grade text when the sheet was loaded
+        return sheet_widget
+
+    def switch_mode(self, index):
+        """switch between single entry (0) and grade sheet (1)"""
+        self.mode_stack.setCurrentIndex(index)
+
+    # === GRADE SHEET ===
+    def load_grade_sheet(self):
+        """load every student together with their grade for the selected exam"""
+        pnr = self.sheet_exam_input.currentData()
+        if pnr is None:
+            self.status_message.emit("Please select an exam", MSG_TIME)
+            return
+
+        self.load_sheet_btn.setEnabled(False)
+        self.sheet_worker = DatabaseWorker(statement="select_grade_sheet", params=(pnr,), fetch=True)
+        self.sheet_worker.data_fetched.connect(
+            lambda success, rows, error_msg, loaded_pnr=pnr: self._on_grade_sheet_loaded(success, rows, error_msg, loaded_pnr))
+        self.submit_read(self.sheet_worker)
+
+    def _on_grade_sheet_loaded(self, success, rows, error_msg, pnr):
+        """
+        Callback when the grade sheet is loaded
+        Args:
+            success: bool if loading succeeded
+            rows: list of (matriculation_number, last_name, first_name, grade)
+            error_msg: error msg to display as status_message
+            pnr: exam of the loaded sheet
+        """
+        self.load_sheet_btn.setEnabled(True)
+        if not success and self.sheet_worker.is_cancelled():
+            return # the page was left, the sheet is loaded again with Load
+        if not success:
+            self.status_message.emit(f"Error loading grade sheet: {error_msg}", ERR_MSG_TIME)
+            return
+
+        self.sheet_pnr = pnr
+        self.sheet_original_grades = {}
+
+        # fill without triggering the change tracking
+        self.sheet_table.blockSignals(True)
+        self.sheet_table.setRowCount(len(rows))
+        for row_index, (matriculation_number, last_name, first_name, grade) in enumerate(rows):
+            grade_text = f"{grade:.1f}" if grade is not None else ""
+            self.sheet_original_grades[matriculation_number] = grade_text
+
+            matriculation_item = QTableWidgetItem(matriculation_number)
+            name_item = QTableWidgetItem(f"{last_name}, {first_name}")
+            for item in (matriculation_item, name_item):
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.sheet_table.setItem(row_index, 0, matriculation_item)
+            self.sheet_table.setItem(row_index, 1, name_item)
+            self.sheet_table.setItem(row_index, SHEET_GRADE_COLUMN, QTableWidgetItem(grade_text))
+        self.sheet_table.blockSignals(False)
+
+        self._update_sheet_changes()
+        self.status_message.emit(f"Loaded {len(rows)} students for exam {self.sheet_exam_input.currentText()}", MSG_TIME)
+
+    def _on_sheet_item_changed(self, item):
+        """mark changed and invalid grade cells"""
+        if item.column() != SHEET_GRADE_COLUMN:
+            return
+        self._mark_sheet_item(item)
+        self._update_sheet_changes()
+
+    def _mark_sheet_item(self, item):
+        """color a grade cell depending on whether it is unchanged, changed or invalid"""
+        matriculation_number = self.sheet_table.item(item.row(), 0).text()
+        text = item.text().strip()
+
+        self.sheet_table.blockSignals(True)
+        if text and parse_grade(text) is None:
+            item.setBackground(QColor("#f8d7da")) # invalid
+        elif normalize_grade_text(text) != self.sheet_original_grades.get(matriculation_number, ""):
+            item.setBackground(QColor("#fff3cd")) # changed
+        else:
+            item.setBackground(QBrush())
+        self.sheet_table.blockSignals(False)
+
+    def sheet_changes(self):
+        """
+        collect the changed cells of the grade sheet
+
+        Returns:
+            Tuple of (upserts [(matriculation_number, grade)], deletes [matriculation_number], invalid [matriculation_number])
+        """
+        upserts, deletes, invalid = [], [], []
+        for row_index in range(self.sheet_table.rowCount()):
+            matriculation_number = self.sheet_table.item(row_index, 0).text()
+            text = self.sheet_table.item(row_index, SHEET_GRADE_COLUMN).text().strip()
+            if normalize_grade_text(text) == self.sheet_original_grades.get(matriculation_number, ""):
+                continue
+            if not text:
+                deletes.append(matriculation_number)
+                continue
+            grade = parse_grade(text)
+            if grade is None:
+                invalid.append(matriculation_number)
+            else:
+                upserts.append((matriculation_number, grade))
+        return upserts, deletes, invalid
+
+    def _update_sheet_changes(self):
+        """update the change counter and the save button"""
+        upserts, deletes, invalid = self.sheet_changes()
+        changed = len(upserts) + len(deletes) + len(invalid)
+        text = f"{changed} changed grade(s)" if changed else "No changes"
+        if invalid:
+            text += f", {len(invalid)} invalid (grades range from 1.0 to 6.0)"
+        self.sheet_changes_label.setText(text)
+        self.save_sheet_btn.setEnabled(changed > 0 and not invalid)
+
+    def save_grade_sheet(self):
+        """write all changed grades of the sheet in one transaction"""
+        if self.sheet_pnr is None:
+            self.status_message.emit("Please load a grade sheet first", MSG_TIME)
+            return
+
+        upserts, deletes, invalid = self.sheet_changes()
+        if invalid:
+            self.status_message.emit(f"Invalid grades for: {', '.join(invalid)}. Grades range from 1.0 to 6.0", ERR_MSG_TIME)
+            return
+        if not upserts and not deletes:
+            self.status_message.emit("No changed grades to save", MSG_TIME)
+            return
+
+        # insert new grades and update existing ones via the grade_unique_student_exam constraint
+        statements = [
+            ("upsert_grades", [(mat_no, self.sheet_pnr, grade) for mat_no, grade in upserts], "(%s, %s, %s, CURRENT_DATE)"),
+            ("delete_grades", [(mat_no, self.sheet_pnr) for mat_no in deletes], None),
+        ]
+
+        self.save_sheet_btn.setEnabled(False)
+        self.sheet_save_worker = BatchWorker(statements)
+        self.sheet_save_worker.operation_finished.connect(
+            lambda success, message, rows_affected, saved=(upserts, deletes): self._on_grade_sheet_saved(success, message, saved))
+        get_executor().submit(self.sheet_save_worker)
+
+    def _on_grade_sheet_saved(self, success, message, saved):
+        """
+        Callback for save_grade_sheet
+        Args:
+            success: bool success from the worker
+            message: str errormsg from the worker
+            saved: (upserts, deletes) that were sent to the DB
+        """
+        if not success:
+            self._update_sheet_changes()
+            self.status_message.emit(f"Error saving grade sheet, no grade was saved: {message}", ERR_MSG_TIME)
+            return
+
+        # the saved values are the new baseline of the sheet
+        upserts, deletes = saved
+        for matriculation_number, grade in upserts:
+            self.sheet_original_grades[matriculation_number] = f"{grade:.1f}"
+        for matriculation_number in deletes:
+            self.sheet_original_grades[matriculation_number] = ""
+        for row_index in range(self.sheet_table.rowCount()):
+            self._mark_sheet_item(self.sheet_table.item(row_index, SHEET_GRADE_COLUMN))
+        self._update_sheet_changes()
+
+        self.status_message.emit(f"Saved {len(upserts)} grade(s), deleted {len(deletes)} grade(s)", MSG_TIME)
 
     def delete_grade(self):
         """ delete grade for selected student and exam"""
@@ -803,10 +1327,10 @@ class GradePage(BasePage):
             rows_affected: int how many rows have been deleted/altered
         """
         if success and rows_affected > 0:
-            self.reload_dropdowns()
+            self.refresh_after_change()
             self.status_message.emit(f"grade for student with mat. no. {self.mat_no_del} for exam with pnr {self.exam_no_del} deleted successfully", MSG_TIME)
         elif success and rows_affected == 0:
-            self.reload_dropdowns()
+            self.refresh_after_change()
             self.status_message.emit("the selected student does not have a grade for the selected exam!", MSG_TIME)
             return
         else:
@@ -829,17 +1353,20 @@ class GradePage(BasePage):
         matriculation_number = self.student_input.currentData()
         pnr = self.exam_input.currentData()
 
-        query = """ INSERT INTO grade (matriculation_number, pnr, grade, grade_date) VALUES (%s, %s, %s, CURRENT_DATE)"""
         params = (
             matriculation_number,
             pnr, 
             float(self.grade_input.text().replace(',', '.'))
         )
 
+        if self.is_rapid_entry():
+            self.queue_grade(params)
+            return
+
         #start threading
-        self.db_worker = DatabaseWorker(query, params)
+        self.db_worker = DatabaseWorker(statement="insert_grade", params=params)
         self.db_worker.operation_finished.connect(self.on_save_finished)
-        self.db_worker.start()
+        get_executor().submit(self.db_worker)
 
         # emit data for Statusmsg / MainWindow
         self.data = {
@@ -869,6 +1396,27 @@ class GradePage(BasePage):
             else:
                 self.status_message.emit(f"Error: {message}", ERR_MSG_TIME)          
 
+    def queue_grade(self, params):
+        """rapid entry: queue the grade, keep the exam and continue with the next student"""
+        self.data = self.get_data()
+        self.write_queue.enqueue(params, {
+            "text": f"{self.data['student']} / {self.data['exam']}: {self.data['grade']}",
+            "student": params[0],
+            "exam": params[1],
+            "grade": self.grade_input.text()
+        })
+        self.data_changed.emit(self.data)
+        self.student_input.setCurrentIndex(-1)
+        self.grade_input.clear()
+        self.student_input.setFocus()
+
+    def restore_grade_entry(self, entry):
+        """put a rejected grade back into the form"""
+        self.student_input.setCurrentIndex(get_entity_model("student").row_for_key(entry["student"]))
+        self.exam_input.setCurrentIndex(get_entity_model("exam").row_for_key(entry["exam"]))
+        self.grade_input.setText(entry["grade"])
+        self.grade_input.setFocus()
+
     def get_data(self):
         """Return (unsaved) formulardata"""
         return {
@@ -879,8 +1427,8 @@ class GradePage(BasePage):
     
     def clear_form(self):
         """delete input after saving successfully"""
-        self.student_input.setCurrentIndex(0)
-        self.exam_input.setCurrentIndex(0)
+        self.student_input.setCurrentIndex(-1)
+        self.exam_input.setCurrentIndex(-1)
         self.grade_input.clear()
 
 class StudentPage(BasePage):
@@ -891,13 +1439,23 @@ class StudentPage(BasePage):
     def __init__(self):
         super().__init__("Student Entry")
         self.setup_ui()
-        self.reload_student_dropdown()
+        # new matriculation numbers come from blocks reserved on a sequence, so clerks never collide
+        self.id_allocator = get_id_allocator("student")
+        self.id_allocator.key_available.connect(self.fill_next_matriculation_number)
+        self.id_allocator.reserve_failed.connect(lambda msg: self.status_message.emit(msg, ERR_MSG_TIME))
+        self.watch_tables("student")
+        self.refresh_if_dirty()
 
     def showEvent(self, event):
-        """refresh when switching to this tab/page"""
+        """refresh when switching to this tab/page (only if students changed)"""
         super().showEvent(event)
+        self.refresh_if_dirty()
+
+    def refresh_data(self):
+        """students changed"""
         self.reload_student_dropdown()
         self.load_last_matriculation_number()
+        self.fill_next_matriculation_number()
 
     def reload_student_dropdown(self):
         """reload the delete dropdown-list from the db"""
@@ -945,10 +1503,10 @@ class StudentPage(BasePage):
         form_layout.addRow("Name:", name_layout)
         form_layout.addRow("Date of Birth:", self.birth_date_input)
         form_layout.addRow("Last entered matriculation number: ", self.last_matriculation_label)
-        self.load_last_matriculation_number()
         form_layout.addRow("Matriculation Number:", self.matriculation_no_input)      
         self.content_layout.addLayout(form_layout)
         self.content_layout.addWidget(save_btn)
+        self.setup_rapid_entry(self.content_layout, WriteBehindQueue("insert_students"), self.restore_student_entry)
 
 
         # === Delete Section ===
@@ -957,7 +1515,7 @@ class StudentPage(BasePage):
         self.content_layout.addWidget(deletion_section_label)
         self.delete_student_label = QLabel("Select student to delete:")
         self.delete_student_input = QComboBox()
-        self.make_combobox_searchable(self.delete_student_input)
+        self.make_combobox_searchable(self.delete_student_input, "student")
         self.delete_btn = QPushButton("Delete")
         self.delete_btn.clicked.connect(self.delete_student)
 
@@ -979,17 +1537,11 @@ class StudentPage(BasePage):
         Returns:
             Age in years
         """
-        today = QDate.currentDate()
-        age = today.year() - birth_date.year()
-
-        if (today.month(), today.year()) < (birth_date.month(), birth_date.year()):
-            age -=1
-        
-        return age
+        return validation.calculate_age(birth_date.toPython())
     
     def validate_age(self, birth_date: QDate):
         """
-        Validate that age is between 5 and 120 years
+        Validate that age is between 5 and 120 years (rules are shared with the CSV importer)
         
         Args:
             birth_date: QDate of birth
@@ -997,44 +1549,42 @@ class StudentPage(BasePage):
         Returns:
             Tuple of (is_valid, error_message)
         """
+        return validation.validate_age(birth_date.toPython())
 
-        age = self.calculate_age(birth_date)
-
-        if age < 5:
-            return False, f"Student must be at least 5 years old (calculated age: {age})"
-        if age > 120:
-            return False, f"Student age cannot exceed 120 years (calculated age: {age})"
-        else:
-            return True, ""        
+    def fill_next_matriculation_number(self, *args):
+        """put the next reserved matriculation number into the empty input"""
+        key = self.id_allocator.peek()
+        if key is not None and not self.matriculation_no_input.text().strip():
+            self.matriculation_no_input.setText(f"{key}")
 
     def load_last_matriculation_number(self):
-        """load the last entered matriculation number from the DB"""
-
-        query = "SELECT matriculation_number FROM student ORDER BY matriculation_number DESC LIMIT 1;"
+        """load the last entered matriculation number from the DB (only shown, new numbers come from the IdAllocator)"""
 
-        self.worker = DatabaseWorker(query, None, True)
-        self.worker.data_fetched.connect(self._on_last_matriculation_loaded)
-        self.worker.start()
+        if getattr(self, "worker", None) is not None:
+            self.worker.cancel() # superseded
+        self.worker = DatabaseWorker(statement="select_last_matriculation_number", fetch=True)
+        self.worker.data_fetched.connect(lambda success, rows, error_msg, w=self.worker: self._on_last_matriculation_loaded(success, rows, error_msg, w))
+        self.submit_read(self.worker)
 
-    def _on_last_matriculation_loaded(self, success, list, error_msg):
+    def _on_last_matriculation_loaded(self, success, list, error_msg, worker):
         """
         Callback for when the worker finished
         Args:
             success: bool if query succeeded
             list: list of tuples with data
             error_msg: str message from worker/db
+            worker: the finished worker
         """
+        if worker.is_cancelled():
+            return
         try:
             if success:
                 last_number = list[0][0]
                 last_number_int = int(last_number)
-                next_number = last_number_int+1
                 self.last_matriculation_label.setText(f"{last_number_int}")
-                self.matriculation_no_input.setText(f"{next_number}")
             else:
                 self.last_matriculation_label.setText(" - ")
                 self.status_message.emit(f"error loading last matriculation number {error_msg}", ERR_MSG_TIME)
-            self._cleanup_worker(self.worker)
         except:
             return
 
@@ -1058,8 +1608,7 @@ class StudentPage(BasePage):
             rows_affected: int how many rows have been deleted/altered (not needed for delete student)
         """
         if success:
-            self.reload_student_dropdown()
-            self.load_last_matriculation_number()
+            self.refresh_after_change()
             self.status_message.emit(f"student with mat. no {self.matriculation_number_del} deleted successfully", MSG_TIME)
         else:
             self.status_message.emit(f"{message}")
@@ -1090,10 +1639,6 @@ class StudentPage(BasePage):
         # trailing zeros for the DB
         matriculation_no_formatted = self.matriculation_no_input.text().zfill(10)
 
-        query = """
-            INSERT INTO student (first_name, last_name, date_of_birth, matriculation_number)
-            VALUES (%s, %s, %s, %s)
-        """
         params = (
             self.first_name_input.text(),
             self.last_name_input.text(),
@@ -1101,10 +1646,15 @@ class StudentPage(BasePage):
             matriculation_no_formatted
         )
         
+        if self.is_rapid_entry():
+            self.queue_student(params)
+            return
+
         # start worker (threading)
-        self.db_worker = DatabaseWorker(query, params)
+        self.saved_key = int(matriculation_no_formatted)
+        self.db_worker = DatabaseWorker(statement="insert_student", params=params)
         self.db_worker.operation_finished.connect(self.on_save_finished) 
-        self.db_worker.start()
+        get_executor().submit(self.db_worker)
         
     def on_save_finished(self, success, message):
         """
@@ -1117,12 +1667,43 @@ class StudentPage(BasePage):
             self.status_message.emit(message, MSG_TIME)
             self.data = self.get_data()
             self.data_changed.emit(self.data)
+            self.id_allocator.take(self.saved_key)
             self.clear_form()
-            self.reload_student_dropdown()
-            self.load_last_matriculation_number()
+            self.fill_next_matriculation_number()
+            self.refresh_after_change()
         else:
             self.status_message.emit(message, ERR_MSG_TIME)
+            if self.db_worker.error_code == errorcodes.UNIQUE_VIOLATION:
+                # number was typed in by hand somewhere else, offer the next reserved one
+                self.id_allocator.take(self.saved_key)
+                self.matriculation_no_input.clear()
+                self.fill_next_matriculation_number()
         
+    def queue_student(self, params):
+        """rapid entry: queue the student and continue with the next one"""
+        self.data = self.get_data()
+        self.write_queue.enqueue(params, {
+            "text": f"{params[0]} {params[1]} ({self.data['matriculation_no']})",
+            "first_name": params[0],
+            "last_name": params[1],
+            "birth_date": params[2],
+            "matriculation_no": self.data['matriculation_no']
+        })
+        self.data_changed.emit(self.data)
+        # the number is used, even if the row gets rejected it is shown in the review list
+        self.id_allocator.take(int(params[3]))
+        self.clear_form()
+        self.fill_next_matriculation_number()
+        self.first_name_input.setFocus()
+
+    def restore_student_entry(self, entry):
+        """put a rejected student back into the form"""
+        self.first_name_input.setText(entry["first_name"])
+        self.last_name_input.setText(entry["last_name"])
+        self.birth_date_input.setDate(QDate.fromString(entry["birth_date"], "yyyy-MM-dd"))
+        self.matriculation_no_input.setText(entry["matriculation_no"])
+        self.first_name_input.setFocus()
+
     def get_data(self):
         """return current data for status messages to the MainWindow"""
         return {
@@ -1148,14 +1729,25 @@ class ExamPage(BasePage):
     def __init__(self):
         super().__init__("Exam Entry")
         self.setup_ui()
+        # new PNrs come from blocks reserved on a sequence, so clerks never collide
+        self.id_allocator = get_id_allocator("exam")
+        self.id_allocator.key_available.connect(self.fill_next_pnr)
+        self.id_allocator.reserve_failed.connect(lambda msg: self.status_message.emit(msg, ERR_MSG_TIME))
         self.reload_json_dropdowns()
+        self.watch_tables("exam")
+        self.refresh_if_dirty()
 
     def showEvent(self, event):
-        """ refresh when switching to this tab/page"""
+        """ refresh when switching to this tab/page (exams only if they changed)"""
         super().showEvent(event)
         self.reload_json_dropdowns()
+        self.refresh_if_dirty()
+
+    def refresh_data(self):
+        """exams changed"""
         self.reload_exam_dropdown()
         self.load_last_pnr()
+        self.fill_next_pnr()
 
     def reload_json_dropdowns(self):
         """reloads dropdown options from the JSON-file"""
@@ -1220,7 +1812,6 @@ class ExamPage(BasePage):
 
         #layout
         form_layout.addRow("Last entered PNr:", self.last_pnr_label)
-        self.load_last_pnr()
         form_layout.addRow("PNr:", self.pnr_input)
         form_layout.addRow("Title:", self.exam_title_input)
         form_layout.addRow("Date:", self.exam_date_input)
@@ -1236,7 +1827,7 @@ class ExamPage(BasePage):
         # input
         self.delete_exam_label = QLabel("Select exam to delete:")
         self.delete_exam_input = QComboBox()
-        self.make_combobox_searchable(self.delete_exam_input)
+        self.make_combobox_searchable(self.delete_exam_input, "exam")
         self.delete_btn = QPushButton("Delete")
         self.delete_btn.clicked.connect(self.delete_exam)
 
@@ -1248,34 +1839,40 @@ class ExamPage(BasePage):
         self.content_layout.addStretch()
 
     # === PAGE SPECIFIC METHODS === 
+    def fill_next_pnr(self, *args):
+        """put the next reserved PNr into the empty input"""
+        key = self.id_allocator.peek()
+        if key is not None and not self.pnr_input.text().strip():
+            self.pnr_input.setText(f"{key}")
+
     def load_last_pnr(self):
-        """load last pnr from the DB"""
+        """load last pnr from the DB (only shown, new PNrs come from the IdAllocator)"""
 
-        query = "SELECT pnr FROM exam ORDER BY pnr DESC LIMIT 1;"
-    
-        self.worker = DatabaseWorker(query, None, True)
-        self.worker.data_fetched.connect(self._on_last_pnr_loaded)
-        self.worker.start()
+        if getattr(self, "worker", None) is not None:
+            self.worker.cancel() # superseded
+        self.worker = DatabaseWorker(statement="select_last_pnr", fetch=True)
+        self.worker.data_fetched.connect(lambda success, rows, error_msg, w=self.worker: self._on_last_pnr_loaded(success, rows, error_msg, w))
+        self.submit_read(self.worker)
 
-    def _on_last_pnr_loaded(self, success, list, error_msg):
+    def _on_last_pnr_loaded(self, success, list, error_msg, worker):
         """
         Callback for when the worker finished
         Args:
             success: bool if query succeeded
             list: list of tuples with data
             error_msg: str message from worker/db
+            worker: the finished worker
         """
+        if worker.is_cancelled():
+            return
         try:
             if success:
                 last_number = list[0][0]
                 last_number_int = int(last_number)
-                next_number = last_number_int+1
                 self.last_pnr_label.setText(f"{last_number_int}")
-                self.pnr_input.setText(f"{next_number}")
             else:
                 self.last_pnr_label.setText(" - ")
                 self.status_message.emit(f"error loading last pnr {error_msg}", ERR_MSG_TIME)
-            self._cleanup_worker(self.worker)
         except:
             return
 
@@ -1299,8 +1896,7 @@ class ExamPage(BasePage):
             rows_affected: int how many rows have been deleted/altered (not needed for delete exam)
         """
         if success:
-            self.reload_exam_dropdown()
-            self.load_last_pnr()
+            self.refresh_after_change()
             self.status_message.emit(f"exam with pnr {self.pnr_del} deleted successfully", MSG_TIME)
         else:
             self.status_message.emit(f"{message}")
@@ -1328,11 +1924,6 @@ class ExamPage(BasePage):
         # trailing zeros to organize DB
         pnr_formatted = self.pnr_input.text().zfill(10)
 
-        query = """
-            INSERT INTO exam (pnr, title, exam_date, semester, degree_program) 
-            VALUES (%s, %s, %s, %s, %s)
-        """
-
         params = (
             pnr_formatted,
             self.exam_title_input.text(),
@@ -1340,10 +1931,11 @@ class ExamPage(BasePage):
             self.semester_input.currentText(),
             self.study_program_input.currentText()
         )
-        # start Worker (Threading)
-        self.db_worker = DatabaseWorker(query, params)
+        # start Worker (Threading), PNrs may contain letters, those are never reserved keys
+        self.saved_key = int(pnr_formatted) if pnr_formatted.isascii() and pnr_formatted.isdigit() else None
+        self.db_worker = DatabaseWorker(statement="insert_exam", params=params)
         self.db_worker.operation_finished.connect(self.on_save_finished)
-        self.db_worker.start()
+        get_executor().submit(self.db_worker)
             
     def on_save_finished(self, success, message):
         """
@@ -1356,11 +1948,17 @@ class ExamPage(BasePage):
             self.status_message.emit(message, MSG_TIME)
             self.data = self.get_data()
             self.data_changed.emit(self.data)
+            self.id_allocator.take(self.saved_key)
             self.clear_form()
-            self.reload_exam_dropdown()
-            self.load_last_pnr()
+            self.fill_next_pnr()
+            self.refresh_after_change()
         else:
             self.status_message.emit(message, ERR_MSG_TIME)
+            if self.db_worker.error_code == errorcodes.UNIQUE_VIOLATION:
+                # PNr was typed in by hand somewhere else, offer the next reserved one
+                self.id_allocator.take(self.saved_key)
+                self.pnr_input.clear()
+                self.fill_next_pnr()
 
     def get_data(self):
         """return (unsaved) formulardata"""
@@ -1388,10 +1986,15 @@ class StatsPage(BasePage):
     # === STANDARD METHODS ===     
     def __init__(self):
         super().__init__("Statistics")
-        self.shiny_process = None
-        self.shiny_port = 8050
+        self.shiny = get_shiny_service()
+        self.shiny_port = self.shiny.port
+        self.dashboard_open = False
 
         self.setup_ui()
+        self.shiny.state_changed.connect(self._on_shiny_state_changed)
+        self.shiny.ready.connect(self.open_dashboard) # started here or in the background at launch
+        self._on_shiny_state_changed(self.shiny.state)
+        self.watch_tables("exam")
 
     def setup_ui(self):
         """ setup UI with start & stop buttons"""
@@ -1415,124 +2018,133 @@ class StatsPage(BasePage):
 
         self.stop_btn = QPushButton("Stop Dashboard") 
         self.stop_btn.clicked.connect(self.stop_shiny_app)
-        self.stop_btn.setEnabled(False)
 
         # layout
         btn_layout = QHBoxLayout()        
         btn_layout.addWidget(self.start_btn)
         btn_layout.addWidget(self.stop_btn)
         self.content_layout.addLayout(btn_layout)
+
+        # grade export with optional filters
+        self.export_semester_input = QComboBox()
+        self.export_study_program_input = QComboBox()
+        self.export_exam_input = QComboBox()
+        self.make_combobox_searchable(self.export_exam_input, "exam")
+        self.export_btn = QPushButton("Export grades (CSV)")
+        self.export_btn.clicked.connect(self.export_grades)
+        export_layout = QHBoxLayout()
+        export_layout.addWidget(self.export_semester_input)
+        export_layout.addWidget(self.export_study_program_input)
+        export_layout.addWidget(self.export_exam_input, 1)
+        export_layout.addWidget(self.export_btn)
+        self.content_layout.addLayout(export_layout)
         
-        # web view 
-        self.web_view = QWebEngineView()
-        self.content_layout.addWidget(self.web_view,1)
+        # web view, created when the dashboard is started (QtWebEngine starts a whole Chromium)
+        self.web_view = None
+        self.web_view_container = QWidget()
+        self.web_view_layout = QVBoxLayout(self.web_view_container)
+        self.web_view_layout.setContentsMargins(0, 0, 0, 0)
+        self.content_layout.addWidget(self.web_view_container,1)
+
+    def create_web_view(self):
+        """import QtWebEngine and create the web view on first use"""
+        if self.web_view is None:
+            from PySide6.QtWebEngineWidgets import QWebEngineView
+            self.web_view = QWebEngineView()
+            self.web_view_layout.addWidget(self.web_view)
+        return self.web_view
     
-    # === PAGE SPECIFIC METHODS === 
-    def start_shiny_app(self):
-        """Start the R Shiny Server in the background if it's not already running"""
+    def showEvent(self, event):
+        """refresh the export filters when switching to this tab/page, open a dashboard started at launch"""
+        super().showEvent(event)
+        self.reload_export_filters()
+        self.refresh_if_dirty()
+        if self.shiny.is_running() and not self.dashboard_open:
+            self.open_dashboard()
 
-        # Rscript path
-        success, config, msg = load_login_config()
-        if not success:
-            raise RuntimeError(msg)
+    def refresh_data(self):
+        """exams changed"""
+        self.load_exams_into_dropdown(self.export_exam_input, "-- All exams --")
 
-        self.rscript_path = config.get("rscript_path")
+    def reload_export_filters(self):
+        """reload semesters and study programs of the export filters"""
+        success, options, error_msg = load_dropdown_options()
+        if not success:
+            self.status_message.emit(f"Error: {error_msg}", ERR_MSG_TIME)
 
-        if self.shiny_process is not None:
-            return
+        self.export_semester_input.clear()
+        self.export_semester_input.addItem("-- All semesters --", None)
+        for semester in options.get("semesters", []):
+            self.export_semester_input.addItem(semester, semester)
 
-        shiny_dir = os.path.join(self.base_path, "shiny_dashboard")
-        shiny_script_path = os.path.join(shiny_dir, "app.R")
+        self.export_study_program_input.clear()
+        self.export_study_program_input.addItem("-- All study programs --", None)
+        for study_program in options.get("study_programs", []):
+            self.export_study_program_input.addItem(study_program, study_program)
 
-        if not os.path.exists(shiny_script_path):
-            self.status_message.emit(
-                f"Shiny app not found at: {shiny_script_path}", ERR_MSG_TIME
-            )
+    # === PAGE SPECIFIC METHODS === 
+    def export_grades(self):
+        """ask for a file name and export the filtered grades in the background"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export grades", os.path.join(self.base_path, "grades.csv"), "CSV files (*.csv)")
+        if not path:
             return
-        try:
-            # pass port to R via environment variable
-            env = os.environ.copy()
-            env["SHINY_PORT"] = str(self.shiny_port)
-
-            # start Shiny via app.R
-            self.shiny_process = subprocess.Popen(
-                [self.rscript_path, "app.R"],
-                cwd=shiny_dir,
-                env=env,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
-                start_new_session=True
-            )
-
-            # wait until Shiny is reachable
-            self._wait_for_shiny(self.shiny_port)
 
-            # open dashboard inside the application
-            self.web_view.setUrl(
-                QUrl(f"http://127.0.0.1:{self.shiny_port}")
-            )
+        self.export_btn.setEnabled(False)
+        self.export_worker = ExportWorker(
+            path,
+            semester=self.export_semester_input.currentData(),
+            degree_program=self.export_study_program_input.currentData(),
+            pnr=self.export_exam_input.currentData()
+        )
+        self.export_worker.operation_finished.connect(self._on_export_finished)
+        get_executor().submit(self.export_worker)
 
-            self.start_btn.setEnabled(False)
-            self.stop_btn.setEnabled(True)
-            self.status_message.emit(
-                "Shiny Dashboard started successfully!", MSG_TIME
-            )
+    def _on_export_finished(self, success, message, rows_affected):
+        """
+        Callback when the export worker finished
+        Args:
+            success: bool if the export succeeded
+            message: str message from worker/db
+            rows_affected: int number of exported grades
+        """
+        self.export_btn.setEnabled(True)
+        if success:
+            self.status_message.emit(format_export_summary(self.export_worker.summary), MSG_TIME)
+        else:
+            self.status_message.emit(f"Error exporting grades: {message}", ERR_MSG_TIME)
 
-        except Exception as e: 
-            self.status_message.emit(
-                f"Error starting Shiny: {e}", ERR_MSG_TIME
-            )
+    def start_shiny_app(self):
+        """Start the R Shiny Server in the background, the dashboard opens when it answers (see open_dashboard)"""
+        if self.shiny.is_running():
+            self.open_dashboard()
+            return
+        self.shiny.start()
+        if self.shiny.state == STARTING:
+            self.status_message.emit("Starting Shiny Dashboard ...", MSG_TIME)
 
     def stop_shiny_app(self):
-        """Stop the Shiny server in a cross-platform safe way"""
-        if self.shiny_process:
-            try:
-                # --- Windows ---
-                if os.name == "nt":
-                    self.shiny_process.terminate()
-                    self.shiny_process.wait(timeout=3)
-
-                # --- macOS / Linux ---
-                else:
-                    os.killpg(os.getpgid(self.shiny_process.pid), signal.SIGTERM)
-                    self.shiny_process.wait(timeout=3)
-
-            except subprocess.TimeoutExpired:
-                # --- Force kill if graceful shutdown fails ---
-                try:
-                    if os.name == "nt":
-                        self.shiny_process.kill()
-                    else:
-                        os.killpg(os.getpgid(self.shiny_process.pid), signal.SIGKILL)
-                except Exception:
-                    pass
-
-            except Exception:
-                pass
-
-            finally:
-                self.shiny_process = None
-
-        self.web_view.setUrl(QUrl("about:blank"))
-        self.start_btn.setEnabled(True)
-        self.stop_btn.setEnabled(False)
+        """Stop the Shiny server"""
+        self.shiny.stop()
         self.status_message.emit("Shiny Dashboard stopped", MSG_TIME)
 
-    def _wait_for_shiny(self, port, timeout=10):
-        """Wait until the Shiny server is reachable"""
-        start = time.time()
-        while time.time() - start < timeout:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                if s.connect_ex(("127.0.0.1", port)) == 0:
-                    return True
-            time.sleep(0.2)
-
-        # --- Timeout reached ---
-        self.status_message.emit(
-            "Shiny Dashboard did not start within the expected time.", ERR_MSG_TIME
-        )
-        return False
+    def open_dashboard(self):
+        """open the running dashboard inside the application"""
+        self.create_web_view().setUrl(QUrl(self.shiny.url()))
+        self.dashboard_open = True
+        self.status_message.emit("Shiny Dashboard started successfully!", MSG_TIME)
+
+    def _on_shiny_state_changed(self, state):
+        """
+        Callback of the ShinyService, the buttons follow the state of the dashboard
+        Args:
+            state: STOPPED, STARTING, RUNNING or FAILED (failures are shown by the MainWindow)
+        """
+        self.start_btn.setEnabled(state in (STOPPED, FAILED))
+        self.start_btn.setText("Starting Dashboard ..." if state == STARTING else "Start Dashboard")
+        self.stop_btn.setEnabled(state in (STARTING, RUNNING))
+        if state != RUNNING and self.dashboard_open:
+            self.dashboard_open = False
+            self.web_view.setUrl(QUrl("about:blank"))
 
     # === IMPLEMENTED BASE METHODS ===
     def save_data(self):
@@ -0,0 +1,81 @@
+"""Latency metrics of the database operations.
+
+Every DatabaseWorker measures its phases (waiting for a thread, waiting for a pooled connection,
+execute, fetch and delivery of the result signals to the GUI thread) and hands them over once it is
+done. The last WINDOW samples are kept per query type, so percentiles always describe the recent
+behaviour. Recording is one lock and one deque append per operation, percentiles are only computed
+when they are read (performance panel on the HomePage).
+"""
+
+import threading
+from collections import deque
+
+WINDOW = 512 # samples kept per query type
+
+# phases of one operation, "total" is their sum
+PHASES = ("queue", "connect", "execute", "fetch", "deliver")
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """nearest-rank percentile of an ascending list, None for an empty list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100)) # ceil without float rounding
+    return sorted_values[rank - 1]
+
+
+class QueryMetrics:
+    """ Rolling latency samples per query type (statement name or worker type)"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {} # name -> deque of (total, *phases) in seconds
+        self._counts = {} # name -> [calls, errors] since start
+
+    def record(self, name, phases, error=False):
+        """
+        Args:
+            name: query type
+            phases: dict phase -> seconds (missing phases count as 0)
+            error: True if the operation failed
+        """
+        sample = tuple(phases.get(phase, 0.0) for phase in PHASES)
+        sample = (sum(sample),) + sample
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._counts[name] = [0, 0]
+            samples.append(sample)
+            counts = self._counts[name]
+            counts[0] += 1
+            counts[1] += 1 if error else 0
+
+    def summary(self):
+        """
+        Returns:
+            dict query type -> {"calls", "errors", "samples", "total": {50: ms, 95: ms, 99: ms}, <phase>: {...}}
+        """
+        with self._lock:
+            snapshot = {name: (list(samples), tuple(self._counts[name])) for name, samples in self._samples.items()}
+
+        summary = {}
+        for name, (samples, (calls, errors)) in snapshot.items():
+            entry = {"calls": calls, "errors": errors, "samples": len(samples)}
+            for column, phase in enumerate(("total",) + PHASES):
+                values = sorted(sample[column] for sample in samples)
+                entry[phase] = {p: percentile(values, p) * 1000 for p in PERCENTILES}
+            summary[name] = entry
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+# application-wide metrics, filled by the DatabaseExecutor
+metrics = QueryMetrics()
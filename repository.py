@@ -0,0 +1,232 @@
+"""Repository of every SQL statement the GUI issues.
+
+The hot statements (inserts, deletes and the small lookups that run on every page switch) are
+prepared once per pooled connection with PREPARE and afterwards only executed by name, so the
+server does not parse and plan them again on every call. The repository also keeps call counts
+and execution times per statement.
+"""
+
+import re
+import threading
+import time
+import weakref
+
+import psycopg2
+import psycopg2.errors
+
+from Data_Base_Connection import ID_SEQUENCES, SEARCH_EXPRESSIONS
+
+STATEMENTS = {
+    # --- entity cache (streamed via server-side cursor, so they can not be prepared) ---
+    "select_students": """SELECT matriculation_number, first_name, last_name
+                          FROM student ORDER BY matriculation_number DESC""",
+    "select_students_changed": """SELECT matriculation_number, first_name, last_name
+                                  FROM student WHERE updated_txid >= %s""",
+    # same order as entity_cache.SORT_KEYS (title.casefold()) for ASCII titles, entity_model.py sorts other loads itself
+    "select_exams": 'SELECT pnr, title, semester, exam_date FROM exam ORDER BY lower(title) COLLATE "C"',
+    "select_exams_changed": "SELECT pnr, title, semester, exam_date FROM exam WHERE updated_txid >= %s",
+    "select_deleted_keys": "SELECT DISTINCT record_key FROM deleted_record WHERE table_name = %s AND deleted_txid >= %s",
+    # transactions below this id are finished, the next delta sync starts there
+    "select_snapshot_xmin": "SELECT txid_snapshot_xmin(txid_current_snapshot())",
+
+    # --- type-ahead search: (pattern for ILIKE, search text, search text, limit) ---
+    # exact matriculation number/PNr first, then by position of the match (prefix matches before matches inside)
+    "search_students": f"""SELECT matriculation_number, first_name, last_name
+                           FROM student
+                           WHERE {SEARCH_EXPRESSIONS['student']} ILIKE %s
+                           ORDER BY matriculation_number = %s DESC,
+                                    strpos(lower({SEARCH_EXPRESSIONS['student']}), lower(%s)),
+                                    last_name, first_name
+                           LIMIT %s""",
+    "search_exams": f"""SELECT pnr, title, semester, exam_date
+                        FROM exam
+                        WHERE {SEARCH_EXPRESSIONS['exam']} ILIKE %s
+                        ORDER BY pnr = %s DESC,
+                                 strpos(lower({SEARCH_EXPRESSIONS['exam']}), lower(%s)),
+                                 title
+                        LIMIT %s""",
+
+    # --- lookups ---
+    "select_last_matriculation_number": "SELECT matriculation_number FROM student ORDER BY matriculation_number DESC LIMIT 1",
+    "select_last_pnr": "SELECT pnr FROM exam ORDER BY pnr DESC LIMIT 1",
+    # a block of new keys in one round trip (see id_allocator.py)
+    "reserve_student_ids": f"SELECT nextval('public.{ID_SEQUENCES['student'][1]}') FROM generate_series(1, %s)",
+    "reserve_exam_ids": f"SELECT nextval('public.{ID_SEQUENCES['exam'][1]}') FROM generate_series(1, %s)",
+    "select_grade_sheet": """SELECT s.matriculation_number, s.last_name, s.first_name, g.grade
+                             FROM student s
+                             LEFT JOIN grade g ON g.matriculation_number = s.matriculation_number AND g.pnr = %s
+                             ORDER BY s.last_name, s.first_name, s.matriculation_number""",
+
+    # --- inserts ---
+    "insert_student": """INSERT INTO student (first_name, last_name, date_of_birth, matriculation_number)
+                         VALUES (%s, %s, %s, %s)""",
+    "insert_exam": """INSERT INTO exam (pnr, title, exam_date, semester, degree_program)
+                      VALUES (%s, %s, %s, %s, %s)""",
+    "insert_grade": """INSERT INTO grade (matriculation_number, pnr, grade, grade_date)
+                       VALUES (%s, %s, %s, CURRENT_DATE)""",
+
+    # --- deletes ---
+    "delete_student": "DELETE FROM student WHERE matriculation_number = %s",
+    "delete_exam": "DELETE FROM exam WHERE pnr = %s",
+    "delete_grade": "DELETE FROM grade WHERE matriculation_number = %s AND pnr = %s",
+
+    # --- grade sheet and rapid entry (multi-row statements for execute_values, VALUES %s is expanded by psycopg2) ---
+    "upsert_grades": """INSERT INTO grade (matriculation_number, pnr, grade, grade_date) VALUES %s
+                        ON CONFLICT (matriculation_number, pnr)
+                        DO UPDATE SET grade = EXCLUDED.grade, grade_date = EXCLUDED.grade_date""",
+    "insert_grades": "INSERT INTO grade (matriculation_number, pnr, grade, grade_date) VALUES %s",
+    "insert_students": "INSERT INTO student (first_name, last_name, date_of_birth, matriculation_number) VALUES %s",
+    "delete_grades": """DELETE FROM grade g USING (VALUES %s) AS d(matriculation_number, pnr)
+                        WHERE g.matriculation_number = d.matriculation_number AND g.pnr = d.pnr""",
+    "delete_students": """DELETE FROM student s USING (VALUES %s) AS d(matriculation_number)
+                          WHERE s.matriculation_number = d.matriculation_number""",
+    "delete_exams": "DELETE FROM exam e USING (VALUES %s) AS d(pnr) WHERE e.pnr = d.pnr",
+
+    # --- command line listings (streamed with COPY, see cli.py) ---
+    "list_students": "SELECT matriculation_number, first_name, last_name, date_of_birth FROM student ORDER BY matriculation_number",
+    "list_exams": "SELECT pnr, title, exam_date, semester, degree_program FROM exam ORDER BY pnr",
+}
+
+# statements which are executed often enough to be prepared on every connection
+PREPARED_STATEMENTS = {
+    "select_deleted_keys",
+    "search_students",
+    "search_exams",
+    "select_last_matriculation_number",
+    "select_last_pnr",
+    "select_grade_sheet",
+    "insert_student",
+    "insert_exam",
+    "insert_grade",
+    "delete_student",
+    "delete_exam",
+    "delete_grade",
+}
+
+# table -> delete statement, used by BasePage.delete_record
+DELETE_STATEMENTS = {
+    "student": "delete_student",
+    "exam": "delete_exam",
+    "grade": "delete_grade",
+}
+
+# table -> type-ahead search statement
+SEARCH_STATEMENTS = {
+    "student": "search_students",
+    "exam": "search_exams",
+}
+
+# table -> statement which reserves a block of new keys, used by the IdAllocator
+RESERVE_STATEMENTS = {
+    "student": "reserve_student_ids",
+    "exam": "reserve_exam_ids",
+}
+
+# table -> (full load, delta since a transaction id), used by the SyncWorker
+SYNC_STATEMENTS = {
+    "student": ("select_students", "select_students_changed"),
+    "exam": ("select_exams", "select_exams_changed"),
+}
+
+
+def _to_server_placeholders(query):
+    """convert psycopg2 placeholders (%s) into the numbered placeholders of PREPARE ($1, $2, ...)"""
+    counter = iter(range(1, query.count("%s") + 1))
+    return re.sub(r"%s", lambda match: f"${next(counter)}", query)
+
+
+class StatementRepository:
+    """ Owns the SQL statements, prepares the hot ones per connection and records timings"""
+
+    def __init__(self, statements=STATEMENTS, prepared=PREPARED_STATEMENTS):
+        self.statements = statements
+        self.prepared = prepared
+        self._lock = threading.Lock()
+        self._prepared_on = weakref.WeakKeyDictionary() # connection -> set of prepared statement names
+        self._stats = {} # name -> [calls, errors, total seconds, max seconds]
+
+    def sql(self, name):
+        """returns the SQL text of a statement"""
+        try:
+            return self.statements[name]
+        except KeyError:
+            raise KeyError(f"unknown statement '{name}'") from None
+
+    def _ensure_prepared(self, cursor, name):
+        """PREPARE the statement on the cursor's connection if that did not happen yet"""
+        conn = cursor.connection
+        with self._lock:
+            prepared = self._prepared_on.setdefault(conn, set())
+            if name in prepared:
+                return
+        query = _to_server_placeholders(self.sql(name))
+        cursor.execute(f"PREPARE {name} AS {query}")
+        with self._lock:
+            prepared.add(name)
+
+    def execute(self, cursor, name, params=None):
+        """
+        Execute a statement by name. Prepared statements are executed via EXECUTE,
+        all others (and every statement on a named/server-side cursor) as plain SQL.
+
+        Args:
+            cursor: psycopg2 cursor
+            name: key of STATEMENTS
+            params: params for the statement
+        """
+        started = time.perf_counter()
+        try:
+            if name in self.prepared and cursor.name is None:
+                self._ensure_prepared(cursor, name)
+                placeholders = ", ".join(["%s"] * len(params or ()))
+                try:
+                    cursor.execute(f"EXECUTE {name} ({placeholders})" if placeholders else f"EXECUTE {name}", params)
+                except psycopg2.errors.InvalidSqlStatementName:
+                    # the session lost the statement (e.g. DISCARD ALL), prepare it again next time
+                    self.forget(cursor.connection)
+                    raise
+            else:
+                cursor.execute(self.sql(name), params)
+        except Exception:
+            self._record(name, time.perf_counter() - started, error=True)
+            raise
+        self._record(name, time.perf_counter() - started)
+
+    def forget(self, conn):
+        """forget which statements were prepared on a connection"""
+        with self._lock:
+            self._prepared_on.pop(conn, None)
+
+    def record(self, name, seconds, error=False):
+        """record the duration of a statement which was executed outside of execute() (e.g. execute_values)"""
+        self._record(name, seconds, error)
+
+    def _record(self, name, seconds, error=False):
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += 1 if error else 0
+            stats[2] += seconds
+            stats[3] = max(stats[3], seconds)
+
+    def statistics(self):
+        """
+        Returns:
+            dict statement name -> {calls, errors, total_ms, avg_ms, max_ms, prepared}
+        """
+        with self._lock:
+            return {
+                name: {
+                    "calls": calls,
+                    "errors": errors,
+                    "total_ms": total * 1000,
+                    "avg_ms": total * 1000 / calls if calls else 0.0,
+                    "max_ms": max_seconds * 1000,
+                    "prepared": name in self.prepared,
+                }
+                for name, (calls, errors, total, max_seconds) in self._stats.items()
+            }
+
+
+# application-wide repository
+repository = StatementRepository()
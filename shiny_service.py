@@ -0,0 +1,239 @@
+"""R Shiny dashboard process, started and probed without blocking the GUI.
+
+The dashboard (shiny_dashboard/app.R) runs in a QProcess. While R loads, a QTimer probes the port
+every PROBE_INTERVAL ms with a non-blocking QTcpSocket, so the window stays usable during the start:
+
+    stopped -> starting -> running
+                        -> failed (Rscript not found, R exited, or the port did not open within START_TIMEOUT)
+
+On macOS/Linux R runs in a session (process group) of its own and the whole group is stopped, so no
+child process of R survives and keeps the port open (the next start would find the old dashboard).
+
+With "shiny_prestart": true in user_login_config.json the MainWindow starts the dashboard in the
+background at launch, so it is usually running before the Statistics page is opened.
+"""
+
+import json
+import os
+import signal
+
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, QTimer, Signal
+from PySide6.QtNetwork import QTcpSocket
+
+from config_store import BASE_PATH
+from Data_Base_Connection import load_config
+
+SHINY_DIR = os.path.join(BASE_PATH, "shiny_dashboard")
+SHINY_HOST = "127.0.0.1"
+SHINY_PORT = 8050
+PROBE_INTERVAL = 200 # ms between two connection attempts while the dashboard starts
+START_TIMEOUT = 10000 # ms until a dashboard which does not answer counts as failed
+STOP_TIMEOUT = 3000 # ms R gets to exit before it is killed
+
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+FAILED = "failed"
+
+
+class ShinyService(QObject):
+    """ Starts, watches and stops the Shiny dashboard process"""
+
+    state_changed = Signal(str) # STOPPED, STARTING, RUNNING or FAILED
+    ready = Signal(str) # url, the dashboard answers
+    failed = Signal(str) # error message
+
+    def __init__(self, port=SHINY_PORT, parent=None):
+        """
+        Args:
+            port: port the dashboard listens on (passed to R as SHINY_PORT)
+        """
+        super().__init__(parent)
+        self.port = port
+        self.state = STOPPED
+        self._process = None
+        self._process_group = None # pid of R = id of its process group (not on Windows)
+        self._socket = None # running probe
+
+        self._probe_timer = QTimer(self)
+        self._probe_timer.setSingleShot(True)
+        self._probe_timer.timeout.connect(self._probe)
+
+        self._start_timer = QTimer(self)
+        self._start_timer.setSingleShot(True)
+        self._start_timer.timeout.connect(self._on_start_timeout)
+
+    def url(self):
+        return f"http://{SHINY_HOST}:{self.port}"
+
+    def is_running(self):
+        return self.state == RUNNING
+
+    # === START / STOP ===
+    def start(self):
+        """start the dashboard in the background and return right away, ready or failed follows"""
+        if self.state in (STARTING, RUNNING):
+            return
+
+        try:
+            rscript_path = load_config().get("rscript_path")
+        except (OSError, json.JSONDecodeError) as e:
+            self._fail(f"Error loading config: {e}")
+            return
+        if not rscript_path:
+            self._fail("Please save your R-Script path on the Home page first")
+            return
+        shiny_script_path = os.path.join(SHINY_DIR, "app.R")
+        if not os.path.exists(shiny_script_path):
+            self._fail(f"Shiny app not found at: {shiny_script_path}")
+            return
+
+        # pass port to R via environment variable
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("SHINY_PORT", str(self.port))
+
+        process = QProcess(self)
+        process.setProgram(rscript_path)
+        process.setArguments(["app.R"])
+        process.setWorkingDirectory(SHINY_DIR)
+        process.setProcessEnvironment(env)
+        process.setStandardInputFile(QProcess.nullDevice())
+        process.setStandardOutputFile(QProcess.nullDevice())
+        process.setStandardErrorFile(QProcess.nullDevice())
+        if os.name != "nt":
+            process.setUnixProcessParameters(QProcess.UnixProcessFlag.CreateNewSession)
+        process.errorOccurred.connect(lambda error, p=process: self._on_process_error(p, error))
+        process.finished.connect(lambda exit_code, exit_status, p=process: self._on_process_finished(p, exit_code))
+        self._process = process
+
+        self._set_state(STARTING)
+        process.start()
+        self._process_group = process.processId() or None
+        self._start_timer.start(START_TIMEOUT)
+        self._probe_timer.start(PROBE_INTERVAL)
+
+    def stop(self):
+        """stop the dashboard, waits up to STOP_TIMEOUT ms for R to exit"""
+        self._stop_probing()
+        process, self._process = self._process, None
+        self._set_state(STOPPED)
+        if process is None:
+            return
+
+        # Windows has no signal a console program could react to, terminate() would only delay the kill
+        if os.name == "nt":
+            if process.state() != QProcess.ProcessState.NotRunning:
+                process.kill()
+                process.waitForFinished(STOP_TIMEOUT)
+            return
+
+        self._kill_process_group(signal.SIGTERM)
+        finished = process.state() == QProcess.ProcessState.NotRunning or process.waitForFinished(STOP_TIMEOUT)
+        self._kill_process_group(signal.SIGKILL) # R or children which ignored SIGTERM would keep the port
+        if not finished:
+            process.waitForFinished(STOP_TIMEOUT)
+        self._process_group = None
+
+    def _kill_process_group(self, sig):
+        if self._process_group is None:
+            return
+        try:
+            os.killpg(self._process_group, sig)
+        except (ProcessLookupError, PermissionError):
+            pass # the whole group exited already
+
+    # === STATE MACHINE ===
+    def _probe(self):
+        """try to connect to the dashboard, the answer arrives as signal of the socket"""
+        if self.state != STARTING:
+            return
+        socket = QTcpSocket(self)
+        socket.connected.connect(lambda s=socket: self._on_probe_connected(s))
+        socket.errorOccurred.connect(lambda error, s=socket: self._on_probe_failed(s))
+        self._socket = socket
+        socket.connectToHost(SHINY_HOST, self.port)
+
+    def _on_probe_connected(self, socket):
+        socket.abort()
+        socket.deleteLater()
+        if socket is not self._socket or self.state != STARTING:
+            return
+        self._socket = None
+        self._start_timer.stop()
+        self._set_state(RUNNING)
+        self.ready.emit(self.url())
+
+    def _on_probe_failed(self, socket):
+        """port not open yet, try again after PROBE_INTERVAL"""
+        socket.deleteLater()
+        if socket is not self._socket or self.state != STARTING:
+            return
+        self._socket = None
+        self._probe_timer.start(PROBE_INTERVAL)
+
+    def _on_start_timeout(self):
+        if self.state != STARTING:
+            return
+        self.stop()
+        self._fail("Shiny Dashboard did not start within the expected time.")
+
+    def _on_process_error(self, process, error):
+        """
+        Callback of the process
+        Args:
+            process: the QProcess (a stopped one may still report)
+            error: QProcess.ProcessError, only FailedToStart is handled here (exits arrive as finished)
+        """
+        if process is not self._process or error != QProcess.ProcessError.FailedToStart:
+            return
+        self._stop_probing()
+        self._process = None
+        self._fail(f"Error starting Shiny: {process.errorString()}")
+
+    def _on_process_finished(self, process, exit_code):
+        """R exited without being stopped (error in app.R, port in use, ...)"""
+        if process is not self._process:
+            return
+        self._stop_probing()
+        self._process = None
+        if os.name != "nt":
+            self._kill_process_group(signal.SIGKILL) # R is gone, its children must not keep the port
+            self._process_group = None
+        self._fail(f"Shiny Dashboard exited unexpectedly (exit code {exit_code})")
+
+    def _stop_probing(self):
+        self._probe_timer.stop()
+        self._start_timer.stop()
+        if self._socket is not None:
+            self._socket.abort()
+            self._socket.deleteLater()
+            self._socket = None
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.state_changed.emit(state)
+
+    def _fail(self, message):
+        self._set_state(FAILED)
+        self.failed.emit(message)
+
+
+_service = None
+
+def get_shiny_service():
+    """returns the application-wide dashboard service (created on first use, must be called from the GUI thread)"""
+    global _service
+    if _service is None:
+        _service = ShinyService()
+    return _service
+
+
+def prestart_if_enabled():
+    """start the dashboard in the background at launch if "shiny_prestart" is set in user_login_config.json"""
+    try:
+        enabled = load_config().get("shiny_prestart", False)
+    except (OSError, json.JSONDecodeError):
+        return
+    if enabled:
+        get_shiny_service().start()
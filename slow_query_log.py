@@ -0,0 +1,181 @@
+"""Log of slow database operations.
+
+Every operation of a DatabaseWorker which takes longer than the threshold (slow_query_threshold_ms in
+user_login_config.json, 0 turns the log off) is written to logs/slow_queries.log with its duration,
+redacted parameters and the plan of EXPLAIN (ANALYZE, BUFFERS). The plan is captured on a thread of its
+own with a separate connection, the statement runs there a second time inside a transaction that is
+always rolled back, so inserts and deletes are not applied twice. Each query type is explained at most
+once per EXPLAIN_INTERVAL, to keep the extra load on the server small.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+import psycopg2
+
+from config_store import BASE_PATH
+from Data_Base_Connection import load_config
+
+LOG_PATH = os.path.join(BASE_PATH, "logs", "slow_queries.log")
+LOG_MAX_BYTES = 1_000_000 # size of one log file before it is rotated
+LOG_BACKUP_COUNT = 5 # rotated files kept (slow_queries.log.1 ... .5)
+
+DEFAULT_THRESHOLD_MS = 500
+THRESHOLD_REFRESH_INTERVAL = 30 # seconds until the threshold is read from the config again
+EXPLAIN_INTERVAL = 600 # seconds between two plans of the same query type
+EXPLAIN_TIMEOUT_MS = 30000 # statement_timeout of the EXPLAIN connection
+QUEUE_SIZE = 50 # slow queries waiting to be logged, further ones are dropped
+
+
+def redact(params):
+    """
+    replace the parameter values by their type (and length), so no personal data ends up in the log
+
+    Returns:
+        list of strings, e.g. ["str(8)", "int", "NULL"]
+    """
+    if params is None:
+        return []
+    redacted = []
+    for value in params:
+        if value is None:
+            redacted.append("NULL")
+        elif isinstance(value, str):
+            redacted.append(f"str({len(value)})")
+        elif isinstance(value, (list, tuple)):
+            redacted.append(f"{type(value).__name__}({len(value)})")
+        elif isinstance(value, (bool, int, float, Decimal, date, datetime)):
+            redacted.append(type(value).__name__)
+        else:
+            redacted.append("?")
+    return redacted
+
+
+class SlowQueryLog:
+    """ Writes slow operations (and their plans) to a rotating log file, in the background"""
+
+    def __init__(self, path=LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
+        self._logger = None
+        self._threshold_ms = DEFAULT_THRESHOLD_MS
+        self._threshold_read_at = None
+        self._last_explained = {} # query type -> time of the last EXPLAIN
+
+    def threshold_ms(self):
+        """threshold from user_login_config.json, re-read every THRESHOLD_REFRESH_INTERVAL seconds"""
+        now = time.monotonic()
+        if self._threshold_read_at is None or now - self._threshold_read_at > THRESHOLD_REFRESH_INTERVAL:
+            self._threshold_read_at = now
+            try:
+                self._threshold_ms = float(load_config().get("slow_query_threshold_ms", DEFAULT_THRESHOLD_MS))
+            except (OSError, ValueError, TypeError):
+                self._threshold_ms = DEFAULT_THRESHOLD_MS
+        return self._threshold_ms
+
+    def report(self, name, sql, params, seconds):
+        """
+        Called by the workers after every operation, returns right away.
+
+        Args:
+            name: query type (statement name or worker type)
+            sql: SQL text with %s placeholders, None if the operation has no single statement (no plan)
+            params: params of the statement (only logged redacted)
+            seconds: duration of execute and fetch
+        """
+        threshold = self.threshold_ms()
+        if threshold <= 0 or seconds * 1000 < threshold:
+            return
+        try:
+            self._queue.put_nowait((name, sql, params, seconds))
+        except queue.Full:
+            return # the log is behind, a slow server should not be loaded with even more EXPLAINs
+        self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+                self._thread.start()
+
+    def _get_logger(self):
+        if self._logger is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            handler = RotatingFileHandler(self.path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger = logging.getLogger("slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def _run(self):
+        """log thread: explain and write the reported queries one after another"""
+        while True:
+            name, sql, params, seconds = self._queue.get()
+            try:
+                self._write(name, sql, params, seconds)
+            except Exception as e:
+                print(f"Could not write the slow query log: {e}")
+
+    def _write(self, name, sql, params, seconds):
+        lines = [f"{name} took {seconds * 1000:.1f} ms, params: [{', '.join(redact(params))}]"]
+
+        last = self._last_explained.get(name)
+        if sql is None:
+            lines.append("    (no plan, the operation runs several statements)")
+        elif last is not None and time.monotonic() - last < EXPLAIN_INTERVAL:
+            lines.append(f"    (plan captured less than {EXPLAIN_INTERVAL // 60} min ago)")
+        else:
+            self._last_explained[name] = time.monotonic()
+            lines.extend("    " + line for line in self._explain(sql, params))
+
+        self._get_logger().info("\n".join(lines))
+
+    def _explain(self, sql, params):
+        """
+        run the statement with EXPLAIN (ANALYZE, BUFFERS) on a connection of its own
+
+        Returns:
+            lines of the plan (or of the error)
+        """
+        try:
+            config = load_config()
+            conn = psycopg2.connect(
+                host=config["host"],
+                database=config["database"],
+                user=config["username"],
+                password=config["password"],
+                port=config["port"],
+                connect_timeout=5,
+                options=f"-c statement_timeout={EXPLAIN_TIMEOUT_MS}"
+            )
+        except (psycopg2.Error, OSError, KeyError, ValueError) as e:
+            return [f"(no plan, connection failed: {e})"]
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                return [row[0] for row in cursor.fetchall()]
+        except psycopg2.Error as e:
+            # e.g. the insert is a duplicate now, because the original statement was committed
+            return [f"(no plan: {str(e).strip()})"]
+        finally:
+            # ANALYZE executes the statement, it must not change any data
+            try:
+                conn.rollback()
+            finally:
+                conn.close()
+
+
+# application-wide log, fed by the DatabaseWorkers
+slow_query_log = SlowQueryLog()
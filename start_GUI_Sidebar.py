@@ -3,21 +3,18 @@
 # This application was fully developed by the author.
 # The author is responsible for the complete implementation
 
+from PySide6.QtCore import QCoreApplication, Qt
 from PySide6.QtWidgets import QApplication
 from Sidebar import MainWindow
 import sys
-from Data_Base_Connection import prepare_database
 
 """run this code to open the GUI"""
 
-# Prepare the database before showing GUI
-try:    
-    prepare_database()
-except Exception as e:
-    print(f"Database connection failed! maybe the user_login_config.json is wrong? {e}")
-
+# QtWebEngine is only loaded when the dashboard is started, it needs shared OpenGL contexts from the beginning
+QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
 app = QApplication(sys.argv)
 
+# the database schema is checked in the background once the window is open (see MainWindow.verify_schema)
 window = MainWindow(app)
 window.show()
 
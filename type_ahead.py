@@ -0,0 +1,134 @@
+"""Server-side type-ahead search for the student and exam comboboxes.
+
+Instead of filtering every row of the shared entity model in the GUI, the typed text is sent to the
+database (trigram index, see SEARCH_INDEXES in Data_Base_Connection.py) after a short pause and only the
+best MAX_RESULTS matches are shown in the completer popup. A newer keystroke replaces the pending search,
+the result of a query which is still running is discarded when it arrives.
+"""
+
+from PySide6.QtCore import QModelIndex, QObject, Qt, QTimer, Signal
+from PySide6.QtGui import QStandardItem, QStandardItemModel
+from PySide6.QtWidgets import QCompleter
+
+from database_worker import DatabaseWorker, get_executor
+from entity_cache import get_entity_cache
+from entity_model import DISPLAY_TEXTS, get_entity_model
+from repository import SEARCH_STATEMENTS
+
+SEARCH_DELAY = 250 # ms without keystroke before the search is sent
+MIN_SEARCH_LENGTH = 2 # shorter texts are not searched
+MAX_RESULTS = 20 # rows shown in the popup
+
+
+def escape_like(text):
+    """escape the wildcards of (I)LIKE, so the typed text is matched literally"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TypeAheadSearch(QObject):
+    """ Debounced search of one combobox, the selected result is selected in the shared entity model"""
+
+    search_failed = Signal(str) # error message
+
+    def __init__(self, combobox, table):
+        """
+        Args:
+            combobox: editable QComboBox bound to the entity model of the table
+            table: "student" or "exam"
+        """
+        super().__init__(combobox)
+        self.combobox = combobox
+        self.table = table
+        self._display_text = DISPLAY_TEXTS[table]
+        self._worker = None # running search, results of other workers are stale
+        self._pending_key = None # selected key which is not in the entity model yet
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SEARCH_DELAY)
+        self._timer.timeout.connect(self._search)
+
+        # the popup shows the results as they are, they are already filtered by the database
+        self._results = QStandardItemModel(self)
+        self._completer = QCompleter(self._results, combobox)
+        self._completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self._completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        combobox.setCompleter(self._completer)
+        # connected after setCompleter, so the selection of the combobox itself is overwritten
+        self._completer.activated[QModelIndex].connect(self._on_activated)
+
+        combobox.lineEdit().textEdited.connect(self._on_text_edited)
+        get_entity_cache().synced.connect(self._on_synced)
+
+    def restore_completer_model(self):
+        """QComboBox.setModel also replaces the model of the completer, the popup has to show the results again"""
+        self._completer.setModel(self._results)
+
+    def _on_text_edited(self, text):
+        """restart the delay, a search waiting for its result is outdated now"""
+        if self._worker is not None:
+            self._worker.cancel() # does not run if it is still queued, the statement is cancelled if it runs
+            self._worker = None
+        if len(text.strip()) < MIN_SEARCH_LENGTH:
+            self._timer.stop()
+            self._results.clear()
+            self._completer.popup().hide()
+            return
+        self._timer.start()
+
+    def _search(self):
+        text = self.combobox.lineEdit().text().strip()
+        if len(text) < MIN_SEARCH_LENGTH:
+            return
+
+        worker = DatabaseWorker(
+            statement=SEARCH_STATEMENTS[self.table],
+            params=(f"%{escape_like(text)}%", text, text, MAX_RESULTS),
+            fetch=True
+        )
+        worker.data_fetched.connect(lambda success, rows, error_msg, w=worker: self._on_results(w, success, rows, error_msg))
+        self._worker = worker
+        get_executor().submit(worker)
+
+    def _on_results(self, worker, success, rows, error_msg):
+        if worker is not self._worker:
+            return # the text changed in the meantime
+        self._worker = None
+
+        if not success:
+            self.search_failed.emit(f"Search failed: {error_msg}")
+            return
+
+        self._results.clear()
+        for row in rows:
+            item = QStandardItem(self._display_text(row))
+            item.setData(row[0], Qt.ItemDataRole.UserRole)
+            self._results.appendRow(item)
+
+        if rows and self.combobox.lineEdit().hasFocus():
+            self._completer.setCompletionPrefix(self.combobox.lineEdit().text())
+            self._completer.complete()
+
+    def _on_activated(self, index):
+        """select the chosen result in the combobox"""
+        key = index.data(Qt.ItemDataRole.UserRole)
+        if key is None:
+            return
+        if not self._select(key):
+            # created after the last sync of the entity cache -> select it once it is synced
+            self._pending_key = key
+            get_entity_cache().sync(self.table)
+
+    def _select(self, key):
+        row = get_entity_model(self.table).row_for_key(key)
+        if row < 0:
+            return False
+        self._pending_key = None
+        self.combobox.setCurrentIndex(row)
+        return True
+
+    def _on_synced(self, table, changed):
+        if table == self.table and self._pending_key is not None:
+            key = self._pending_key
+            self._pending_key = None
+            self._select(key)
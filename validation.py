@@ -0,0 +1,123 @@
+"""Validation rules for students, exams and grades.
+Shared by the GUI pages, the CSV importer and the command line tools, so this module must not import Qt."""
+
+import datetime
+import math
+
+MIN_AGE = 5
+MAX_AGE = 120
+
+MIN_GRADE = 1.0
+MAX_GRADE = 6.0
+
+MAX_MATRICULATION_NUMBER = 999999999 # same range as the QIntValidator of the StudentPage
+ID_LENGTH = 10 # matriculation numbers and PNRs are stored with leading zeros
+
+
+def calculate_age(birth_date: datetime.date, today: datetime.date = None) -> int:
+    """
+    Calculate age from birth date
+
+    Args:
+        birth_date: date of birth
+        today: reference date (default: today)
+
+    Returns:
+        Age in years
+    """
+    today = today or datetime.date.today()
+    age = today.year - birth_date.year
+
+    if (today.month, today.year) < (birth_date.month, birth_date.year):
+        age -= 1
+
+    return age
+
+
+def validate_age(birth_date: datetime.date, today: datetime.date = None):
+    """
+    Validate that age is between 5 and 120 years
+
+    Args:
+        birth_date: date of birth
+        today: reference date (default: today)
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    age = calculate_age(birth_date, today)
+
+    if age < MIN_AGE:
+        return False, f"Student must be at least {MIN_AGE} years old (calculated age: {age})"
+    if age > MAX_AGE:
+        return False, f"Student age cannot exceed {MAX_AGE} years (calculated age: {age})"
+    return True, ""
+
+
+def parse_grade(text: str):
+    """
+    parse a grade entered by the user (comma or dot as decimal separator)
+
+    Returns:
+        the grade as float rounded to one decimal, None if it is not a grade between 1.0 and 6.0
+    """
+    try:
+        grade = round(float(str(text).strip().replace(',', '.')), 1)
+    except ValueError:
+        return None
+    if not math.isfinite(grade): # 'nan' would pass both comparisons below
+        return None
+    if grade < MIN_GRADE or grade > MAX_GRADE:
+        return None
+    return grade
+
+
+def normalize_grade_text(text: str):
+    """normalize grade text for comparisons, e.g. '1,3' -> '1.3' (invalid text is returned unchanged)"""
+    grade = parse_grade(text) if text.strip() else None
+    return f"{grade:.1f}" if grade is not None else text.strip()
+
+
+def format_matriculation_number(text: str):
+    """
+    validate a matriculation number and add the leading zeros used in the DB
+
+    Returns:
+        Tuple of (formatted number or None, error_message)
+    """
+    text = str(text).strip()
+    # isdigit() alone also accepts other digits like '١٢٣', the DB only knows 0-9
+    if not (text.isascii() and text.isdigit()) or int(text) > MAX_MATRICULATION_NUMBER:
+        return None, f"Invalid matriculation number '{text}' (0 - {MAX_MATRICULATION_NUMBER})"
+    return text.zfill(ID_LENGTH), ""
+
+
+def format_pnr(text: str):
+    """
+    validate an exam number (PNr) and add the leading zeros used in the DB
+
+    Returns:
+        Tuple of (formatted PNr or None, error_message)
+    """
+    text = str(text).strip()
+    if not text:
+        return None, "Missing exam number"
+    if len(text) > 20:
+        return None, f"Exam number '{text}' is longer than 20 characters"
+    return text.zfill(ID_LENGTH), ""
+
+
+def parse_date(text: str):
+    """
+    parse a date in ISO format (yyyy-MM-dd) or in the format of the GUI (dd.MM.yyyy)
+
+    Returns:
+        datetime.date or None if the text is no valid date
+    """
+    text = str(text).strip()
+    for date_format in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,138 @@
+"""Write-behind queue of the rapid-entry mode.
+
+In rapid-entry mode the pages do not wait for the database: a saved form is queued and cleared right
+away. The queue is flushed FLUSH_INTERVAL ms after the first queued entry or as soon as MAX_BATCH
+entries are waiting, all queued rows are written in one transaction with one multi-row statement
+(see WriteBehindWorker). Rows the database rejects (duplicates, check constraints, students/exams
+deleted in the meantime) are handed back to the page for its review list, the other rows of the
+batch are written anyway. Only one batch is written at a time, entries queued meanwhile form the next one.
+"""
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from psycopg2 import errorcodes
+
+from database_worker import WriteBehindWorker, get_executor
+
+FLUSH_INTERVAL = 300 # ms between the first queued entry and the write
+MAX_BATCH = 50 # entries which are written right away, without waiting for the interval
+RETRY_INTERVAL = 5000 # ms until a batch is written again after the whole batch failed (e.g. connection lost)
+
+# SQLSTATE of a rejected row -> reason shown in the review list
+REJECT_REASONS = {
+    errorcodes.UNIQUE_VIOLATION: "already exists",
+    errorcodes.FOREIGN_KEY_VIOLATION: "student or exam does not exist (anymore)",
+    errorcodes.CHECK_VIOLATION: "value out of range",
+    errorcodes.NOT_NULL_VIOLATION: "value missing",
+}
+
+_queues = []
+
+
+class WriteBehindQueue(QObject):
+    """ Collects the rows of one insert statement and writes them in batches in the background"""
+
+    pending_changed = Signal(int) # entries which are not written yet (queued + being written)
+    flushed = Signal(int, list) # written rows, rejected entries as [(entry, reason)]
+    flush_failed = Signal(str) # the whole batch failed, it is written again after RETRY_INTERVAL
+
+    def __init__(self, statement, template=None, parent=None):
+        """
+        Args:
+            statement: multi-row statement of repository.py (one VALUES %s placeholder)
+            template: row template for execute_values, None for plain placeholders
+        """
+        super().__init__(parent)
+        self.statement = statement
+        self.template = template
+        self._queue = [] # (row, entry)
+        self._writing = [] # (row, entry) of the running batch
+        self._worker = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        _queues.append(self)
+
+    def pending_count(self):
+        return len(self._queue) + len(self._writing)
+
+    def enqueue(self, row, entry):
+        """
+        queue one row, returns right away
+
+        Args:
+            row: params of one row for the statement
+            entry: dict with the data the page needs to show ("text") or restore the row if it gets rejected
+        """
+        self._queue.append((row, entry))
+        self.pending_changed.emit(self.pending_count())
+        if len(self._queue) >= MAX_BATCH:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start(FLUSH_INTERVAL)
+
+    def flush(self):
+        """write the queued rows now, or right after the running batch"""
+        self._timer.stop()
+        if self._worker is None and self._queue:
+            self._submit()
+
+    def _submit(self):
+        batch, self._queue = self._queue, []
+        worker = WriteBehindWorker(self.statement, [row for row, _ in batch], self.template)
+        worker.operation_finished.connect(
+            lambda success, message, rows_affected, w=worker: self._on_written(w, success, message, rows_affected))
+        self._worker = worker
+        self._writing = batch
+        get_executor().submit(worker)
+        return worker
+
+    def _on_written(self, worker, success, message, rows_affected):
+        """
+        Callback of the WriteBehindWorker
+        Args:
+            worker: the finished worker
+            success: False if the whole batch failed (nothing was written)
+            message: str errormsg from the worker
+            rows_affected: number of written rows
+        """
+        if worker is not self._worker:
+            return # written by flush_all while the application closes
+        batch, self._writing, self._worker = self._writing, [], None
+
+        if success:
+            rejected = [(batch[index][1], REJECT_REASONS.get(code, reason)) for index, code, reason in worker.rejected]
+            self.flushed.emit(rows_affected, rejected)
+            if self._queue:
+                self._timer.start(FLUSH_INTERVAL)
+        else:
+            # nothing of the batch was written, it goes back to the front of the queue
+            self._queue = batch + self._queue
+            self.flush_failed.emit(message)
+            self._timer.start(RETRY_INTERVAL)
+        self.pending_changed.emit(self.pending_count())
+
+
+def flush_all(timeout=3):
+    """
+    write everything still queued and wait for it, called when the application closes.
+    There is no review list anymore, rejected rows are printed.
+
+    Args:
+        timeout: seconds to wait per queue
+    """
+    for queue in _queues:
+        queue._timer.stop()
+        workers = [queue._worker] if queue._worker is not None else []
+        batches = [queue._writing] if queue._worker is not None else []
+        if queue._queue:
+            batches.append(queue._queue)
+            workers.append(queue._submit()) # next to the running batch, there is no time to wait for it
+        for worker, batch in zip(workers, batches):
+            if not worker.wait(timeout):
+                print(f"{len(batch)} queued entries of {queue.statement} were not written in time")
+            elif not worker.success:
+                print(f"{len(batch)} queued entries of {queue.statement} could not be written: {worker.error_message}")
+            else:
+                for index, code, reason in worker.rejected:
+                    print(f"Rejected {batch[index][1]['text']}: {REJECT_REASONS.get(code, reason)}")